@@ -1,7 +1,5 @@
 # Home.py - FINAL CORRECTED AUTHENTICATION & LANDING PAGE
 import streamlit as st
-# Assuming app.services.user_service is accessible for these imports
-from app.services.user_service import login_user, register_user
 from app.auth import require_login, logout_button
 
 def set_page_style():
@@ -71,6 +69,9 @@ def show_dashboard_links():
             st.markdown("Browse dataset metadata, track file sizes, and assess data asset value.")
             st.page_link("pages/Data_Science.py", label="Go to Data Catalog", icon="➡️", use_container_width=True)
 
+    if st.session_state.get("role") == "admin":
+        st.page_link("pages/Admin_Metrics.py", label="Performance Metrics (admin)", icon="📈")
+
 
 # --- Main App Logic ---
 
@@ -104,11 +105,15 @@ with login_tab:
         if not entered_user or not entered_pass:
             st.warning("⚠️ Please provide both credentials.")
         else:
+            # Imported here so visitors who only see the login form don't load bcrypt or the data layer
+            from app.services.user_service import login_user, get_user_role
+
             is_valid, response_msg = login_user(entered_user, entered_pass) 
             if is_valid:
                 # Set authentication state
                 st.session_state.authenticated = True
                 st.session_state.username = entered_user
+                st.session_state.role = get_user_role(entered_user)
                 st.success(f"✅ {response_msg}. Redirecting to dashboard access...")
                 
                 # Use st.rerun() to switch to the authenticated view within Home.py
@@ -129,6 +134,8 @@ with signup_tab:
         if not new_user or not new_pass:
             st.warning("⚠️ All fields are required for registration.")
         else:
+            from app.services.user_service import register_user
+
             success, msg = register_user(new_user, new_pass, "analyst") 
             if success:
                 st.success(f"🎉 {msg}")
@@ -14,5 +14,14 @@ def logout_button():
     if st.button("🚪 Log Out", type="secondary", use_container_width=True):
         st.session_state.authenticated = False
         st.session_state.username = ""
+        st.session_state.role = None
         st.switch_page("Home")
 
+
+
+def require_admin():
+    """Restricts a page to users with the admin role."""
+    require_login()
+    if st.session_state.get("role") != "admin":
+        st.error("⛔ This page is only available to administrators.")
+        st.stop()
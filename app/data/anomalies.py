@@ -0,0 +1,88 @@
+"""Storage for the arrival-rate anomaly detectors (see app/services/anomaly.py)."""
+from app.data.db import fetch_one, get_backend, read_dataframe
+from app.instrumentation import timed
+
+# NULL, NaN and +/-infinity all fall outside this range, on SQLite and PostgreSQL alike
+FINITE_RANGE = (-1e300, 1e300)
+
+
+@timed("db_query_seconds")
+def get_detector_version(stream):
+    """Returns the stored state's version, or None before the detector's first update."""
+    row = fetch_one("SELECT version FROM anomaly_state WHERE stream = ?", (stream,))
+    return row[0] if row else None
+
+
+@timed("db_query_seconds")
+def get_detector_state(stream):
+    """
+    Returns (version, state JSON, baseline JSON) for a detector, or None before its
+    first update. The baseline is None if it has never been saved separately.
+    """
+    return fetch_one("""
+        SELECT s.version, s.state, b.state
+        FROM anomaly_state s
+        LEFT JOIN anomaly_baselines b ON b.stream = s.stream
+        WHERE s.stream = ?
+    """, (stream,))
+
+
+@timed("db_query_seconds")
+def save_detector_state(stream, version, state, baseline, alerts, replace_alerts=False):
+    """
+    Stores a detector's new state, its baseline (None = unchanged) and alerts in one
+    transaction, provided the stored version is still `version` (None = nothing
+    stored yet). Returns False without writing anything if another process saved
+    first. alerts are (alert_key, bucket_start, observed, expected, score) tuples;
+    replace_alerts drops the stream's earlier alerts first, for a full replay.
+    """
+    backend = get_backend()
+    conn = backend.connect()
+    try:
+        cursor = conn.cursor()
+        if version is None:
+            cursor.execute(backend.prepare("""
+                INSERT INTO anomaly_state (stream, version, state) VALUES (?, 1, ?)
+                ON CONFLICT (stream) DO NOTHING
+            """), (stream, state))
+        else:
+            cursor.execute(backend.prepare("""
+                UPDATE anomaly_state SET version = version + 1, state = ?, updated_at = CURRENT_TIMESTAMP
+                WHERE stream = ? AND version = ?
+            """), (state, stream, version))
+        if cursor.rowcount != 1:
+            conn.rollback()
+            return False
+
+        if baseline is not None:
+            cursor.execute(backend.prepare("""
+                INSERT INTO anomaly_baselines (stream, state) VALUES (?, ?)
+                ON CONFLICT (stream) DO UPDATE SET state = excluded.state, updated_at = CURRENT_TIMESTAMP
+            """), (stream, baseline))
+        if replace_alerts:
+            cursor.execute(backend.prepare("DELETE FROM anomaly_alerts WHERE stream = ?"), (stream,))
+        cursor.executemany(backend.prepare("""
+            INSERT INTO anomaly_alerts (stream, alert_key, bucket_start, observed, expected, score)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (stream, alert_key, bucket_start) DO NOTHING
+        """), [(stream, *alert) for alert in alerts])
+        conn.commit()
+        return True
+    finally:
+        conn.close()
+
+
+@timed("db_query_seconds")
+def get_recent_alerts(stream, limit=20):
+    """
+    The stream's latest alerts, newest hour first. Alerts without a finite expected
+    value and score are left out; the detector no longer raises them, but older
+    versions could store NULL (SQLite's NaN), NaN or infinity.
+    """
+    return read_dataframe("""
+        SELECT bucket_start, alert_key, observed, expected, score, created_at
+        FROM anomaly_alerts
+        WHERE stream = ? AND expected BETWEEN ? AND ? AND score BETWEEN ? AND ?
+        ORDER BY bucket_start DESC, score DESC
+        LIMIT ?
+    """, (stream, *FINITE_RANGE, *FINITE_RANGE, int(limit)))
@@ -0,0 +1,162 @@
+from datetime import date, timedelta
+
+from app.data.db import get_backend, fetch_one, read_dataframe
+from app.instrumentation import timed
+
+# Closed work older than this many days is moved out of the hot tables
+ARCHIVE_HORIZON_DAYS = 180
+
+# Per hot table: the expression giving each row's date, and the statuses that are safe to archive
+ARCHIVE_POLICIES = {
+    "cyber_incidents": {
+        "event_time": "COALESCE(date, CAST(created_at AS TEXT))",
+        "statuses": ("Closed", "Resolved"),
+    },
+    "it_tickets": {
+        "event_time": "COALESCE(created_date, CAST(created_at AS TEXT))",
+        "statuses": ("Closed", "Resolved"),
+    },
+}
+
+
+def partition_name(table_name, month):
+    """Name of the monthly archive table, e.g. cyber_incidents_archive_2024_04."""
+    return f"{table_name}_archive_{month.replace('-', '_')}"
+
+
+def _month_bounds(month):
+    """First day of the month and first day of the next one, as ISO strings."""
+    year, mon = (int(part) for part in month.split("-"))
+    next_month = f"{year + 1}-01" if mon == 12 else f"{year}-{mon + 1:02d}"
+    return f"{month}-01", f"{next_month}-01"
+
+
+@timed("db_query_seconds")
+def archive_closed_records(table_name, horizon_days=ARCHIVE_HORIZON_DAYS, today=None):
+    """
+    Moves closed rows older than the horizon from a hot table into monthly archive tables.
+    Rows the correlation or the anomaly detector haven't processed yet stay in the hot
+    table, since both only read new rows from there. Returns the number of rows moved.
+    """
+    # Imported here because both modules read through this one
+    from app.data.correlation import get_correlated_through
+    from app.services.anomaly import get_detected_through
+
+    policy = ARCHIVE_POLICIES[table_name]
+    event_time = policy["event_time"]
+    cutoff = ((today or date.today()) - timedelta(days=horizon_days)).isoformat()
+    processed_through = min(get_correlated_through(table_name), get_detected_through(table_name))
+    status_marks = ", ".join("?" for _ in policy["statuses"])
+    eligible = f"status IN ({status_marks}) AND {event_time} < ? AND id <= ?"
+    eligible_params = (*policy["statuses"], cutoff, processed_through)
+
+    backend = get_backend()
+    conn = backend.connect()
+    moved = 0
+    try:
+        cursor = conn.cursor()
+        cursor.execute(backend.prepare(
+            f"SELECT DISTINCT substr({event_time}, 1, 7) FROM {table_name} WHERE {eligible}"
+        ), eligible_params)
+        months = sorted(row[0] for row in cursor.fetchall() if row[0])
+
+        for month in months:
+            archive_table = partition_name(table_name, month)
+            month_start, month_end = _month_bounds(month)
+            in_month = f"{eligible} AND {event_time} >= ? AND {event_time} < ?"
+            params = (*eligible_params, month_start, month_end)
+
+            # Same columns as the hot table, so archived rows keep their original ids
+            cursor.execute(f"CREATE TABLE IF NOT EXISTS {archive_table} AS SELECT * FROM {table_name} WHERE 1 = 0")
+            cursor.execute(backend.prepare(
+                f"INSERT INTO {archive_table} SELECT * FROM {table_name} WHERE {in_month}"
+            ), params)
+            cursor.execute(backend.prepare(f"DELETE FROM {table_name} WHERE {in_month}"), params)
+            moved += cursor.rowcount
+
+            cursor.execute(backend.prepare(f"SELECT COUNT(*) FROM {archive_table}"))
+            row_count = cursor.fetchone()[0]
+            cursor.execute(backend.prepare("""
+                INSERT INTO archive_partitions (table_name, partition_name, month, row_count)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (partition_name) DO UPDATE SET row_count = excluded.row_count
+            """), (table_name, archive_table, month, row_count))
+
+        conn.commit()
+    finally:
+        conn.close()
+    return moved
+
+
+def archive_all(horizon_days=ARCHIVE_HORIZON_DAYS, today=None):
+    """
+    Runs archive_closed_records for every hot table. Returns {table_name: rows moved}.
+    The correlation and the detectors are caught up first, so rows they haven't
+    processed yet (e.g. in a database loaded before they existed) aren't held back.
+    """
+    from app.data.correlation import correlate_new_rows
+    from app.services.anomaly import update_detector
+
+    correlate_new_rows()
+    for table_name in ARCHIVE_POLICIES:
+        update_detector(table_name)
+    return {
+        table_name: archive_closed_records(table_name, horizon_days, today)
+        for table_name in ARCHIVE_POLICIES
+    }
+
+
+def get_partitions(table_name, start_date=None, end_date=None):
+    """Archive table names for a hot table whose month overlaps [start_date, end_date]."""
+    query = "SELECT partition_name, month FROM archive_partitions WHERE table_name = ?"
+    params = [table_name]
+    if start_date:
+        query += " AND month >= ?"
+        params.append(str(start_date)[:7])
+    if end_date:
+        query += " AND month <= ?"
+        params.append(str(end_date)[:7])
+    return list(read_dataframe(query + " ORDER BY month", tuple(params))["partition_name"])
+
+
+def read_table(table_name, start_date=None, end_date=None, include_archive=False):
+    """
+    Unified read over a hot table and its archive partitions, newest id first.
+    Cold partitions are only read when the date range reaches them, or when
+    include_archive is set without a range.
+    """
+    event_time = ARCHIVE_POLICIES[table_name]["event_time"]
+    conditions, params = [], []
+    if start_date:
+        conditions.append(f"{event_time} >= ?")
+        params.append(str(start_date))
+    if end_date:
+        # Dates may carry a time part, so compare against the start of the next day
+        conditions.append(f"{event_time} < ?")
+        params.append(str(date.fromisoformat(str(end_date)[:10]) + timedelta(days=1)))
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    sources = [table_name]
+    if start_date or end_date or include_archive:
+        sources += get_partitions(table_name, start_date, end_date)
+
+    query = " UNION ALL ".join(f"SELECT * FROM {source}{where}" for source in sources)
+    return read_dataframe(f"{query} ORDER BY id DESC", tuple(params) * len(sources))
+
+
+@timed("db_query_seconds")
+def get_archive_summary():
+    """Returns the archive catalogue with row counts per monthly partition."""
+    return read_dataframe("SELECT table_name, month, partition_name, row_count FROM archive_partitions ORDER BY table_name, month")
+
+
+@timed("db_query_seconds")
+def count_archived_rows(table_name):
+    """Rows in a table's archive partitions, from the catalogue rather than scanning the cold tables."""
+    return fetch_one(
+        "SELECT COALESCE(SUM(row_count), 0) FROM archive_partitions WHERE table_name = ?", (table_name,)
+    )[0]
+
+
+def count_hot_rows(table_name):
+    return fetch_one(f"SELECT COUNT(*) FROM {table_name}")[0]
@@ -0,0 +1,79 @@
+from app.data.db import execute, execute_insert, fetch_one, read_dataframe
+from app.instrumentation import timed
+
+
+@timed("db_query_seconds")
+def save_brief(brief_type, content, data_fingerprint=None):
+    """Stores a newly generated AI brief."""
+    return execute_insert(
+        "INSERT INTO ai_briefs (brief_type, content, data_fingerprint) VALUES (?, ?, ?)",
+        (brief_type, content, data_fingerprint)
+    )
+
+
+@timed("db_query_seconds")
+def get_latest_brief(brief_type):
+    """Returns (content, created_at) of the newest brief of this type, or None."""
+    return fetch_one(
+        "SELECT content, created_at FROM ai_briefs WHERE brief_type = ? ORDER BY id DESC LIMIT 1",
+        (brief_type,)
+    )
+
+
+@timed("db_query_seconds")
+def get_table_fingerprint(table_name):
+    """Cheap change marker for a table: its row count and highest id."""
+    count, max_id = fetch_one(f"SELECT COUNT(*), MAX(id) FROM {table_name}")
+    return f"{count}:{max_id}"
+
+
+@timed("db_query_seconds")
+def get_job_state(job_name):
+    """Returns (consecutive_failures, last_fingerprint, next_run) for a job, or None if it never ran."""
+    return fetch_one(
+        "SELECT consecutive_failures, last_fingerprint, next_run FROM job_runs WHERE job_name = ?",
+        (job_name,)
+    )
+
+
+@timed("db_query_seconds")
+def claim_job_run(job_name, expected_next_run, started, lease_until):
+    """
+    Marks a job as running if its stored next_run is still expected_next_run (None when
+    the job has no row or no next_run yet), so only one scheduler process runs each due
+    job. next_run is set to lease_until meanwhile, which lets another process take the
+    job over if this one dies mid-run. Returns True if this caller claimed the run.
+    """
+    if expected_next_run is not None:
+        return execute("""
+            UPDATE job_runs SET status = 'running', last_started = ?, next_run = ?
+            WHERE job_name = ? AND next_run = ?
+        """, (started, lease_until, job_name, expected_next_run)) == 1
+    claimed = execute("""
+        UPDATE job_runs SET status = 'running', last_started = ?, next_run = ?
+        WHERE job_name = ? AND next_run IS NULL
+    """, (started, lease_until, job_name))
+    if claimed:
+        return True
+    return execute("""
+        INSERT INTO job_runs (job_name, status, last_started, next_run) VALUES (?, 'running', ?, ?)
+        ON CONFLICT (job_name) DO NOTHING
+    """, (job_name, started, lease_until)) == 1
+
+
+@timed("db_query_seconds")
+def record_job_run(job_name, status, **fields):
+    """Upserts a job's status row; extra fields must be job_runs column names."""
+    columns = ["job_name", "status", *fields]
+    values = [job_name, status, *fields.values()]
+    updates = ", ".join(f"{column} = excluded.{column}" for column in columns[1:])
+    execute(f"""
+        INSERT INTO job_runs ({", ".join(columns)})
+        VALUES ({", ".join("?" for _ in columns)})
+        ON CONFLICT (job_name) DO UPDATE SET {updates}
+    """, tuple(values))
+
+
+@timed("db_query_seconds")
+def get_job_statuses():
+    return read_dataframe("SELECT * FROM job_runs ORDER BY job_name")
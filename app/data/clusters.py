@@ -0,0 +1,256 @@
+"""
+Near-duplicate clustering for cyber incidents.
+
+Each description gets a MinHash signature over its character 4-grams. The signature
+is cut into LSH bands, and every band is hashed together with the incident's type,
+severity and time window into a bucket key. Incidents that share any bucket with an
+earlier incident in the same or the previous window join that incident's cluster.
+Otherwise they start a new cluster named after their own id. An alert that keeps firing
+day after day therefore stays in one cluster.
+
+The bucket keys live in an indexed table, so clustering an insert costs one lookup
+of a few dozen keys however many incidents exist. Nothing is compared pairwise.
+Bulk loads go through the incidents a run of consecutive windows at a time and only
+read the stored buckets of those windows, so memory follows the batch, not the table.
+Cluster ids are kept in a side table rather than a new column, so the hot table and
+its archive partitions keep identical schemas.
+"""
+import zlib
+
+from app.data.archive import ARCHIVE_POLICIES
+from app.data.db import get_backend, read_dataframe
+from app.instrumentation import timed
+
+# 12 bands of 5 rows: descriptions with ~0.6+ Jaccard similarity almost always share a band
+NUM_BANDS = 12
+ROWS_PER_BAND = 5
+SHINGLE_CHARS = 4
+# Incidents only cluster with others from the same window or the one before it
+CLUSTER_WINDOW_DAYS = 1
+# Descriptions hashed per numpy pass during bulk loads
+SIGNATURE_BATCH = 50_000
+# Incidents clustered per batch of whole windows during bulk loads
+CLUSTER_BATCH_ROWS = 50_000
+# Below this many rows, existing buckets are looked up by key instead of by window range
+_KEY_LOOKUP_ROWS = 200
+_LOOKUP_BATCH = 500
+
+# Largest prime below 2**32; a * x + b stays inside uint64 for 32-bit a, b and x
+_PRIME = 4294967291
+_MIX = 0x100000001B3
+_SEED = 1510
+
+
+def _hash_params():
+    import numpy as np
+
+    rng = np.random.default_rng(_SEED)
+    size = NUM_BANDS * ROWS_PER_BAND
+    return (rng.integers(1, _PRIME, size=size, dtype=np.uint64),
+            rng.integers(0, _PRIME, size=size, dtype=np.uint64))
+
+
+def minhash_signatures(texts):
+    """Returns a (len(texts), NUM_BANDS * ROWS_PER_BAND) uint64 array of MinHash signatures."""
+    import numpy as np
+
+    a, b = _hash_params()
+    encoded = [" ".join(str(text).lower().split()).encode("utf-8").ljust(SHINGLE_CHARS) for text in texts]
+    lengths = np.fromiter((len(e) for e in encoded), dtype=np.int64, count=len(encoded))
+    blob = np.frombuffer(b"".join(encoded), dtype=np.uint8).astype(np.uint64)
+
+    # Every 4-byte window of the joined text as one integer, minus the windows spanning two texts
+    grams = blob[:-3] << 24 | blob[1:-2] << 16 | blob[2:-1] << 8 | blob[3:]
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    keep = np.ones(len(grams), dtype=bool)
+    for shift in range(1, SHINGLE_CHARS):
+        ends = starts + lengths - shift
+        keep[ends[ends < len(grams)]] = False
+    grams = grams[keep]
+    offsets = np.concatenate(([0], np.cumsum(lengths - SHINGLE_CHARS + 1)[:-1]))
+
+    signatures = np.empty((len(encoded), len(a)), dtype=np.uint64)
+    for i in range(len(a)):
+        signatures[:, i] = np.minimum.reduceat((a[i] * grams + b[i]) % np.uint64(_PRIME), offsets)
+    return signatures
+
+
+def _time_windows(event_times):
+    import numpy as np
+    import pandas as pd
+
+    days = pd.to_datetime(event_times, errors="coerce", format="mixed").values.astype("datetime64[D]")
+    windows = days.astype(np.int64) // CLUSTER_WINDOW_DAYS
+    # Undated incidents share one window per type and severity
+    return np.where(np.isnat(days), -1, windows)
+
+
+def bucket_keys(df):
+    """
+    Returns (current, previous, windows): per row, the NUM_BANDS bucket keys in its own
+    window and in the previous one, plus the window numbers. df needs incident_type,
+    severity, description and event_time columns.
+    """
+    import numpy as np
+    import pandas as pd
+
+    groups = df["incident_type"].fillna("").astype(str) + "|" + df["severity"].fillna("").astype(str)
+    group_codes, group_values = pd.factorize(groups)
+    group_hashes = np.array([zlib.crc32(value.encode("utf-8")) for value in group_values], dtype=np.uint64)
+
+    # Exact repeats are common in SIEM exports, so each distinct description is hashed once
+    text_codes, texts = pd.factorize(df["description"].fillna(""))
+    band_hashes = np.empty((len(texts), NUM_BANDS), dtype=np.uint64)
+    for start in range(0, len(texts), SIGNATURE_BATCH):
+        signatures = minhash_signatures(texts[start:start + SIGNATURE_BATCH])
+        folded = np.zeros((len(signatures), NUM_BANDS), dtype=np.uint64)
+        for row in signatures.reshape(len(signatures), NUM_BANDS, ROWS_PER_BAND).transpose(2, 0, 1):
+            folded = (folded ^ row) * np.uint64(_MIX)
+        band_hashes[start:start + SIGNATURE_BATCH] = folded
+
+    windows = _time_windows(df["event_time"])
+    row_bands = band_hashes[text_codes] ^ (group_hashes[group_codes] * np.uint64(_MIX))[:, None]
+    band_ids = np.arange(NUM_BANDS, dtype=np.uint64)
+
+    def keys_for(window_numbers):
+        keys = (row_bands ^ window_numbers.astype(np.uint64)[:, None]) * np.uint64(_MIX)
+        keys = (keys ^ band_ids) * np.uint64(_MIX)
+        # Signed 63-bit so the keys fit a BIGINT column on either backend
+        return (keys >> np.uint64(1)).astype(np.int64)
+
+    return keys_for(windows), keys_for(windows - 1), windows
+
+
+def _existing_buckets(cursor, backend, current, previous, windows):
+    if len(windows) <= _KEY_LOOKUP_ROWS:
+        keys = sorted(set(current.ravel().tolist()) | set(previous.ravel().tolist()))
+        found = {}
+        for start in range(0, len(keys), _LOOKUP_BATCH):
+            batch = keys[start:start + _LOOKUP_BATCH]
+            marks = ", ".join("?" for _ in batch)
+            cursor.execute(backend.prepare(
+                f"SELECT bucket, cluster_id FROM incident_lsh_buckets WHERE bucket IN ({marks})"
+            ), tuple(batch))
+            found.update(cursor.fetchall())
+        return found
+
+    # Larger batches read every bucket in the windows they touch, in one range scan
+    cursor.execute(backend.prepare(
+        "SELECT bucket, cluster_id FROM incident_lsh_buckets WHERE time_window BETWEEN ? AND ?"
+    ), (int(windows.min()) - 1, int(windows.max())))
+    return dict(cursor.fetchall())
+
+
+def _window_batches(windows, max_rows):
+    """Yields (start, end) slices of window-sorted rows, at most max_rows each unless one window is larger."""
+    import numpy as np
+
+    start = 0
+    while start < len(windows):
+        end = min(start + max_rows, len(windows))
+        if end < len(windows):
+            # Never split a window: the batch ends where the window at `end` begins
+            end = int(np.searchsorted(windows, windows[end], side="left"))
+            if end <= start:
+                end = int(np.searchsorted(windows, windows[start], side="right"))
+        yield start, end
+        start = end
+
+
+def _cluster_batch(cursor, backend, df):
+    current, previous, windows = bucket_keys(df)
+    known = _existing_buckets(cursor, backend, current, previous, windows)
+
+    assignments, new_buckets = {}, []
+    for incident_id, own_keys, previous_keys, window in zip(
+            df["id"].tolist(), current.tolist(), previous.tolist(), windows.tolist()):
+        matches = [known[key] for key in own_keys + previous_keys if key in known]
+        cluster_id = min(matches) if matches else incident_id
+        assignments[incident_id] = cluster_id
+        for key in own_keys:
+            if key not in known:
+                known[key] = cluster_id
+                new_buckets.append((key, cluster_id, window))
+
+    cursor.executemany(backend.prepare("""
+        INSERT INTO incident_clusters (incident_id, cluster_id) VALUES (?, ?)
+        ON CONFLICT (incident_id) DO UPDATE SET cluster_id = excluded.cluster_id
+    """), list(assignments.items()))
+    # Stored before the next batch runs, which reads them back as its previous window
+    cursor.executemany(backend.prepare("""
+        INSERT INTO incident_lsh_buckets (bucket, cluster_id, time_window) VALUES (?, ?, ?)
+        ON CONFLICT (bucket) DO NOTHING
+    """), new_buckets)
+    return assignments
+
+
+def assign_clusters(df):
+    """
+    Clusters incidents (id, incident_type, severity, description, event_time) in time
+    window order, then id order within a window, and stores the result.
+    Returns {incident_id: cluster_id}.
+    """
+    if df.empty:
+        return {}
+    windows = _time_windows(df["event_time"])
+    order = df.assign(_window=windows).sort_values(["_window", "id"], kind="stable")
+    sorted_windows = order["_window"].to_numpy()
+    df = order.drop(columns="_window")
+
+    backend = get_backend()
+    conn = backend.connect()
+    try:
+        cursor = conn.cursor()
+        assignments = {}
+        for start, end in _window_batches(sorted_windows, CLUSTER_BATCH_ROWS):
+            assignments.update(_cluster_batch(cursor, backend, df.iloc[start:end]))
+        conn.commit()
+    finally:
+        conn.close()
+    return assignments
+
+
+def assign_incident_cluster(incident_id, date, incident_type, severity, description):
+    """Clusters one newly inserted incident and returns its cluster id."""
+    import pandas as pd
+
+    df = pd.DataFrame([{
+        "id": incident_id, "incident_type": incident_type, "severity": severity,
+        "description": description, "event_time": date,
+    }])
+    return assign_clusters(df)[incident_id]
+
+
+@timed("pipeline_seconds")
+def cluster_new_incidents():
+    """Clusters every live incident that has no cluster yet (after a bulk load, or to backfill)."""
+    event_time = ARCHIVE_POLICIES["cyber_incidents"]["event_time"]
+    df = read_dataframe(f"""
+        SELECT i.id, i.incident_type, i.severity, i.description, {event_time} AS event_time
+        FROM cyber_incidents i
+        LEFT JOIN incident_clusters c ON c.incident_id = i.id
+        WHERE c.incident_id IS NULL
+        ORDER BY i.id
+    """)
+    return len(assign_clusters(df))
+
+
+@timed("pipeline_seconds")
+def collapse_duplicates(incidents_df):
+    """
+    One row per cluster: the first row of each cluster in the frame's order, with its
+    cluster_id and the number of incidents it stands for in `duplicates`.
+    """
+    if incidents_df.empty:
+        return incidents_df.assign(cluster_id=[], duplicates=[])
+
+    clusters = read_dataframe(
+        "SELECT incident_id, cluster_id FROM incident_clusters WHERE incident_id BETWEEN ? AND ?",
+        (int(incidents_df["id"].min()), int(incidents_df["id"].max()))
+    )
+    cluster_ids = incidents_df["id"].map(clusters.set_index("incident_id")["cluster_id"])
+    # Incidents archived before clustering existed stand alone
+    df = incidents_df.assign(cluster_id=cluster_ids.fillna(incidents_df["id"]).astype(int))
+    sizes = df["cluster_id"].value_counts()
+    representatives = df.drop_duplicates("cluster_id", keep="first")
+    return representatives.assign(duplicates=representatives["cluster_id"].map(sizes).values)
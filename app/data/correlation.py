@@ -0,0 +1,367 @@
+"""
+Time-window correlation between cyber incidents and IT tickets.
+
+Each incident has a window from CORRELATION_LEAD_HOURS before it to
+CORRELATION_FOLLOW_HOURS after it. A ticket created inside that window counts
+towards the incident's ticket load. If the ticket also shares a topic with the
+incident, it counts as related and is linked to it. Topics come from keyword
+lists: an incident gets the topics of its type plus any found in its description,
+and a ticket gets the first topic its category, subject or description mentions.
+
+The join is a sort-merge interval join. Tickets are sorted by time, once per topic,
+and each incident window becomes a contiguous slice found by binary search, so no
+incident/ticket pair is ever compared directly. Results are materialized
+incrementally: a watermark per table records the last id correlated, and each run
+only joins new incidents against all tickets and new tickets against the existing
+incidents whose windows they fall in.
+"""
+from datetime import timedelta
+
+from app.data.archive import read_table
+from app.data.db import fetch_one, get_backend, read_dataframe
+from app.instrumentation import timed
+
+CORRELATION_LEAD_HOURS = 2
+CORRELATION_FOLLOW_HOURS = 48
+# Related tickets stored per incident for drill-down; the counts always cover all of them
+MAX_LINKS_PER_INCIDENT = 5
+
+# Checked in order; a ticket gets the first topic it mentions
+TOPIC_KEYWORDS = {
+    "account": ("password", "account", "login", "locked", "credential", "mfa", "unauthori"),
+    "email": ("email", "e-mail", "mailbox", "outlook", "spam", "phishing"),
+    "network": ("vpn", "network", "connection", "wifi", "internet", "firewall", "traffic", "gateway"),
+    "storage": ("drive", "share", "file", "folder", "permission", "bucket", "storage", "encrypted"),
+    "endpoint": ("laptop", "desktop", "slow", "crash", "software", "install", "antivirus", "malware", "printer"),
+}
+INCIDENT_TYPE_TOPICS = {
+    "Phishing": ("email", "account"),
+    "Malware": ("endpoint",),
+    "DDoS": ("network",),
+    "Unauthorized Access": ("account",),
+    "Misconfiguration": ("storage",),
+    "Ransomware": ("storage", "endpoint"),
+}
+
+
+def _epoch_seconds(values):
+    """Parses mixed date strings to int64 epoch seconds; unparseable values become -1."""
+    import numpy as np
+    import pandas as pd
+
+    parsed = pd.to_datetime(values, errors="coerce", format="mixed")
+    seconds = parsed.values.astype("datetime64[s]").astype(np.int64)
+    return np.where(parsed.isna(), -1, seconds)
+
+
+def _keyword_mask(texts, keywords):
+    pattern = "|".join(keywords)
+    return texts.str.contains(pattern, regex=True).to_numpy()
+
+
+def incident_topics(incidents_df):
+    """Boolean matrix (incidents x topics) of each incident's type and description topics."""
+    import numpy as np
+
+    texts = incidents_df["description"].fillna("").astype(str).str.lower()
+    types = incidents_df["incident_type"].fillna("").astype(str)
+    matrix = np.zeros((len(incidents_df), len(TOPIC_KEYWORDS)), dtype=bool)
+    for column, (topic, keywords) in enumerate(TOPIC_KEYWORDS.items()):
+        typed = types.isin([t for t, topics in INCIDENT_TYPE_TOPICS.items() if topic in topics]).to_numpy()
+        matrix[:, column] = typed | _keyword_mask(texts, keywords)
+    return matrix
+
+
+def ticket_topics(tickets_df):
+    """Topic index per ticket (position in TOPIC_KEYWORDS), or -1 when it mentions none."""
+    import numpy as np
+
+    texts = (tickets_df["category"].fillna("").astype(str) + " "
+             + tickets_df["subject"].fillna("").astype(str) + " "
+             + tickets_df["description"].fillna("").astype(str)).str.lower()
+    topics = np.full(len(tickets_df), -1, dtype=np.int64)
+    for column, keywords in reversed(list(enumerate(TOPIC_KEYWORDS.values()))):
+        topics[_keyword_mask(texts, keywords)] = column
+    return topics
+
+
+def interval_join(incidents_df, tickets_df, link_caps=None):
+    """
+    Joins incidents (id, incident_type, description, event_time) to tickets
+    (id, category, subject, description, event_time) by time window and topic.
+
+    Returns (window_counts, related_counts, links): the counts are aligned with
+    incidents_df, and links is a DataFrame (incident_id, ticket_id, lag_hours, topic) of
+    the earliest related tickets, at most link_caps[i] (default MAX_LINKS_PER_INCIDENT)
+    for incident i.
+    """
+    import numpy as np
+    import pandas as pd
+
+    n = len(incidents_df)
+    window_counts = np.zeros(n, dtype=np.int64)
+    related_counts = np.zeros(n, dtype=np.int64)
+    empty_links = pd.DataFrame({"incident_id": [], "ticket_id": [], "lag_hours": [], "topic": []})
+    if n == 0 or tickets_df.empty:
+        return window_counts, related_counts, empty_links
+
+    incident_times = _epoch_seconds(incidents_df["event_time"])
+    dated = incident_times >= 0
+    starts = incident_times - CORRELATION_LEAD_HOURS * 3600
+    ends = incident_times + CORRELATION_FOLLOW_HOURS * 3600
+    incident_ids = incidents_df["id"].to_numpy()
+    caps = np.full(n, MAX_LINKS_PER_INCIDENT) if link_caps is None else np.asarray(link_caps)
+
+    ticket_times = _epoch_seconds(tickets_df["event_time"])
+    order = np.argsort(ticket_times, kind="stable")
+    ticket_times, ticket_ids = ticket_times[order], tickets_df["id"].to_numpy()[order]
+    topics_by_ticket = ticket_topics(tickets_df)[order]
+    keep = ticket_times >= 0
+    ticket_times, ticket_ids, topics_by_ticket = ticket_times[keep], ticket_ids[keep], topics_by_ticket[keep]
+
+    # All tickets in the window, whatever their topic
+    window_counts[dated] = (np.searchsorted(ticket_times, ends[dated], "right")
+                            - np.searchsorted(ticket_times, starts[dated], "left"))
+
+    # Related tickets: the same merge, once per topic over that topic's tickets
+    topic_matrix = incident_topics(incidents_df)
+    parts = []
+    for column, topic in enumerate(TOPIC_KEYWORDS):
+        selected = np.flatnonzero(dated & topic_matrix[:, column])
+        in_topic = topics_by_ticket == column
+        if len(selected) == 0 or not in_topic.any():
+            continue
+        times, ids = ticket_times[in_topic], ticket_ids[in_topic]
+        lo = np.searchsorted(times, starts[selected], "left")
+        hi = np.searchsorted(times, ends[selected], "right")
+        related_counts[selected] += hi - lo
+
+        # Earliest few tickets of each slice become links
+        take = np.minimum(hi - lo, caps[selected])
+        owners = np.repeat(selected, take)
+        offsets = np.arange(take.sum()) - np.repeat(np.cumsum(take) - take, take)
+        positions = np.repeat(lo, take) + offsets
+        parts.append(pd.DataFrame({
+            "incident_id": incident_ids[owners],
+            "ticket_id": ids[positions],
+            "lag_hours": (times[positions] - incident_times[owners]) / 3600,
+            "topic": topic,
+            "_cap": caps[owners],
+        }))
+
+    if not parts:
+        return window_counts, related_counts, empty_links
+    links = pd.concat(parts, ignore_index=True).sort_values(["incident_id", "lag_hours"], kind="stable")
+    # An incident with several topics keeps only its earliest tickets across all of them
+    links = links[links.groupby("incident_id").cumcount() < links["_cap"]]
+    return window_counts, related_counts, links.drop(columns="_cap")
+
+
+# ----------------------------------------------------------------------
+# Incremental materialization
+# ----------------------------------------------------------------------
+
+# Column holding each row's time, and the fallback when it is empty (same as ARCHIVE_POLICIES)
+EVENT_COLUMNS = {"cyber_incidents": ("date", "created_at"), "it_tickets": ("created_date", "created_at")}
+
+
+def _with_event_time(df, table_name):
+    column, fallback = EVENT_COLUMNS[table_name]
+    if df.empty:
+        return df.assign(event_time=[])
+    return df.assign(event_time=df[column].fillna(df[fallback].astype(str)))
+
+
+def _time_range(df, before_hours, after_hours):
+    """(earliest - before_hours, latest + after_hours) over df's event times, or None."""
+    import pandas as pd
+
+    times = pd.to_datetime(df["event_time"], errors="coerce", format="mixed").dropna()
+    if times.empty:
+        return None
+    return (times.min().to_pydatetime() - timedelta(hours=before_hours),
+            times.max().to_pydatetime() + timedelta(hours=after_hours))
+
+
+def _read_range(table_name, time_range):
+    """
+    Rows of a table, hot and archived, whose event time falls in the range.
+    Stored times mix "YYYY-MM-DD" and "YYYY-MM-DD HH:MM:SS", which don't compare
+    correctly as strings, so the database read covers whole days and the exact
+    bounds are applied to parsed times.
+    """
+    start, end = time_range
+    df = _with_event_time(read_table(table_name, start.date().isoformat(), end.date().isoformat()), table_name)
+    seconds = _epoch_seconds(df["event_time"])
+    first, last = _epoch_seconds([start, end])
+    return df[(seconds >= first) & (seconds <= last)].reset_index(drop=True)
+
+
+def _read_watermarks():
+    backend = get_backend()
+    conn = backend.connect()
+    try:
+        cursor = conn.cursor()
+        for table_name in EVENT_COLUMNS:
+            cursor.execute(backend.prepare("""
+                INSERT INTO correlation_state (table_name, last_id) VALUES (?, 0)
+                ON CONFLICT (table_name) DO NOTHING
+            """), (table_name,))
+        conn.commit()
+        cursor.execute("SELECT table_name, last_id FROM correlation_state")
+        return dict(cursor.fetchall())
+    finally:
+        conn.close()
+
+
+@timed("db_query_seconds")
+def get_correlated_through(table_name):
+    """Highest id of the table that has been correlated, or 0 before the first run."""
+    row = fetch_one("SELECT last_id FROM correlation_state WHERE table_name = ?", (table_name,))
+    return row[0] if row else 0
+
+
+@timed("db_query_seconds")
+def _save_correlations(watermarks, loads, links):
+    """
+    Adds the counts and links and advances the watermarks in one transaction.
+    Returns False without writing anything if another run advanced them first.
+    """
+    backend = get_backend()
+    conn = backend.connect()
+    try:
+        cursor = conn.cursor()
+        for table_name, (old, new) in watermarks.items():
+            cursor.execute(backend.prepare(
+                "UPDATE correlation_state SET last_id = ? WHERE table_name = ? AND last_id = ?"
+            ), (new, table_name, old))
+            if cursor.rowcount != 1:
+                conn.rollback()
+                return False
+
+        cursor.executemany(backend.prepare("""
+            INSERT INTO incident_ticket_load (incident_id, window_tickets, related_tickets) VALUES (?, ?, ?)
+            ON CONFLICT (incident_id) DO UPDATE SET
+                window_tickets = incident_ticket_load.window_tickets + excluded.window_tickets,
+                related_tickets = incident_ticket_load.related_tickets + excluded.related_tickets
+        """), loads)
+        # Each (incident, ticket) pair is only ever produced by one run, so plain inserts are safe
+        cursor.executemany(backend.prepare(
+            "INSERT INTO incident_ticket_links (incident_id, ticket_id, lag_hours, topic) VALUES (?, ?, ?, ?)"
+        ), links)
+        conn.commit()
+        return True
+    finally:
+        conn.close()
+
+
+def _rows(df, columns):
+    # tolist() gives plain Python values, which every driver can bind
+    return list(zip(*(df[column].tolist() for column in columns)))
+
+
+@timed("pipeline_seconds")
+def correlate_new_rows():
+    """
+    Correlates the incidents and tickets added since the last run and stores the results.
+    Returns (new incidents, new tickets) processed.
+    """
+    watermarks = _read_watermarks()
+    last_incident, last_ticket = watermarks["cyber_incidents"], watermarks["it_tickets"]
+
+    # New rows are read from the hot tables; archiving holds back rows above the watermark
+    new_incidents = _with_event_time(
+        read_dataframe("SELECT * FROM cyber_incidents WHERE id > ? ORDER BY id", (last_incident,)), "cyber_incidents")
+    new_tickets = _with_event_time(
+        read_dataframe("SELECT * FROM it_tickets WHERE id > ? ORDER BY id", (last_ticket,)), "it_tickets")
+    if new_incidents.empty and new_tickets.empty:
+        return 0, 0
+    max_incident = int(new_incidents["id"].max()) if not new_incidents.empty else last_incident
+    max_ticket = int(new_tickets["id"].max()) if not new_tickets.empty else last_ticket
+
+    loads, links = [], []
+    link_columns = ["incident_id", "ticket_id", "lag_hours", "topic"]
+
+    def add_results(incidents, tickets, caps=None, keep_empty=False):
+        window_counts, related_counts, incident_links = interval_join(incidents, tickets, caps)
+        for incident_id, window, related in zip(incidents["id"].tolist(), window_counts.tolist(), related_counts.tolist()):
+            if window or keep_empty:
+                loads.append((incident_id, window, related))
+        links.extend(_rows(incident_links, link_columns))
+
+    # New incidents against every ticket up to the new watermark
+    incident_range = _time_range(new_incidents, CORRELATION_LEAD_HOURS, CORRELATION_FOLLOW_HOURS)
+    if incident_range:
+        tickets = _read_range("it_tickets", incident_range)
+        # New incidents get a row even with no tickets, so the dashboards can tell "none" from "not yet correlated"
+        add_results(new_incidents, tickets[tickets["id"] <= max_ticket], keep_empty=True)
+
+    # New tickets against the earlier incidents whose windows they fall in
+    ticket_range = _time_range(new_tickets, CORRELATION_FOLLOW_HOURS, CORRELATION_LEAD_HOURS)
+    if ticket_range:
+        incidents = _read_range("cyber_incidents", ticket_range)
+        incidents = incidents[incidents["id"] <= last_incident].reset_index(drop=True)
+        if not incidents.empty:
+            existing = get_incident_ticket_load(incidents["id"].min(), incidents["id"].max())
+            stored = incidents["id"].map(existing.set_index("incident_id")["related_tickets"]).fillna(0)
+            caps = (MAX_LINKS_PER_INCIDENT - stored).clip(lower=0).astype(int).to_numpy()
+            add_results(incidents, new_tickets, caps)
+
+    saved = _save_correlations({
+        "cyber_incidents": (last_incident, max_incident),
+        "it_tickets": (last_ticket, max_ticket),
+    }, loads, links)
+    return (len(new_incidents), len(new_tickets)) if saved else (0, 0)
+
+
+# ----------------------------------------------------------------------
+# Reads for the dashboards
+# ----------------------------------------------------------------------
+
+@timed("db_query_seconds")
+def get_incident_ticket_load(min_incident_id=None, max_incident_id=None):
+    """Returns incident_id, window_tickets and related_tickets, optionally for an id range."""
+    query = "SELECT incident_id, window_tickets, related_tickets FROM incident_ticket_load"
+    if min_incident_id is None:
+        return read_dataframe(query)
+    return read_dataframe(query + " WHERE incident_id BETWEEN ? AND ?", (int(min_incident_id), int(max_incident_id)))
+
+
+@timed("db_query_seconds")
+def get_top_incident_ticket_load(limit=20):
+    """Live incidents with the most related tickets, with their window and related counts."""
+    return read_dataframe("""
+        SELECT i.id, i.date, i.incident_type, i.severity, i.status, i.description,
+               l.window_tickets, l.related_tickets
+        FROM incident_ticket_load l
+        JOIN cyber_incidents i ON i.id = l.incident_id
+        ORDER BY l.related_tickets DESC, l.window_tickets DESC, i.id DESC
+        LIMIT ?
+    """, (int(limit),))
+
+
+@timed("db_query_seconds")
+def get_ticket_load_by_incident_type():
+    """Average related and in-window tickets per live incident, by incident type."""
+    return read_dataframe("""
+        SELECT i.incident_type,
+               COUNT(*) AS incidents,
+               AVG(l.related_tickets) AS avg_related_tickets,
+               AVG(l.window_tickets) AS avg_window_tickets
+        FROM incident_ticket_load l
+        JOIN cyber_incidents i ON i.id = l.incident_id
+        GROUP BY i.incident_type
+        ORDER BY avg_related_tickets DESC
+    """)
+
+
+@timed("db_query_seconds")
+def get_linked_tickets(incident_id):
+    """The earliest related tickets stored for one incident, with how many hours after it they arrived."""
+    return read_dataframe("""
+        SELECT l.lag_hours, l.topic, t.ticket_id, t.priority, t.status, t.category, t.subject, t.description
+        FROM incident_ticket_links l
+        LEFT JOIN it_tickets t ON t.id = l.ticket_id
+        WHERE l.incident_id = ?
+        ORDER BY l.lag_hours
+    """, (int(incident_id),))
@@ -1,24 +1,28 @@
-import pandas as pd
-from app.data.db import connect_database
+from app.data.clusters import cluster_new_incidents
+from app.data.correlation import correlate_new_rows
+from app.data.db import get_backend, execute_insert, read_dataframe
+from app.instrumentation import timed, track
+from app.services.anomaly import update_detector
 
+# Header of DATA/datasets_metadata.csv -> datasets_metadata columns
+DATASETS_CSV_COLUMNS = {
+    'name': 'dataset_name',
+    'uploaded_by': 'source',
+    'upload_date': 'last_updated',
+    'rows': 'record_count',
+}
+
+@timed("db_query_seconds")
 def load_dataset_row(dataset_name, category, source, last_updated, record_count, file_size_mb):
-    conn = connect_database()
-    cursor = conn.cursor()
-    cursor.execute("""
+    return execute_insert("""
         INSERT INTO datasets_metadata 
         (dataset_name, category, source, last_updated, record_count, file_size_mb)
         VALUES (?, ?, ?, ?, ?, ?)
     """, (dataset_name, category, source, last_updated, record_count, file_size_mb))
-    conn.commit()
-    row_id = cursor.lastrowid
-    conn.close()
-    return row_id
 
+@timed("db_query_seconds")
 def get_all_datasets():
-    conn = connect_database()
-    df = pd.read_sql_query("SELECT * FROM datasets_metadata ORDER BY id DESC", conn)
-    conn.close()
-    return df
+    return read_dataframe("SELECT * FROM datasets_metadata ORDER BY id DESC")
 
 # -----------------------------
 # Robust CSV loader (Conditional Logic)
@@ -26,48 +30,68 @@ def get_all_datasets():
 def load_csv_to_table(csv_path, table_name, if_exists="append", column_map=None):
     """
     Loads CSV into DB, optionally mapping columns to match DB table.
-    Uses conditional logic to apply an aggressive fix ONLY for datasets_metadata 
-    due to its known header corruption issues.
+    Uses tolerant parsing ONLY for datasets_metadata, whose hand-maintained CSV
+    has its own header names and may contain stray values.
     """
-    try:
-        if table_name == "datasets_metadata":
-            # Aggressive fix ONLY for the known problematic datasets_metadata CSV
-            column_names = [
-                'dataset_name', 'category', 'source', 'last_updated', 
-                'record_count', 'file_size_mb'
-            ]
-            df = pd.read_csv(
-                csv_path, 
-                header=None,              # Skip header
-                names=column_names,       # Assign names manually
-                on_bad_lines='skip', 
-                encoding='latin1',
-                engine='python',
-                sep=',',
-                doublequote=False,
-                quoting=3 
-            )
-        else:
-            # Standard robust loading for cyber_incidents and it_tickets
-            # This uses the simpler, successful logic previously established
-            df = pd.read_csv(csv_path, on_bad_lines='skip')
-
-        conn = connect_database()
+    import pandas as pd
 
-        # Handle column mapping (used for cyber_incidents and it_tickets)
-        if column_map:
-            df = df.rename(columns=column_map)
+    try:
+        with track("csv_ingest_seconds", table=table_name, stage="parse"):
+            if table_name == "datasets_metadata":
+                # Tolerant parsing ONLY for the hand-maintained datasets_metadata CSV
+                df = pd.read_csv(
+                    csv_path, 
+                    on_bad_lines='skip', 
+                    encoding='latin1',
+                    engine='python',
+                    sep=',',
+                    doublequote=False,
+                    quoting=3 
+                )
+                df = df.rename(columns=DATASETS_CSV_COLUMNS)
+                # Typed backends (PostgreSQL) reject text in numeric columns, so stray values become NULL
+                for column in ('record_count', 'file_size_mb'):
+                    if column in df.columns:
+                        df[column] = pd.to_numeric(df[column], errors='coerce')
+                if 'record_count' in df.columns:
+                    df['record_count'] = df['record_count'].astype('Int64')
+            else:
+                # Standard robust loading for cyber_incidents and it_tickets
+                # This uses the simpler, successful logic previously established
+                df = pd.read_csv(csv_path, on_bad_lines='skip')
 
-        # Get DB columns and filter DataFrame
-        cursor = conn.cursor()
-        cursor.execute(f"PRAGMA table_info({table_name})")
-        table_columns = [col[1] for col in cursor.fetchall()]
-        df = df[[c for c in df.columns if c in table_columns]]
+        backend = get_backend()
+        conn = backend.connect()
+        try:
+            with track("csv_ingest_seconds", table=table_name, stage="map"):
+                # Handle column mapping (used for cyber_incidents and it_tickets)
+                if column_map:
+                    df = df.rename(columns=column_map)
 
-        df.to_sql(table_name, conn, if_exists=if_exists, index=False)
-        conn.close()
-        return len(df)
+                # Get DB columns and filter DataFrame
+                table_columns = backend.table_columns(conn, table_name)
+                df = df[[c for c in df.columns if c in table_columns]]
 
+            with track("csv_ingest_seconds", table=table_name, stage="write"):
+                backend.bulk_insert(conn, df, table_name, if_exists=if_exists)
+        finally:
+            # Also on failure, so a pooled connection isn't left checked out mid-transaction
+            conn.close()
     except Exception as e:
         print(f"[!] Error importing {csv_path}: {e}")
-        return 0
\ No newline at end of file
+        return 0
+
+    # The rows are stored at this point. A failed follow-up stage is reported without
+    # hiding the load, and catches up on the rows it missed the next time it runs.
+    stages = []
+    if table_name == "cyber_incidents":
+        stages.append(("cluster", cluster_new_incidents))
+    if table_name in ("cyber_incidents", "it_tickets"):
+        stages += [("correlate", correlate_new_rows), ("anomaly", lambda: update_detector(table_name))]
+    for stage, run in stages:
+        try:
+            with track("csv_ingest_seconds", table=table_name, stage=stage):
+                run()
+        except Exception as e:
+            print(f"[!] Loaded {len(df)} rows from {csv_path}, but the {stage} stage failed: {e}")
+    return len(df)
@@ -1,11 +1,285 @@
+import os
 import sqlite3
+import threading
+import tomllib
+from io import StringIO
 from pathlib import Path
 
-DB_PATH = Path("DATA") / "intelligence_platform.db"
+# Resolve paths from the project root so the app works from any working directory
+BASE_DIR = Path(__file__).resolve().parents[2]
+DATA_DIR = BASE_DIR / "DATA"
+DB_PATH = DATA_DIR / "intelligence_platform.db"
+SECRETS_PATH = BASE_DIR / ".streamlit" / "secrets.toml"
 
-def connect_database(db_path=DB_PATH):
+
+# ----------------------------------------------------------------------
+# Storage Backends
+# ----------------------------------------------------------------------
+
+class StorageBackend:
+    """
+    Interface every app/data module goes through to reach the database.
+    Queries are written with SQLite-style '?' placeholders and adapted per backend.
+    """
+    name = "base"
+    integrity_errors = ()
+
+    def connect(self):
+        raise NotImplementedError
+
+    def prepare(self, query):
+        """Adapts a '?' placeholder query to the driver's parameter style."""
+        return query
+
+    def ddl(self, statement):
+        """Adapts a CREATE TABLE statement written for SQLite to this backend."""
+        return statement
+
+    def insert(self, cursor, query, params):
+        """Runs an INSERT and returns the new row id."""
+        raise NotImplementedError
+
+    def table_columns(self, conn, table_name):
+        raise NotImplementedError
+
+    def bulk_insert(self, conn, df, table_name, if_exists="append"):
+        """Writes a whole DataFrame into an existing table."""
+        raise NotImplementedError
+
+
+class SQLiteBackend(StorageBackend):
+    name = "sqlite"
+    integrity_errors = (sqlite3.IntegrityError,)
+
+    def __init__(self, db_path=DB_PATH):
+        self.db_path = Path(db_path)
+
+    def connect(self):
+        # Wait for a competing writer instead of failing straight away with "database is locked"
+        return sqlite3.connect(str(self.db_path), timeout=30)
+
+    def insert(self, cursor, query, params):
+        cursor.execute(query, params)
+        return cursor.lastrowid
+
+    def table_columns(self, conn, table_name):
+        cursor = conn.cursor()
+        cursor.execute(f"PRAGMA table_info({table_name})")
+        return [col[1] for col in cursor.fetchall()]
+
+    def bulk_insert(self, conn, df, table_name, if_exists="append"):
+        df.to_sql(table_name, conn, if_exists=if_exists, index=False)
+
+
+class _PooledConnection:
+    """Wraps a pooled connection so the usual conn.close() hands it back to the pool."""
+
+    def __init__(self, pool, conn, slots):
+        self._pool = pool
+        self._conn = conn
+        self._slots = slots
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def close(self):
+        if self._conn is not None:
+            try:
+                self._conn.rollback()
+                self._pool.putconn(self._conn)
+            finally:
+                self._conn = None
+                self._slots.release()
+
+
+class PostgresBackend(StorageBackend):
+    name = "postgresql"
+    # How long connect() waits for a free pooled connection before giving up
+    pool_wait_seconds = 30
+
+    def __init__(self, url, pool_size=10):
+        try:
+            import psycopg2
+            from psycopg2.pool import ThreadedConnectionPool
+        except ImportError as e:
+            raise ImportError("PostgreSQL storage requires psycopg2 (pip install psycopg2-binary).") from e
+
+        self.integrity_errors = (psycopg2.IntegrityError,)
+        self.pool = ThreadedConnectionPool(1, pool_size, dsn=url)
+        # getconn() raises PoolError once every connection is out, so callers queue here instead
+        self._slots = threading.BoundedSemaphore(pool_size)
+
+    def connect(self):
+        if not self._slots.acquire(timeout=self.pool_wait_seconds):
+            raise TimeoutError(f"No free database connection after {self.pool_wait_seconds} s; "
+                               f"raise DATABASE_POOL_SIZE or lower the load.")
+        try:
+            return _PooledConnection(self.pool, self.pool.getconn(), self._slots)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def prepare(self, query):
+        return query.replace("%", "%%").replace("?", "%s")
+
+    def ddl(self, statement):
+        return (statement
+                .replace("INTEGER PRIMARY KEY AUTOINCREMENT", "BIGSERIAL PRIMARY KEY")
+                .replace(" REAL", " DOUBLE PRECISION"))
+
+    def insert(self, cursor, query, params):
+        cursor.execute(self.prepare(query) + " RETURNING id", params)
+        return cursor.fetchone()[0]
+
+    def table_columns(self, conn, table_name):
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT column_name FROM information_schema.columns "
+            "WHERE table_schema = current_schema() AND table_name = %s ORDER BY ordinal_position",
+            (table_name,)
+        )
+        return [col[0] for col in cursor.fetchall()]
+
+    def bulk_insert(self, conn, df, table_name, if_exists="append"):
+        # COPY streams the whole frame in one round trip instead of one INSERT per row
+        cursor = conn.cursor()
+        if if_exists == "replace":
+            cursor.execute(f"TRUNCATE TABLE {table_name}")
+
+        buffer = StringIO()
+        df.to_csv(buffer, index=False, header=False)
+        buffer.seek(0)
+        columns = ", ".join(df.columns)
+        cursor.copy_expert(f"COPY {table_name} ({columns}) FROM STDIN WITH (FORMAT csv)", buffer)
+        conn.commit()
+
+
+# ----------------------------------------------------------------------
+# Backend Selection
+# ----------------------------------------------------------------------
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def load_database_config():
+    """
+    Reads the storage settings. DATABASE_URL in the environment wins,
+    otherwise the [database] section of .streamlit/secrets.toml is used.
+    """
+    config = {}
+    if SECRETS_PATH.exists():
+        with open(SECRETS_PATH, "rb") as f:
+            config = dict(tomllib.load(f).get("database", {}))
+    if os.environ.get("DATABASE_URL"):
+        config["url"] = os.environ["DATABASE_URL"]
+    if os.environ.get("DATABASE_POOL_SIZE"):
+        config["pool_size"] = int(os.environ["DATABASE_POOL_SIZE"])
+    return config
+
+
+def create_backend(url=None, pool_size=10):
+    """Builds the backend for a URL such as sqlite:///DATA/app.db or postgresql://user@host/db."""
+    if not url:
+        return SQLiteBackend()
+    if url.startswith("sqlite:///"):
+        db_path = Path(url[len("sqlite:///"):])
+        return SQLiteBackend(db_path if db_path.is_absolute() else BASE_DIR / db_path)
+    if url.startswith(("postgresql://", "postgres://")):
+        return PostgresBackend(url, pool_size=pool_size)
+    raise ValueError(f"Unsupported database URL: {url}")
+
+
+def get_backend():
+    """Returns the configured backend, created once per process."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                config = load_database_config()
+                _backend = create_backend(config.get("url"), config.get("pool_size", 10))
+    return _backend
+
+
+def set_backend(backend):
+    """Replaces the process-wide backend (used by scripts that target another store)."""
+    global _backend
+    _backend = backend
+
+
+# ----------------------------------------------------------------------
+# Query Helpers
+# ----------------------------------------------------------------------
+
+def connect_database(db_path=None):
     """
-    Connects to the SQLite database.
-    Creates the file automatically if it doesn't exist.
+    Connects to the configured database, or to a specific SQLite file if db_path is given.
+    For SQLite the file is created automatically if it doesn't exist.
     """
-    return sqlite3.connect(str(db_path))
+    if db_path is not None:
+        return SQLiteBackend(db_path).connect()
+    return get_backend().connect()
+
+
+def execute_insert(query, params=()):
+    """Runs an INSERT and returns the new row id."""
+    backend = get_backend()
+    conn = backend.connect()
+    try:
+        row_id = backend.insert(conn.cursor(), query, params)
+        conn.commit()
+        return row_id
+    finally:
+        conn.close()
+
+
+def execute(query, params=()):
+    """Runs an UPDATE/DELETE style statement and returns the affected row count."""
+    backend = get_backend()
+    conn = backend.connect()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(backend.prepare(query), params)
+        conn.commit()
+        return cursor.rowcount
+    finally:
+        conn.close()
+
+
+def execute_many(query, rows):
+    """Runs one statement for every parameter tuple in rows, in a single transaction."""
+    backend = get_backend()
+    conn = backend.connect()
+    try:
+        cursor = conn.cursor()
+        cursor.executemany(backend.prepare(query), rows)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def fetch_one(query, params=()):
+    backend = get_backend()
+    conn = backend.connect()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(backend.prepare(query), params)
+        return cursor.fetchone()
+    finally:
+        conn.close()
+
+
+def read_dataframe(query, params=()):
+    """Runs a SELECT and returns the result as a pandas DataFrame."""
+    # pandas is imported on first query, so pages don't pay for it before login
+    import pandas as pd
+
+    backend = get_backend()
+    conn = backend.connect()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(backend.prepare(query), params)
+        columns = [col[0] for col in cursor.description]
+        return pd.DataFrame(cursor.fetchall(), columns=columns)
+    finally:
+        conn.close()
@@ -1,25 +1,36 @@
-import pandas as pd
-from app.data.db import connect_database
+from app.data.archive import read_table
+from app.data.clusters import assign_incident_cluster
+from app.data.db import execute_insert
+from app.instrumentation import timed, track
+from app.services.anomaly import update_detector
 
 
+@timed("pipeline_seconds")
 def insert_incident(date, incident_type, severity, status, description, reported_by=None):
-    """Creates a new incident record."""
-    conn = connect_database()
-    cursor = conn.cursor()
-    cursor.execute("""
-        INSERT INTO cyber_incidents
-        (date, incident_type, severity, status, description, reported_by)
-        VALUES (?, ?, ?, ?, ?, ?)
-    """, (date, incident_type, severity, status, description, reported_by))
-    conn.commit()
-    incident_id = cursor.lastrowid
-    conn.close()
+    """Creates a new incident record, files it under its near-duplicate cluster and feeds the rate detector."""
+    with track("db_query_seconds", operation="insert_incident"):
+        incident_id = execute_insert("""
+            INSERT INTO cyber_incidents
+            (date, incident_type, severity, status, description, reported_by)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, (date, incident_type, severity, status, description, reported_by))
+    # The incident is saved either way; an unclustered row is picked up by the next
+    # cluster_new_incidents() run and the detector catches up on its next update
+    try:
+        assign_incident_cluster(incident_id, date, incident_type, severity, description)
+    except Exception as e:
+        print(f"[!] Incident {incident_id} saved, but clustering it failed: {e}")
+    try:
+        update_detector("cyber_incidents")
+    except Exception as e:
+        print(f"[!] Incident {incident_id} saved, but the rate detector update failed: {e}")
     return incident_id
 
 
-def get_all_incidents():
-    """Returns all incidents as a pandas DataFrame."""
-    conn = connect_database()
-    df = pd.read_sql_query("SELECT * FROM cyber_incidents ORDER BY id DESC", conn)
-    conn.close()
-    return df
+@timed("db_query_seconds")
+def get_all_incidents(start_date=None, end_date=None, include_archive=False):
+    """
+    Returns incidents as a pandas DataFrame.
+    Archived incidents are included only for a date range that reaches them, or with include_archive.
+    """
+    return read_table("cyber_incidents", start_date, end_date, include_archive)
@@ -1,6 +1,9 @@
+from app.data.db import get_backend
+
+
 def create_users_table(conn):
     cursor = conn.cursor()
-    cursor.execute("""
+    cursor.execute(get_backend().ddl("""
         CREATE TABLE IF NOT EXISTS users (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             username TEXT NOT NULL UNIQUE,
@@ -8,13 +11,13 @@ def create_users_table(conn):
             role TEXT DEFAULT 'user',
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
-    """)
+    """))
     conn.commit()
 
 
 def create_cyber_incidents_table(conn):
     cursor = conn.cursor()
-    cursor.execute("""
+    cursor.execute(get_backend().ddl("""
         CREATE TABLE IF NOT EXISTS cyber_incidents (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             date TEXT,
@@ -25,13 +28,13 @@ def create_cyber_incidents_table(conn):
             reported_by TEXT,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
-    """)
+    """))
     conn.commit()
 
 
 def create_datasets_metadata_table(conn):
     cursor = conn.cursor()
-    cursor.execute("""
+    cursor.execute(get_backend().ddl("""
         CREATE TABLE IF NOT EXISTS datasets_metadata (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             dataset_name TEXT NOT NULL,
@@ -42,13 +45,13 @@ def create_datasets_metadata_table(conn):
             file_size_mb REAL,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
-    """)
+    """))
     conn.commit()
 
 
 def create_it_tickets_table(conn):
     cursor = conn.cursor()
-    cursor.execute("""
+    cursor.execute(get_backend().ddl("""
         CREATE TABLE IF NOT EXISTS it_tickets (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             ticket_id TEXT UNIQUE,  -- FIX: Removed NOT NULL constraint
@@ -62,7 +65,154 @@ def create_it_tickets_table(conn):
             assigned_to TEXT,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
-    """)
+    """))
+    conn.commit()
+
+
+def create_archive_partitions_table(conn):
+    cursor = conn.cursor()
+    cursor.execute(get_backend().ddl("""
+        CREATE TABLE IF NOT EXISTS archive_partitions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_name TEXT NOT NULL,
+            partition_name TEXT NOT NULL UNIQUE,
+            month TEXT NOT NULL,
+            row_count INTEGER DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """))
+    conn.commit()
+
+
+def create_summary_cache_table(conn):
+    cursor = conn.cursor()
+    cursor.execute(get_backend().ddl("""
+        CREATE TABLE IF NOT EXISTS summary_cache (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            cache_key TEXT NOT NULL UNIQUE,
+            operation TEXT,
+            summary TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """))
+    conn.commit()
+
+
+def create_ai_briefs_table(conn):
+    cursor = conn.cursor()
+    cursor.execute(get_backend().ddl("""
+        CREATE TABLE IF NOT EXISTS ai_briefs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            brief_type TEXT NOT NULL,
+            content TEXT NOT NULL,
+            data_fingerprint TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """))
+    conn.commit()
+
+
+def create_job_runs_table(conn):
+    cursor = conn.cursor()
+    cursor.execute(get_backend().ddl("""
+        CREATE TABLE IF NOT EXISTS job_runs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            job_name TEXT NOT NULL UNIQUE,
+            status TEXT,
+            last_started TEXT,
+            last_finished TEXT,
+            last_success TEXT,
+            next_run TEXT,
+            consecutive_failures INTEGER DEFAULT 0,
+            last_fingerprint TEXT,
+            last_error TEXT
+        )
+    """))
+    conn.commit()
+
+
+def create_incident_cluster_tables(conn):
+    cursor = conn.cursor()
+    cursor.execute(get_backend().ddl("""
+        CREATE TABLE IF NOT EXISTS incident_clusters (
+            incident_id INTEGER PRIMARY KEY,
+            cluster_id INTEGER NOT NULL
+        )
+    """))
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_incident_clusters_cluster ON incident_clusters (cluster_id)")
+    # LSH bucket -> cluster of the first incident that landed in it (see app/data/clusters.py)
+    cursor.execute(get_backend().ddl("""
+        CREATE TABLE IF NOT EXISTS incident_lsh_buckets (
+            bucket BIGINT PRIMARY KEY,
+            cluster_id INTEGER NOT NULL,
+            time_window INTEGER NOT NULL
+        )
+    """))
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_incident_lsh_buckets_window ON incident_lsh_buckets (time_window)")
+    conn.commit()
+
+
+def create_correlation_tables(conn):
+    cursor = conn.cursor()
+    # Last incident / ticket id already correlated (see app/data/correlation.py)
+    cursor.execute(get_backend().ddl("""
+        CREATE TABLE IF NOT EXISTS correlation_state (
+            table_name TEXT PRIMARY KEY,
+            last_id INTEGER NOT NULL
+        )
+    """))
+    cursor.execute(get_backend().ddl("""
+        CREATE TABLE IF NOT EXISTS incident_ticket_load (
+            incident_id INTEGER PRIMARY KEY,
+            window_tickets INTEGER NOT NULL DEFAULT 0,
+            related_tickets INTEGER NOT NULL DEFAULT 0
+        )
+    """))
+    cursor.execute(get_backend().ddl("""
+        CREATE TABLE IF NOT EXISTS incident_ticket_links (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            incident_id INTEGER NOT NULL,
+            ticket_id INTEGER NOT NULL,
+            lag_hours REAL,
+            topic TEXT
+        )
+    """))
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_incident_ticket_links_incident ON incident_ticket_links (incident_id)")
+    conn.commit()
+
+
+def create_anomaly_tables(conn):
+    cursor = conn.cursor()
+    # Serialized detector state per stream; version guards concurrent updates (see app/services/anomaly.py)
+    cursor.execute(get_backend().ddl("""
+        CREATE TABLE IF NOT EXISTS anomaly_state (
+            stream TEXT PRIMARY KEY,
+            version INTEGER NOT NULL,
+            state TEXT NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """))
+    # Baselines only change when an hour closes, so they are kept apart from the per-insert state
+    cursor.execute(get_backend().ddl("""
+        CREATE TABLE IF NOT EXISTS anomaly_baselines (
+            stream TEXT PRIMARY KEY,
+            state TEXT NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """))
+    cursor.execute(get_backend().ddl("""
+        CREATE TABLE IF NOT EXISTS anomaly_alerts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            stream TEXT NOT NULL,
+            alert_key TEXT NOT NULL,
+            bucket_start TEXT NOT NULL,
+            observed INTEGER NOT NULL,
+            expected REAL,
+            score REAL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE (stream, alert_key, bucket_start)
+        )
+    """))
     conn.commit()
 
 
@@ -70,4 +220,11 @@ def create_all_tables(conn):
     create_users_table(conn)
     create_cyber_incidents_table(conn)
     create_datasets_metadata_table(conn)
-    create_it_tickets_table(conn)
\ No newline at end of file
+    create_it_tickets_table(conn)
+    create_archive_partitions_table(conn)
+    create_summary_cache_table(conn)
+    create_ai_briefs_table(conn)
+    create_job_runs_table(conn)
+    create_incident_cluster_tables(conn)
+    create_correlation_tables(conn)
+    create_anomaly_tables(conn)
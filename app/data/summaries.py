@@ -0,0 +1,48 @@
+from datetime import datetime, timedelta, timezone
+
+from app.data.db import execute, execute_many, read_dataframe
+from app.instrumentation import timed
+
+# Keeps IN (...) lists well under SQLite's bound-parameter limit
+_LOOKUP_BATCH = 500
+# Summaries no run has used for this long are dropped
+SUMMARY_CACHE_MAX_AGE_DAYS = 30
+
+
+@timed("db_query_seconds")
+def get_cached_summaries(cache_keys):
+    """Returns {cache_key: summary} for the keys that have a cached summary."""
+    found = {}
+    for start in range(0, len(cache_keys), _LOOKUP_BATCH):
+        batch = cache_keys[start:start + _LOOKUP_BATCH]
+        marks = ", ".join("?" for _ in batch)
+        df = read_dataframe(f"SELECT cache_key, summary FROM summary_cache WHERE cache_key IN ({marks})", tuple(batch))
+        found.update(zip(df["cache_key"], df["summary"]))
+    return found
+
+
+@timed("db_query_seconds")
+def touch_summaries(cache_keys):
+    """Marks cached summaries as just used; created_at doubles as the last-use time for pruning."""
+    for start in range(0, len(cache_keys), _LOOKUP_BATCH):
+        batch = cache_keys[start:start + _LOOKUP_BATCH]
+        marks = ", ".join("?" for _ in batch)
+        execute(f"UPDATE summary_cache SET created_at = CURRENT_TIMESTAMP WHERE cache_key IN ({marks})", tuple(batch))
+
+
+@timed("db_query_seconds")
+def prune_summaries(max_age_days=SUMMARY_CACHE_MAX_AGE_DAYS):
+    """Deletes summaries unused for max_age_days. Returns the number removed."""
+    # CURRENT_TIMESTAMP is UTC on SQLite, so the cutoff is too
+    cutoff = datetime.now(timezone.utc) - timedelta(days=max_age_days)
+    return execute("DELETE FROM summary_cache WHERE created_at < ?", (cutoff.strftime("%Y-%m-%d %H:%M:%S"),))
+
+
+@timed("db_query_seconds")
+def save_summaries(operation, summaries):
+    """Stores {cache_key: summary} pairs, replacing any existing entry for the same key."""
+    execute_many("""
+        INSERT INTO summary_cache (cache_key, operation, summary)
+        VALUES (?, ?, ?)
+        ON CONFLICT (cache_key) DO UPDATE SET summary = excluded.summary, created_at = CURRENT_TIMESTAMP
+    """, [(key, operation, summary) for key, summary in summaries.items()])
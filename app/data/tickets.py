@@ -1,27 +1,30 @@
-import pandas as pd
-from app.data.db import connect_database
+from app.data.archive import read_table
+from app.data.db import execute_insert
+from app.instrumentation import timed, track
+from app.services.anomaly import update_detector
 
 
+@timed("pipeline_seconds")
 def insert_ticket(ticket_id, priority, status, category, subject, description, created_date, resolved_date, assigned_to):
-    """Inserts a new IT ticket into the database."""
-    conn = connect_database()
-    cursor = conn.cursor()
+    """Inserts a new IT ticket into the database and feeds the rate detector."""
+    with track("db_query_seconds", operation="insert_ticket"):
+        ticket_row_id = execute_insert("""
+            INSERT INTO it_tickets
+            (ticket_id, priority, status, category, subject, description, created_date, resolved_date, assigned_to)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (ticket_id, priority, status, category, subject, description, created_date, resolved_date, assigned_to))
+    # The ticket is saved either way; the detector catches up on its next update
+    try:
+        update_detector("it_tickets")
+    except Exception as e:
+        print(f"[!] Ticket {ticket_row_id} saved, but the rate detector update failed: {e}")
+    return ticket_row_id
 
-    cursor.execute("""
-        INSERT INTO it_tickets
-        (ticket_id, priority, status, category, subject, description, created_date, resolved_date, assigned_to)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-    """, (ticket_id, priority, status, category, subject, description, created_date, resolved_date, assigned_to))
 
-    conn.commit()
-    new_id = cursor.lastrowid
-    conn.close()
-    return new_id
-
-
-def get_all_tickets():
-    """Returns all IT tickets as a DataFrame."""
-    conn = connect_database()
-    df = pd.read_sql_query("SELECT * FROM it_tickets ORDER BY id DESC", conn)
-    conn.close()
-    return df
+@timed("db_query_seconds")
+def get_all_tickets(start_date=None, end_date=None, include_archive=False):
+    """
+    Returns IT tickets as a DataFrame.
+    Archived tickets are included only for a date range that reaches them, or with include_archive.
+    """
+    return read_table("it_tickets", start_date, end_date, include_archive)
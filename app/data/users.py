@@ -1,23 +1,17 @@
-from app.data.db import connect_database
+from app.data.db import execute_insert, fetch_one
+from app.instrumentation import timed
 
 
+@timed("db_query_seconds")
 def get_user_by_username(username):
     """Fetches a user row by username."""
-    conn = connect_database()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM users WHERE username = ?", (username,))
-    user = cursor.fetchone()
-    conn.close()
-    return user
+    return fetch_one("SELECT * FROM users WHERE username = ?", (username,))
 
 
+@timed("db_query_seconds")
 def insert_user(username, password_hash, role='user'):
     """Inserts a new user into the database."""
-    conn = connect_database()
-    cursor = conn.cursor()
-    cursor.execute(
+    execute_insert(
         "INSERT INTO users (username, password_hash, role) VALUES (?, ?, ?)",
         (username, password_hash, role)
     )
-    conn.commit()
-    conn.close()
@@ -0,0 +1,270 @@
+import cProfile
+import functools
+import io
+import os
+import pstats
+import threading
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from time import perf_counter
+
+# How often start_metrics_export() rewrites the metrics file
+METRICS_EXPORT_SECONDS = 15
+# Histogram bucket upper bounds, in seconds
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_lock = threading.Lock()
+_histograms = {}
+_counters = {}
+_profiles = deque(maxlen=10)
+_export_thread = None
+_export_stop = threading.Event()
+
+
+class Histogram:
+    """Cumulative bucket counts plus sum and count, the same shape Prometheus expects."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.total += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+    def quantile(self, q):
+        """Estimates a quantile as the upper bound of the bucket that contains it."""
+        if self.count == 0:
+            return 0.0
+        target = q * self.count
+        for bound, cumulative in zip(self.buckets, self.counts):
+            if cumulative >= target:
+                return bound
+        return float("inf")
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+# ----------------------------------------------------------------------
+# Recording
+# ----------------------------------------------------------------------
+
+def observe(name, value, **labels):
+    """Records one timing (seconds) into the histogram for name + labels."""
+    key = _key(name, labels)
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = Histogram()
+        histogram.observe(value)
+
+
+def increment(name, value=1, **labels):
+    """Adds to a counter, e.g. tokens sent to the model."""
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+@contextmanager
+def track(name, **labels):
+    """Times the enclosed block, including blocks that exit with an exception."""
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, perf_counter() - start, **labels)
+
+
+def timed(name, **labels):
+    """Decorator that times every call; the function name is added as the 'operation' label."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with track(name, operation=func.__name__, **labels):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def reset_metrics():
+    with _lock:
+        _histograms.clear()
+        _counters.clear()
+
+
+# ----------------------------------------------------------------------
+# Export
+# ----------------------------------------------------------------------
+
+def _escape_label_value(value):
+    # The exposition format only escapes backslash, double quote and newline
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels, extra=()):
+    pairs = [f'{k}="{_escape_label_value(v)}"' for k, v in (*labels, *extra)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def render_prometheus():
+    """Returns every metric in the Prometheus text exposition format."""
+    with _lock:
+        histograms = sorted(_histograms.items())
+        counters = sorted(_counters.items())
+
+    lines = []
+    seen = set()
+    for (name, labels), histogram in histograms:
+        if name not in seen:
+            lines.append(f"# TYPE {name} histogram")
+            seen.add(name)
+        for bound, cumulative in zip(histogram.buckets, histogram.counts):
+            lines.append(f"{name}_bucket{_format_labels(labels, [('le', bound)])} {cumulative}")
+        lines.append(f"{name}_bucket{_format_labels(labels, [('le', '+Inf')])} {histogram.count}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {histogram.total}")
+        lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+    for (name, labels), value in counters:
+        if name not in seen:
+            lines.append(f"# TYPE {name} counter")
+            seen.add(name)
+        lines.append(f"{name}{_format_labels(labels)} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus_file(path):
+    """
+    Writes the metrics to a file for the Prometheus node_exporter textfile collector.
+    The file is replaced in one step, so a scrape never reads it half-written.
+    """
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w") as f:
+        f.write(render_prometheus())
+    os.replace(temp_path, path)
+
+
+def metrics_file_path():
+    """METRICS_FILE, or DATA/metrics.prom when it isn't set. An empty METRICS_FILE turns the export off."""
+    path = os.environ.get("METRICS_FILE")
+    if path is None:
+        from app.data.db import DATA_DIR
+        path = str(DATA_DIR / "metrics.prom")
+    return path or None
+
+
+def start_metrics_export(path=None, interval_seconds=METRICS_EXPORT_SECONDS):
+    """
+    Rewrites the metrics file every interval_seconds on a daemon thread, so it can be
+    scraped without anyone opening the admin page. Only the first call in a process
+    starts the thread; later calls return it.
+    """
+    global _export_thread
+    path = path or metrics_file_path()
+    if path is None:
+        return None
+
+    def run():
+        while not _export_stop.wait(interval_seconds):
+            try:
+                write_prometheus_file(path)
+            except OSError as e:
+                print(f"[!] Could not write metrics to {path}: {e}")
+
+    with _lock:
+        if _export_thread is None:
+            _export_stop.clear()
+            _export_thread = threading.Thread(target=run, name="metrics-export", daemon=True)
+            _export_thread.start()
+        return _export_thread
+
+
+def stop_metrics_export():
+    global _export_thread
+    with _lock:
+        thread, _export_thread = _export_thread, None
+    if thread is not None:
+        _export_stop.set()
+        thread.join()
+
+
+def get_metrics_summary():
+    """One row per histogram, with call count, mean and estimated p50/p95 in milliseconds."""
+    with _lock:
+        histograms = sorted(_histograms.items())
+    return [
+        {
+            "metric": name,
+            "labels": ", ".join(f"{k}={v}" for k, v in labels),
+            "count": histogram.count,
+            "mean_ms": round(histogram.total / histogram.count * 1000, 2) if histogram.count else 0.0,
+            "p50_ms": histogram.quantile(0.5) * 1000,
+            "p95_ms": histogram.quantile(0.95) * 1000,
+        }
+        for (name, labels), histogram in histograms
+    ]
+
+
+def get_counters():
+    with _lock:
+        return {f"{name}{_format_labels(labels)}": value for (name, labels), value in sorted(_counters.items())}
+
+
+# ----------------------------------------------------------------------
+# Profiling
+# ----------------------------------------------------------------------
+
+@contextmanager
+def profile_capture(label, top=25):
+    """Runs the block under cProfile and tracemalloc and keeps the report for the metrics page."""
+    profiler = cProfile.Profile()
+    tracemalloc.start()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        stats_text = io.StringIO()
+        pstats.Stats(profiler, stream=stats_text).sort_stats("cumulative").print_stats(top)
+        allocations = "\n".join(str(stat) for stat in snapshot.statistics("lineno")[:top])
+        _profiles.appendleft({
+            "label": label,
+            "captured_at": datetime.now().isoformat(timespec="seconds"),
+            "peak_memory_mb": round(peak / 1024 / 1024, 2),
+            "cpu_profile": stats_text.getvalue(),
+            "allocations": allocations,
+        })
+
+
+def get_profiles():
+    return list(_profiles)
+
+
+def run_page(page_func, page_name):
+    """
+    Runs a Streamlit page function and records its script time, and makes sure the
+    metrics file export is running in this server process.
+    An admin opening a page with ?profile=1 captures a cProfile/tracemalloc report of that single run.
+    """
+    import streamlit as st
+
+    start_metrics_export()
+
+    with track("page_run_seconds", page=page_name):
+        if st.query_params.get("profile") == "1" and st.session_state.get("role") == "admin":
+            with profile_capture(page_name):
+                page_func()
+        else:
+            page_func()
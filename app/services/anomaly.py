@@ -0,0 +1,378 @@
+"""
+Streaming anomaly detection on incident and ticket arrival rates.
+
+Arrivals are counted per hour. For each table, a detector keeps one rate
+estimate per tracked key: the total, plus each value of a few low-cardinality
+columns (severity, priority, incident type, category). Each estimate is an EWMA
+level and variance plus an hour-of-week seasonal baseline. High-cardinality
+columns (assigned_to, reported_by) go into a pair of count-min sketches: one
+counts the current hour, the other holds an EWMA of hourly counts, scaled by the
+total's hour-of-week profile. So a detector's memory stays fixed however many
+rows or assignees it sees.
+
+An alert is raised the moment a key's count for the current hour rises well above
+its expected value. Baselines are updated when the hour closes. Each detector's
+state is saved as JSON with a version check, so app sessions and the command-line
+loader can both feed it. The open hour's counts go to anomaly_state on every
+update. The baselines, which are most of the state, go to anomaly_baselines in the
+same transaction, but only when an hour has closed or a key was added.
+
+replay_history() rebuilds a detector from every row, hot and archived. Bulk loads
+of older data trigger it, since streaming late rows would read as a spike in the
+current hour.
+"""
+import json
+import math
+import threading
+import zlib
+from collections import Counter
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+from app.data.anomalies import get_detector_state, get_detector_version, save_detector_state
+from app.data.archive import read_table
+from app.data.db import read_dataframe
+from app.instrumentation import timed
+
+HOURS_PER_WEEK = 168
+EWMA_ALPHA = 0.1
+# Seasonal slots see one value a week, so they adapt faster
+SEASONAL_ALPHA = 0.3
+SEASONAL_MIN_WEEKS = 2
+WARMUP_HOURS = HOURS_PER_WEEK
+ALERT_SCORE = 5.0
+ALERT_MIN_COUNT = 5
+# Below this total level (arrivals per hour) there is no hour-of-week profile to scale sketched keys by
+MIN_SEASONAL_LEVEL = 1e-6
+# Rate estimates per detector; values beyond this are only counted in the total
+MAX_KEYS = 100
+SKETCH_DEPTH = 4
+SKETCH_WIDTH = 1024
+# More late rows than this in one update means older history was loaded; rebuild instead
+LATE_ROWS_FOR_REPLAY = 100
+# Batches up to this size are counted in plain Python rather than with pandas
+SMALL_BATCH_ROWS = 1000
+SAVE_ATTEMPTS = 3
+
+DETECTORS = {
+    "cyber_incidents": {
+        "stream": "incidents",
+        "time_columns": ("date", "created_at"),
+        "dimensions": ("severity", "incident_type"),
+        "sketched": "reported_by",
+    },
+    "it_tickets": {
+        "stream": "tickets",
+        "time_columns": ("created_date", "created_at"),
+        "dimensions": ("priority", "category"),
+        "sketched": "assigned_to",
+    },
+}
+
+
+def _hour_label(hour):
+    return (datetime(1970, 1, 1) + timedelta(hours=hour)).strftime("%Y-%m-%d %H:00")
+
+
+@lru_cache(maxsize=4096)
+def _sketch_cells(key):
+    """The key's cell in each sketch row, as indexes into the flattened sketch."""
+    # crc32 is stable across processes, unlike hash()
+    return tuple(row * SKETCH_WIDTH + zlib.crc32(f"{row}:{key}".encode()) % SKETCH_WIDTH for row in range(SKETCH_DEPTH))
+
+
+class RateEstimate:
+    """EWMA level and variance plus an hour-of-week baseline for one key's hourly count."""
+
+    def __init__(self, data=None):
+        data = data or {}
+        self.level = data.get("level", 0.0)
+        self.var = data.get("var", 0.0)
+        self.seasonal = data.get("seasonal") or [0.0] * HOURS_PER_WEEK
+        self.weeks = data.get("weeks") or [0] * HOURS_PER_WEEK
+        self.hours = data.get("hours", 0)
+
+    def to_dict(self):
+        return {"level": round(self.level, 4), "var": round(self.var, 4),
+                "seasonal": [round(value, 4) for value in self.seasonal], "weeks": self.weeks, "hours": self.hours}
+
+    def expected(self, hour):
+        # Epoch hour 0 is a Thursday; shift so slot 0 is Monday 00:00
+        slot = (hour + 72) % HOURS_PER_WEEK
+        return self.seasonal[slot] if self.weeks[slot] >= SEASONAL_MIN_WEEKS else self.level
+
+    def score(self, count, hour):
+        """Returns (expected, score): how many deviations count lies above the baseline."""
+        expected = self.expected(hour)
+        # The Poisson term keeps a quiet key's first few arrivals from scoring as a spike
+        return expected, (count - expected) / math.sqrt(self.var + expected + 1)
+
+    def update(self, count, hour):
+        residual = count - self.expected(hour)
+        self.var = (1 - EWMA_ALPHA) * (self.var + EWMA_ALPHA * residual ** 2)
+        self.level += EWMA_ALPHA * (count - self.level)
+        slot = (hour + 72) % HOURS_PER_WEEK
+        if self.weeks[slot]:
+            self.seasonal[slot] += SEASONAL_ALPHA * (count - self.seasonal[slot])
+        else:
+            self.seasonal[slot] = float(count)
+        self.weeks[slot] += 1
+        self.hours += 1
+
+    def decay(self, hours):
+        """Closed-form update for a long run of empty hours (beyond one week of slots)."""
+        factor = (1 - EWMA_ALPHA) ** hours
+        self.level *= factor
+        self.var *= factor
+        self.hours += hours
+
+
+class DetectorState:
+    """
+    Everything one detector remembers between updates: the open hour (data) and the
+    baselines. baseline_changed says whether the baselines need saving.
+    """
+
+    def __init__(self, data=None, baseline=None):
+        import numpy as np
+
+        # States saved before baselines were split off hold everything in data
+        self.baseline_changed = baseline is None
+        data = {**(baseline or {}), **(data or {})}
+        self.last_id = data.get("last_id", 0)
+        self.hour = data.get("hour")
+        self.hours = data.get("hours", 0)
+        self.estimates = {key: RateEstimate(value) for key, value in data.get("estimates", {}).items()}
+        self.counts = data.get("counts", {})
+        self.alerted = set(data.get("alerted", []))
+        # The current hour touches few cells, so its sketch is stored sparsely as {cell: count}
+        self.sketch_hour = {int(cell): count for cell, count in data.get("sketch_hour", {}).items()}
+        self.sketch_rate = np.array(data.get("sketch_rate") or np.zeros(SKETCH_DEPTH * SKETCH_WIDTH), dtype=float)
+
+    def to_json(self):
+        """The open hour's counts, which change with every update."""
+        return json.dumps({
+            "last_id": self.last_id, "hour": self.hour,
+            "counts": self.counts, "alerted": sorted(self.alerted), "sketch_hour": self.sketch_hour,
+        })
+
+    def baseline_json(self):
+        """The rate estimates and sketch, which only change when an hour closes or a key is added."""
+        return json.dumps({
+            "hours": self.hours,
+            "estimates": {key: estimate.to_dict() for key, estimate in self.estimates.items()},
+            "sketch_rate": self.sketch_rate.round(4).tolist(),
+        })
+
+    def _advance(self, hour):
+        """Closes the current hour, fills any empty hours in between, and starts `hour`."""
+        gap = hour - self.hour - 1
+        for estimate_key, estimate in self.estimates.items():
+            estimate.update(self.counts.get(estimate_key, 0), self.hour)
+            for empty in range(self.hour + 1, self.hour + 1 + min(gap, HOURS_PER_WEEK)):
+                estimate.update(0, empty)
+            if gap > HOURS_PER_WEEK:
+                estimate.decay(gap - HOURS_PER_WEEK)
+
+        self.sketch_rate *= (1 - EWMA_ALPHA) ** (1 + gap)
+        for cell, count in self.sketch_hour.items():
+            self.sketch_rate[cell] += EWMA_ALPHA * (1 - EWMA_ALPHA) ** gap * count
+        self.sketch_hour = {}
+        self.hours += 1 + gap
+        self.counts, self.alerted, self.hour = {}, set(), hour
+        self.baseline_changed = True
+
+    def _alert(self, key, observed, expected, score):
+        if key in self.alerted or observed < ALERT_MIN_COUNT:
+            return None
+        # A NaN score compares False either way, so test for what an alert needs rather than what rules one out
+        if not (math.isfinite(expected) and math.isfinite(score) and score >= ALERT_SCORE):
+            return None
+        self.alerted.add(key)
+        return key, _hour_label(self.hour), int(observed), round(float(expected), 2), round(float(score), 2)
+
+    def _observe_rate(self, key, count):
+        estimate = self.estimates.get(key)
+        if estimate is None:
+            if len(self.estimates) >= MAX_KEYS:
+                return None
+            estimate = self.estimates[key] = RateEstimate()
+            self.baseline_changed = True
+        self.counts[key] = self.counts.get(key, 0) + count
+        if estimate.hours < WARMUP_HOURS:
+            return None
+        expected, score = estimate.score(self.counts[key], self.hour)
+        return self._alert(key, self.counts[key], expected, score)
+
+    def _seasonal_factor(self):
+        # Sketched keys have no baseline of their own per hour of week; assume they follow the total's
+        total = self.estimates.get("all")
+        # A decayed level can be subnormal, and dividing by it overflows to infinity
+        if total is None or not math.isfinite(total.level) or total.level < MIN_SEASONAL_LEVEL:
+            return 1.0
+        return total.expected(self.hour) / total.level
+
+    def _observe_sketched(self, key, count):
+        cells = _sketch_cells(key)
+        for cell in cells:
+            self.sketch_hour[cell] = self.sketch_hour.get(cell, 0) + count
+        if self.hours < WARMUP_HOURS:
+            return None
+        # Both estimates can only overcount, so take the least-collided cell of each
+        observed = min(self.sketch_hour[cell] for cell in cells)
+        expected = min(self.sketch_rate[cell] for cell in cells) * self._seasonal_factor()
+        return self._alert(key, observed, expected, (observed - expected) / math.sqrt(expected + 1))
+
+    def process(self, counts):
+        """
+        Feeds hourly counts ((hour, kind, key, count) tuples, oldest hour first) through the
+        detector and returns the alerts raised. Rows older than the current hour count
+        towards it, like a late arrival.
+        """
+        alerts = []
+        for hour, kind, key, count in counts:
+            if self.hour is None:
+                self.hour = hour
+            elif hour > self.hour:
+                self._advance(hour)
+            alert = self._observe_sketched(key, count) if kind == "sketch" else self._observe_rate(key, count)
+            if alert:
+                alerts.append(alert)
+        return alerts
+
+
+def arrival_hours(df, time_columns):
+    """Epoch hour each row arrived in, or -1 when it has no usable time."""
+    import numpy as np
+    import pandas as pd
+
+    column, fallback = time_columns
+    created = df[fallback].astype(str)
+    times = df[column].fillna(df[fallback]).astype(str)
+    # Form entries only carry a day; if the row was created that same day, use its creation time
+    day_only = (times.str.len() == 10) & (created.str[:10] == times)
+    times = times.where(~day_only, created)
+
+    parsed = pd.to_datetime(times, errors="coerce", format="mixed")
+    hours = parsed.values.astype("datetime64[h]").astype(np.int64)
+    return np.where(parsed.isna(), -1, hours)
+
+
+def hourly_counts(df, config):
+    """Arrivals per hour and tracked key, as (hour, kind, key, count) tuples sorted by hour."""
+    import pandas as pd
+
+    if df.empty:
+        return []
+    tracked = [(dimension, "rate") for dimension in config["dimensions"]] + [(config["sketched"], "sketch")]
+    frame = df.assign(hour=arrival_hours(df, config["time_columns"]))
+    frame = frame[frame["hour"] >= 0]
+
+    # A single insert would spend far longer in groupby overhead than in counting
+    if len(frame) <= SMALL_BATCH_ROWS:
+        counter = Counter()
+        for hour, *values in zip(frame["hour"].tolist(), *(frame[column].tolist() for column, _ in tracked)):
+            counter[(hour, "rate", "all")] += 1
+            for (column, kind), value in zip(tracked, values):
+                if not pd.isna(value):
+                    counter[(hour, kind, f"{column}={value}")] += 1
+        return sorted((*key, count) for key, count in counter.items())
+
+    parts = [frame.groupby("hour").size().rename("count").reset_index().assign(kind="rate", key="all")]
+    for column, kind in tracked:
+        grouped = frame.groupby(["hour", column]).size().rename("count").reset_index()
+        parts.append(grouped.assign(kind=kind, key=column + "=" + grouped[column].astype(str)))
+    counts = pd.concat(parts, ignore_index=True).sort_values("hour", kind="stable")
+    return list(zip(*(counts[column].tolist() for column in ("hour", "kind", "key", "count"))))
+
+
+# ----------------------------------------------------------------------
+# Updating the detectors
+# ----------------------------------------------------------------------
+
+# Last saved (version, DetectorState) per stream, so an update only re-reads the state
+# when another process has saved since
+_cache = {}
+_lock = threading.Lock()
+
+
+def _load_state(stream):
+    version = get_detector_version(stream)
+    cached = _cache.get(stream)
+    if version is not None and cached and cached[0] == version:
+        return cached
+    row = get_detector_state(stream)
+    if not row:
+        return None, DetectorState()
+    version, data, baseline = row
+    return version, DetectorState(json.loads(data), json.loads(baseline) if baseline else None)
+
+
+def _save(stream, version, state, alerts, replace_alerts=False):
+    baseline = state.baseline_json() if state.baseline_changed else None
+    if save_detector_state(stream, version, state.to_json(), baseline, alerts, replace_alerts):
+        state.baseline_changed = False
+        _cache[stream] = ((version or 0) + 1, state)
+        return True
+    _cache.pop(stream, None)
+    return False
+
+
+def _replay(table_name):
+    config = DETECTORS[table_name]
+    df = read_table(table_name, include_archive=True)
+    for _ in range(SAVE_ATTEMPTS):
+        version = get_detector_version(config["stream"])
+        state = DetectorState()
+        alerts = state.process(hourly_counts(df, config))
+        state.last_id = int(df["id"].max()) if not df.empty else 0
+        if _save(config["stream"], version, state, alerts, replace_alerts=True):
+            return len(df), len(alerts)
+    return 0, 0
+
+
+@timed("pipeline_seconds")
+def replay_history(table_name):
+    """
+    Rebuilds a table's detector from scratch over all its rows, hot and archived,
+    replacing its alerts. Returns (rows replayed, alerts raised).
+    """
+    with _lock:
+        return _replay(table_name)
+
+
+def get_detected_through(table_name):
+    """Highest id of the table the detector has counted, or 0 before its first update."""
+    return _load_state(DETECTORS[table_name]["stream"])[1].last_id
+
+
+@timed("pipeline_seconds")
+def update_detector(table_name):
+    """
+    Feeds the rows added since the last update into the table's detector and
+    stores any alerts. Returns (new rows, alerts raised).
+    """
+    config = DETECTORS[table_name]
+    with _lock:
+        for _ in range(SAVE_ATTEMPTS):
+            version, state = _load_state(config["stream"])
+            new_rows = read_dataframe(f"SELECT * FROM {table_name} WHERE id > ? ORDER BY id", (state.last_id,))
+            if new_rows.empty:
+                return 0, 0
+            counts = hourly_counts(new_rows, config)
+
+            if state.hour is not None:
+                late = sum(count for hour, _, key, count in counts if key == "all" and hour < state.hour)
+                if late > LATE_ROWS_FOR_REPLAY:
+                    return _replay(table_name)
+
+            try:
+                alerts = state.process(counts)
+            except Exception:
+                # The state may be half-updated; make the next update re-read the stored copy
+                _cache.pop(config["stream"], None)
+                raise
+            state.last_id = int(new_rows["id"].max())
+            if _save(config["stream"], version, state, alerts):
+                return len(new_rows), len(alerts)
+        return 0, 0
@@ -1,10 +1,22 @@
 # File: app/services/gemini_service.py
 
+from __future__ import annotations
+
 import os
+import tomllib
+from typing import TYPE_CHECKING
+
 import streamlit as st # Import streamlit to access secrets
-import pandas as pd
-from google import genai
-from google.genai.errors import APIError
+
+from app.data.db import SECRETS_PATH
+from app.instrumentation import track, increment
+
+# google.genai and pandas are heavy, so they are only imported when a client or prompt is actually needed
+if TYPE_CHECKING:
+    import pandas as pd
+    from google import genai
+
+GEMINI_MODEL = 'gemini-2.5-flash'
 
 def initialize_gemini_client():
     """Initializes and returns the Gemini client using Streamlit secrets."""
@@ -19,6 +31,8 @@ def initialize_gemini_client():
         return None
 
     try:
+        from google import genai
+
         # Pass the key directly to the client initialization
         client = genai.Client(api_key=api_key)
         return client
@@ -26,93 +40,117 @@ def initialize_gemini_client():
         st.error(f"Error initializing Gemini client: {e}")
         return None
 
-# ----------------------------------------------------------------------
-# Core Analysis Functions
-# ----------------------------------------------------------------------
 
-def get_incident_summary_analysis(incident_data: pd.DataFrame, client: genai.Client) -> str:
-    """Generates a high-level summary and analysis of cyber incidents."""
-    if client is None: return "Gemini service is unavailable."
-    if incident_data.empty: return "No incident data available for analysis."
+@st.cache_resource(show_spinner=False)
+def get_shared_gemini_client():
+    """Returns one Gemini client per process, shared by every session and page."""
+    return initialize_gemini_client()
 
-    data_string = incident_data.to_markdown(index=False)
-    
-    prompt = f"""
-    Analyze the following raw data from a corporate cyber incident register. 
-    Provide a concise, high-level summary for executive staff.
 
-    Data to analyze:
-    {data_string}
+def create_background_client():
     """
-    try:
+    Creates a Gemini client outside a Streamlit session (e.g. for the background scheduler).
+    Uses GEMINI_API_KEY or .streamlit/secrets.toml; returns None if neither has a key.
+    """
+    api_key = os.environ.get('GEMINI_API_KEY')
+    if not api_key and SECRETS_PATH.exists():
+        with open(SECRETS_PATH, "rb") as f:
+            api_key = tomllib.load(f).get("gemini", {}).get("api_key")
+    if not api_key:
+        return None
+
+    from google import genai
+    return genai.Client(api_key=api_key)
+
+def generate_content(client, prompt, operation):
+    """Sends one prompt to Gemini and records request latency and token usage."""
+    with track("gemini_request_seconds", operation=operation):
         response = client.models.generate_content(
-            model='gemini-2.5-flash',
+            model=GEMINI_MODEL,
             contents=prompt
         )
-        return response.text
-    except APIError as e:
-        return f"Gemini API Error: Could not generate content. {e}"
-    except Exception as e:
-        return f"An unexpected error occurred: {e}"
+    usage = getattr(response, "usage_metadata", None)
+    if usage is not None:
+        increment("gemini_tokens_total", usage.prompt_token_count or 0, operation=operation, direction="in")
+        increment("gemini_tokens_total", usage.candidates_token_count or 0, operation=operation, direction="out")
+    return response.text
 
+# ----------------------------------------------------------------------
+# Core Analysis Functions
+# ----------------------------------------------------------------------
+# Large tables don't fit in one prompt, so each analysis goes through the map-reduce
+# summarizer: the table is chunked by month (or category), chunk summaries are cached,
+# and small tables still get a single call with the plain prompt.
 
-def get_ticket_trend_analysis(ticket_data: pd.DataFrame, client: genai.Client) -> str:
-    """Generates an analysis of IT ticket trends and bottlenecks."""
-    if client is None: return "Gemini service is unavailable."
-    if ticket_data.empty: return "No ticket data available for analysis."
+INCIDENT_SUMMARY_INSTRUCTIONS = """Analyze the following raw data from a corporate cyber incident register. 
+    Provide a concise, high-level summary for executive staff.
+    If a 'duplicates' column is present, each row stands for that many near-identical incidents."""
 
-    data_string = ticket_data.to_markdown(index=False)
-    
-    prompt = f"""
-    Analyze the following IT support ticket data. Focus on identifying trends, 
+TICKET_TREND_INSTRUCTIONS = """Analyze the following IT support ticket data. Focus on identifying trends, 
     key bottlenecks, and areas for improvement.
 
     Provide the following sections:
     1. **Top Categories/Priorities:** Which categories and priorities dominate the workload?
     2. **Bottlenecks:** Based on 'Status' and 'Assigned To', where are tickets getting stuck?
-    3. **Actionable Insights:** Suggest one major process change to reduce ticket volume or resolution time.
+    3. **Actionable Insights:** Suggest one major process change to reduce ticket volume or resolution time."""
+
+DATASET_VALUE_INSTRUCTIONS = """Analyze the following metadata for the data catalog. Assess the current state of 
+    data assets and their potential utility for a data science team.
+
+    Provide the following sections:
+    1. **Data Portfolio Summary:** Which 'Category' and 'Source' are most represented?
+    2. **Freshness & Scale:** Comment on the general 'last_updated' dates and the average 'record_count'. Is the data fresh and substantial?
+    3. **Strategic Value:** Based on the names and categories, suggest which dataset appears to be the most critical for immediate analysis."""
 
-    Data to analyze:
-    {data_string}
+
+def run_analysis(data: pd.DataFrame, client: genai.Client, operation: str, instructions: str,
+                 partition_by=None, raise_errors=False) -> str:
+    """
+    Summarizes a whole table with map-reduce and turns API failures into a readable message.
+    Background jobs pass raise_errors=True so a failure isn't stored as if it were a brief.
     """
+    from google.genai.errors import APIError
+    from app.services.summarizer import summarize_frame
+
+    def generate(prompt, step):
+        return generate_content(client, prompt, f"{operation}_{step}")
+
+    if raise_errors:
+        return summarize_frame(data, instructions, generate, operation, partition_by=partition_by)
+
     try:
-        response = client.models.generate_content(
-            model='gemini-2.5-flash',
-            contents=prompt
-        )
-        return response.text
+        return summarize_frame(data, instructions, generate, operation, partition_by=partition_by)
     except APIError as e:
         return f"Gemini API Error: Could not generate content. {e}"
     except Exception as e:
         return f"An unexpected error occurred: {e}"
 
 
-def get_dataset_value_assessment(dataset_data: pd.DataFrame, client: genai.Client) -> str:
-    """Generates a brief assessment of the data catalog's content and value."""
+def get_incident_summary_analysis(incident_data: pd.DataFrame, client: genai.Client, raise_errors=False) -> str:
+    """Generates a high-level summary and analysis of cyber incidents."""
     if client is None: return "Gemini service is unavailable."
-    if dataset_data.empty: return "No dataset metadata available for analysis."
+    if incident_data.empty: return "No incident data available for analysis."
 
-    data_string = dataset_data.to_markdown(index=False)
-    
-    prompt = f"""
-    Analyze the following metadata for the data catalog. Assess the current state of 
-    data assets and their potential utility for a data science team.
+    from app.services.summarizer import month_partitions
+    return run_analysis(incident_data, client, "incident_summary", INCIDENT_SUMMARY_INSTRUCTIONS,
+                        partition_by=month_partitions("date", "created_at"), raise_errors=raise_errors)
 
-    Provide the following sections:
-    1. **Data Portfolio Summary:** Which 'Category' and 'Source' are most represented?
-    2. **Freshness & Scale:** Comment on the general 'last_updated' dates and the average 'record_count'. Is the data fresh and substantial?
-    3. **Strategic Value:** Based on the names and categories, suggest which dataset appears to be the most critical for immediate analysis.
 
-    Data to analyze:
-    {data_string}
-    """
-    try:
-        response = client.models.generate_content(
-            model='gemini-2.5-flash',
-            contents=prompt
-        )
-        return response.text
-    except APIError as e:
-        return f"Gemini API Error: Could not generate content. {e}"
-    except Exception as e:
-        return f"An unexpected error occurred: {e}"
\ No newline at end of file
+def get_ticket_trend_analysis(ticket_data: pd.DataFrame, client: genai.Client, raise_errors=False) -> str:
+    """Generates an analysis of IT ticket trends and bottlenecks."""
+    if client is None: return "Gemini service is unavailable."
+    if ticket_data.empty: return "No ticket data available for analysis."
+
+    from app.services.summarizer import month_partitions
+    return run_analysis(ticket_data, client, "ticket_trends", TICKET_TREND_INSTRUCTIONS,
+                        partition_by=month_partitions("created_date", "created_at"), raise_errors=raise_errors)
+
+
+def get_dataset_value_assessment(dataset_data: pd.DataFrame, client: genai.Client, raise_errors=False) -> str:
+    """Generates a brief assessment of the data catalog's content and value."""
+    if client is None: return "Gemini service is unavailable."
+    if dataset_data.empty: return "No dataset metadata available for analysis."
+
+    from app.services.summarizer import column_partitions
+    return run_analysis(dataset_data, client, "dataset_value", DATASET_VALUE_INSTRUCTIONS,
+                        partition_by=column_partitions("category"), raise_errors=raise_errors)
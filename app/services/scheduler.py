@@ -0,0 +1,219 @@
+"""
+Lightweight job scheduler that precomputes the AI executive briefs, keeps the
+incident/ticket correlation up to date and archives closed history.
+
+Each job runs on its own interval with random jitter, so replicas and jobs don't all
+fire together. Jobs are skipped when their source table hasn't changed since the last
+successful run. At most max_concurrent jobs run at once, and failures back off
+exponentially. Job status is written to the job_runs table for the admin page.
+
+Several schedulers may run against the same database: each due run is claimed with
+a compare-and-set on job_runs.next_run, so only one process runs it. A claim holds
+the job for LEASE_SECONDS; if its process dies, another one picks the job up after that.
+
+Run standalone with:  python main.py --scheduler
+"""
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from app.data.briefs import claim_job_run, get_job_state, get_table_fingerprint, record_job_run, save_brief
+from app.instrumentation import track
+
+DEFAULT_INTERVAL_SECONDS = 15 * 60
+JITTER_FRACTION = 0.1
+RETRY_BASE_SECONDS = 60
+MAX_BACKOFF_SECONDS = 60 * 60
+POLL_SECONDS = 5
+LEASE_SECONDS = 60 * 60
+
+
+class Job:
+    def __init__(self, name, func, interval_seconds=DEFAULT_INTERVAL_SECONDS, fingerprint=None):
+        """
+        func(fingerprint) does the work; fingerprint() returns a change marker for the
+        job's input, and the job is skipped while it matches the last successful run.
+        """
+        self.name = name
+        self.func = func
+        self.interval_seconds = interval_seconds
+        self.fingerprint = fingerprint
+        self.next_run = datetime.now()
+        # next_run as stored in job_runs, which a claim compares against
+        self.stored_next_run = None
+        self.failures = 0
+        self.last_fingerprint = None
+        self.running = False
+
+
+class JobScheduler:
+    def __init__(self, jobs, max_concurrent=2, jitter=JITTER_FRACTION,
+                 retry_base=RETRY_BASE_SECONDS, max_backoff=MAX_BACKOFF_SECONDS):
+        self.jobs = jobs
+        self.jitter = jitter
+        self.retry_base = retry_base
+        self.max_backoff = max_backoff
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrent, thread_name_prefix="brief-job")
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+        for job in jobs:
+            self._restore(job)
+
+    @staticmethod
+    def _restore(job):
+        """
+        Loads a job's failure count, fingerprint and due time from job_runs, so a restart
+        neither redoes unchanged work nor cuts a failing job's backoff short.
+        """
+        state = get_job_state(job.name)
+        if state:
+            job.failures, job.last_fingerprint, job.stored_next_run = state[0] or 0, state[1], state[2]
+            if state[2]:
+                job.next_run = datetime.fromisoformat(state[2])
+
+    def _reschedule(self, job, when):
+        """Sets the job's next run and returns it in the form stored in job_runs."""
+        job.next_run = when
+        job.stored_next_run = when.isoformat(timespec="seconds")
+        return job.stored_next_run
+
+    def _delay(self, seconds):
+        return timedelta(seconds=seconds * (1 + random.uniform(-self.jitter, self.jitter)))
+
+    def tick(self, now=None):
+        """Submits every due job that isn't already running."""
+        now = now or datetime.now()
+        with self._lock:
+            due = [job for job in self.jobs if not job.running and job.next_run <= now]
+            for job in due:
+                job.running = True
+        for job in due:
+            self._executor.submit(self._run_job, job)
+        return due
+
+    def _run_job(self, job):
+        started = datetime.now()
+        try:
+            lease_until = (started + timedelta(seconds=LEASE_SECONDS)).isoformat(timespec="seconds")
+            if not claim_job_run(job.name, job.stored_next_run, started.isoformat(timespec="seconds"), lease_until):
+                # Another scheduler has run or is running it; follow the stored schedule instead
+                self._restore(job)
+                return
+            job.stored_next_run = lease_until
+
+            fingerprint = job.fingerprint() if job.fingerprint else None
+            if fingerprint is not None and fingerprint == job.last_fingerprint:
+                next_run = self._reschedule(job, started + self._delay(job.interval_seconds))
+                record_job_run(job.name, "skipped (no changes)", next_run=next_run)
+                return
+
+            with track("scheduler_job_seconds", job=job.name):
+                job.func(fingerprint)
+
+            finished = datetime.now()
+            job.failures = 0
+            job.last_fingerprint = fingerprint
+            next_run = self._reschedule(job, finished + self._delay(job.interval_seconds))
+            record_job_run(
+                job.name, "succeeded",
+                last_finished=finished.isoformat(timespec="seconds"),
+                last_success=finished.isoformat(timespec="seconds"),
+                next_run=next_run,
+                consecutive_failures=0, last_fingerprint=fingerprint, last_error=None,
+            )
+        except Exception as e:
+            finished = datetime.now()
+            job.failures += 1
+            backoff = min(self.retry_base * 2 ** (job.failures - 1), self.max_backoff)
+            next_run = self._reschedule(job, finished + self._delay(backoff))
+            record_job_run(
+                job.name, "failed",
+                last_finished=finished.isoformat(timespec="seconds"),
+                next_run=next_run,
+                consecutive_failures=job.failures, last_error=str(e)[:500],
+            )
+        finally:
+            with self._lock:
+                job.running = False
+
+    def run_forever(self, poll_seconds=POLL_SECONDS):
+        while not self._stop.is_set():
+            self.tick()
+            self._stop.wait(poll_seconds)
+
+    def stop(self, wait=True):
+        self._stop.set()
+        self._executor.shutdown(wait=wait)
+
+
+# ----------------------------------------------------------------------
+# Jobs
+# ----------------------------------------------------------------------
+
+CORRELATION_INTERVAL_SECONDS = 60
+ARCHIVE_INTERVAL_SECONDS = 24 * 60 * 60
+
+
+def build_correlation_job(interval_seconds=CORRELATION_INTERVAL_SECONDS):
+    """Correlates incidents and tickets added through the forms since the last run."""
+    from app.data.correlation import correlate_new_rows
+
+    def fingerprint():
+        return f"{get_table_fingerprint('cyber_incidents')}|{get_table_fingerprint('it_tickets')}"
+
+    return Job("ticket_correlation", lambda _: correlate_new_rows(), interval_seconds, fingerprint=fingerprint)
+
+
+def build_archive_job(interval_seconds=ARCHIVE_INTERVAL_SECONDS):
+    """Moves closed rows past the horizon into the archive, so the hot tables stay bounded."""
+    from app.data.archive import archive_all
+
+    return Job("archive", lambda _: archive_all(), interval_seconds)
+
+
+def build_brief_jobs(client, interval_seconds=DEFAULT_INTERVAL_SECONDS):
+    """One job per dashboard brief, each regenerating when its table changes."""
+    from app.data.clusters import collapse_duplicates
+    from app.data.datasets import get_all_datasets
+    from app.data.incidents import get_all_incidents
+    from app.data.tickets import get_all_tickets
+    from app.services.gemini_service import (
+        get_dataset_value_assessment, get_incident_summary_analysis, get_ticket_trend_analysis
+    )
+
+    def brief_job(brief_type, table_name, load, analyse):
+        def run(fingerprint):
+            content = analyse(load(), client, raise_errors=True)
+            save_brief(brief_type, content, fingerprint)
+        return Job(brief_type, run, interval_seconds, fingerprint=lambda: get_table_fingerprint(table_name))
+
+    return [
+        brief_job("incident_summary", "cyber_incidents",
+                  lambda: collapse_duplicates(get_all_incidents(include_archive=True)), get_incident_summary_analysis),
+        brief_job("ticket_trends", "it_tickets",
+                  lambda: get_all_tickets(include_archive=True), get_ticket_trend_analysis),
+        brief_job("dataset_value", "datasets_metadata", get_all_datasets, get_dataset_value_assessment),
+    ]
+
+
+def run_scheduler(client=None, interval_seconds=DEFAULT_INTERVAL_SECONDS, max_concurrent=2):
+    """Blocks and keeps the correlation, the archive and the briefs up to date until interrupted."""
+    from app.services.gemini_service import create_background_client
+
+    jobs = [build_correlation_job(), build_archive_job()]
+    client = client or create_background_client()
+    if client is None:
+        print("[!] Gemini API key not found (GEMINI_API_KEY or .streamlit/secrets.toml); AI briefs are disabled.")
+    else:
+        jobs += build_brief_jobs(client, interval_seconds)
+
+    scheduler = JobScheduler(jobs, max_concurrent=max_concurrent)
+    print(f"[*] Scheduler started ({len(scheduler.jobs)} jobs, briefs every ~{interval_seconds}s).")
+    try:
+        scheduler.run_forever()
+    except KeyboardInterrupt:
+        print("[*] Scheduler stopped.")
+    finally:
+        scheduler.stop(wait=False)
@@ -0,0 +1,222 @@
+"""
+Map-reduce summarization for tables too large for a single prompt.
+
+The table is split into partitions (a time window or a category), and consecutive
+partitions are packed into token-bounded chunks with stable boundaries. Chunks are summarized concurrently (map), and the
+partial summaries are merged in bounded groups until one brief remains (reduce).
+Every model call is cached by a hash of its input rows or partial summaries, so a
+re-run only pays for partitions whose rows changed. Cached summaries no run has
+used for a month are pruned.
+
+The model is any callable taking (prompt, step) and returning text, which keeps
+this module independent of Gemini and lets the tests run it against a fake model.
+"""
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+
+from app.data.summaries import get_cached_summaries, prune_summaries, save_summaries, touch_summaries
+from app.instrumentation import track
+
+# Rough prompt budget per call. gemini-2.5-flash accepts ~1M input tokens; a fifth of that
+# leaves room for the instructions and for the estimate below being off
+MAX_CHUNK_TOKENS = 200_000
+# ~4 characters per token is close enough for sizing chunks
+CHARS_PER_TOKEN = 4
+# Partial summaries merged per reduce call
+REDUCE_FAN_IN = 8
+# Model calls in flight at once
+MAX_PARALLEL_CALLS = 4
+
+
+def month_partitions(column, fallback=None):
+    """Partitioner keyed by the YYYY-MM of a date column (with an optional fallback column)."""
+    def partition(df):
+        values = df[column]
+        if fallback is not None:
+            values = values.fillna(df[fallback])
+        return values.fillna("unknown").astype(str).str[:7]
+    return partition
+
+
+def column_partitions(column):
+    """Partitioner keyed by a categorical column such as 'category'."""
+    def partition(df):
+        return df[column].fillna("unknown").astype(str)
+    return partition
+
+
+def _row_tokens(df):
+    # Markdown row width: every cell's text plus its " | " separator
+    row_chars = sum(df[column].astype(str).str.len().fillna(0) + 3 for column in df.columns)
+    return row_chars.astype(int) // CHARS_PER_TOKEN + 1
+
+
+def _packed_chunk(packed):
+    import pandas as pd
+
+    keys = [key for key, _ in packed]
+    label = keys[0] if len(keys) == 1 else f"{keys[0]} to {keys[-1]}"
+    return label, pd.concat([group for _, group in packed])
+
+
+def _group_stride(partition_tokens, max_tokens):
+    """
+    Average partitions per group: the power of two just above as many as fit the budget,
+    so most groups fill one or two chunks and the budget, not the boundary, ends them.
+    """
+    per_chunk = max(1, int(max_tokens // max(partition_tokens.mean(), 1)))
+    return 1 << per_chunk.bit_length()
+
+
+def _ends_group(key, stride):
+    # The boundary depends only on the partition's key, and a power-of-two stride's boundaries
+    # include every boundary of the next larger stride, so they rarely move
+    return int(hashlib.sha256(key.encode("utf-8")).hexdigest()[:8], 16) % stride == 0
+
+
+def split_into_chunks(df, partition_by=None, max_tokens=MAX_CHUNK_TOKENS):
+    """
+    Returns [(label, chunk_df)] with each chunk under max_tokens. Consecutive partitions
+    are packed into one chunk up to group boundaries picked from the partition keys, so
+    changing one partition's rows only changes the chunk(s) of its own group rather than
+    every chunk after it. A group over the budget is cut where it fills up, and a
+    partition over the budget is split on its own. A table that fits in one chunk is
+    returned whole. Row sizes are estimated from their text length, so nothing is
+    rendered to markdown here.
+    """
+    row_tokens = _row_tokens(df)
+    if partition_by is None or row_tokens.sum() <= max_tokens:
+        partitions = [("all", df)]
+        partition_tokens = {"all": row_tokens.sum()}
+        stride = 1
+    else:
+        keys = partition_by(df)
+        partitions = df.groupby(keys, sort=True)
+        partition_tokens = row_tokens.groupby(keys).sum()
+        stride = _group_stride(partition_tokens, max_tokens)
+
+    chunks, packed, packed_tokens = [], [], 0
+    for key, group in partitions:
+        tokens = partition_tokens[key]
+        if packed and packed_tokens + tokens > max_tokens:
+            chunks.append(_packed_chunk(packed))
+            packed, packed_tokens = [], 0
+
+        if tokens > max_tokens:
+            chunk_ids = (row_tokens.loc[group.index].cumsum() - 1) // max_tokens
+            for index, (_, chunk_df) in enumerate(group.groupby(chunk_ids.values, sort=True)):
+                chunks.append((f"{key} #{index + 1}", chunk_df))
+            continue
+
+        packed.append((str(key), group))
+        packed_tokens += tokens
+        if _ends_group(str(key), stride):
+            chunks.append(_packed_chunk(packed))
+            packed, packed_tokens = [], 0
+    if packed:
+        chunks.append(_packed_chunk(packed))
+    return chunks
+
+
+def _cache_key(*parts):
+    return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+
+
+def _run_cached(jobs, generate, operation, step, max_workers):
+    """
+    Runs [(cache_key, build_prompt)] jobs through the model and returns their texts in order.
+    Prompts are only built for keys that aren't cached yet, since rendering them is the slow part.
+    """
+    keys = [key for key, _ in jobs]
+    cached = get_cached_summaries(keys)
+    if cached:
+        touch_summaries(list(cached))
+    missing = [(key, build_prompt) for key, build_prompt in jobs if key not in cached]
+
+    if missing:
+        def run(build_prompt):
+            return generate(build_prompt(), step)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            results = list(pool.map(run, [build_prompt for _, build_prompt in missing]))
+        fresh = {key: text for (key, _), text in zip(missing, results)}
+        save_summaries(operation, fresh)
+        # New entries are what grows the cache, so that's when old ones are dropped
+        prune_summaries()
+        cached.update(fresh)
+    return [cached[key] for key in keys]
+
+
+def final_prompt(instructions, data_string):
+    return f"""
+    {instructions}
+
+    Data to analyze:
+    {data_string}
+    """
+
+
+def map_prompt(instructions, label, data_string):
+    return f"""
+    You are summarizing one slice ({label}) of a larger table.
+    The final report will follow these instructions:
+    {instructions}
+
+    Extract only the facts that report needs from this part: counts per category,
+    notable records, and anything unusual. Be concise and keep exact numbers.
+
+    Data part:
+    {data_string}
+    """
+
+
+def reduce_prompt(instructions, summaries, final):
+    joined = "\n\n".join(f"--- Partial summary {i + 1} ---\n{text}" for i, text in enumerate(summaries))
+    task = instructions if final else (
+        "Merge these partial summaries into one concise partial summary. "
+        "Add up counts that refer to the same thing and keep exact numbers."
+    )
+    return f"""
+    The partial summaries below each cover a different slice of the same table.
+    {task}
+
+    {joined}
+    """
+
+
+def summarize_frame(df, instructions, generate, operation, partition_by=None,
+                    max_tokens=MAX_CHUNK_TOKENS, fan_in=REDUCE_FAN_IN, max_workers=MAX_PARALLEL_CALLS):
+    """
+    Summarizes a DataFrame of any size with the given report instructions.
+    A table that fits in one chunk gets a single call with the plain prompt.
+    """
+    with track("summarizer_seconds", operation=operation, stage="chunk"):
+        chunks = split_into_chunks(df, partition_by, max_tokens)
+        # Chunks are identified by their rows, not their rendered prompt, so unchanged partitions hit the cache
+        chunk_keys = [_cache_key(operation, instructions, label, chunk_df.to_csv(index=False))
+                      for label, chunk_df in chunks]
+
+    if len(chunks) == 1:
+        chunk_df = chunks[0][1]
+        job = (_cache_key("final", chunk_keys[0]), lambda: final_prompt(instructions, chunk_df.to_markdown(index=False)))
+        return _run_cached([job], generate, operation, "final", 1)[0]
+
+    with track("summarizer_seconds", operation=operation, stage="map"):
+        jobs = [
+            (key, lambda label=label, chunk_df=chunk_df: map_prompt(instructions, label, chunk_df.to_markdown(index=False)))
+            for key, (label, chunk_df) in zip(chunk_keys, chunks)
+        ]
+        summaries = _run_cached(jobs, generate, operation, "map", max_workers)
+
+    with track("summarizer_seconds", operation=operation, stage="reduce"):
+        while True:
+            final = len(summaries) <= fan_in
+            groups = [summaries] if final else [summaries[i:i + fan_in] for i in range(0, len(summaries), fan_in)]
+            jobs = [
+                (_cache_key(operation, instructions, str(final), *group),
+                 lambda group=group: reduce_prompt(instructions, group, final))
+                for group in groups
+            ]
+            summaries = _run_cached(jobs, generate, operation, "final" if final else "reduce", max_workers)
+            if final:
+                return summaries[0]
@@ -1,5 +1,5 @@
-import bcrypt
 from app.data.users import get_user_by_username, insert_user
+from app.instrumentation import track
 from pathlib import Path
 
 
@@ -7,8 +7,11 @@ def register_user(username, password, role='user'):
     """
     Registers a user by hashing their password, then storing it securely.
     """
+    import bcrypt
+
     # Hash password
-    hashed = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    with track("bcrypt_seconds", operation="hashpw"):
+        hashed = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
 
     # Insert user
     insert_user(username, hashed, role)
@@ -25,7 +28,18 @@ def login_user(username, password):
 
     stored_hash = user[2]
 
-    if bcrypt.checkpw(password.encode('utf-8'), stored_hash.encode('utf-8')):
+    import bcrypt
+
+    with track("bcrypt_seconds", operation="checkpw"):
+        password_ok = bcrypt.checkpw(password.encode('utf-8'), stored_hash.encode('utf-8'))
+
+    if password_ok:
         return True, "Login successful."
 
     return False, "Incorrect password."
+
+
+def get_user_role(username):
+    """Returns the stored role for a user, or None if the user doesn't exist."""
+    user = get_user_by_username(username)
+    return user[3] if user else None
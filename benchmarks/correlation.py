@@ -0,0 +1,95 @@
+# benchmarks/correlation.py
+"""
+Benchmarks the incident <-> ticket time-window correlation.
+
+1. Times interval_join in memory on synthetic incidents and tickets.
+2. Bulk loads both tables into a scratch SQLite database and reports the
+   correlate stage of each load (join plus writing the counts and links).
+3. Inserts a few incidents and tickets one at a time and times the incremental
+   correlate_new_rows() run that picks them up.
+
+    python benchmarks/correlation.py --rows 100000 1000000
+"""
+import argparse
+import sys
+import tempfile
+from pathlib import Path
+from time import perf_counter
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+for path in (REPO_ROOT, Path(__file__).resolve().parent):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+import numpy as np
+
+import synthetic_data
+from app.data.correlation import correlate_new_rows, interval_join
+from app.data.datasets import load_csv_to_table
+from app.data.db import fetch_one
+from app.data.incidents import insert_incident
+from app.data.tickets import insert_ticket
+from app.instrumentation import get_metrics_summary, reset_metrics
+from run_benchmarks import CYBER_MAP, TICKETS_MAP, use_fresh_database
+
+
+def stage_seconds(table, stage):
+    for row in get_metrics_summary():
+        if row["metric"] == "csv_ingest_seconds" and row["labels"] == f"stage={stage}, table={table}":
+            return row["mean_ms"] / 1000
+    return 0.0
+
+
+def time_join(rows, seed):
+    rng = np.random.default_rng(seed)
+    incidents = synthetic_data.incidents_chunk(rng, 1, rows).rename(
+        columns={"incident_id": "id", "timestamp": "event_time", "category": "incident_type"})
+    tickets = synthetic_data.tickets_chunk(rng, 1, rows).rename(
+        columns={"ticket_id": "id", "created_at": "event_time"}).assign(category=None, subject=None)
+
+    start = perf_counter()
+    window_counts, related_counts, links = interval_join(incidents, tickets)
+    elapsed = perf_counter() - start
+    print(f"{rows:>10,} x {rows:,}  interval_join {elapsed:>7.2f} s  "
+          f"{window_counts.mean():,.0f} tickets/window, {related_counts.mean():,.0f} related, {len(links):,} links")
+
+
+def time_pipeline(rows, inserts, seed):
+    with tempfile.TemporaryDirectory(prefix="platform-correlation-") as work_dir:
+        csv_paths = synthetic_data.generate(work_dir, rows, rows, 10, seed)
+        use_fresh_database(work_dir, "correlation")
+        reset_metrics()
+        load_csv_to_table(str(csv_paths["cyber_incidents"]), "cyber_incidents", column_map=CYBER_MAP)
+        load_csv_to_table(str(csv_paths["it_tickets"]), "it_tickets", column_map=TICKETS_MAP)
+        links = fetch_one("SELECT COUNT(*) FROM incident_ticket_links")[0]
+        print(f"{rows:>10,} rows each  correlate after incident load {stage_seconds('cyber_incidents', 'correlate'):>6.2f} s, "
+              f"after ticket load {stage_seconds('it_tickets', 'correlate'):>6.2f} s  ({links:,} links stored)")
+
+        rng = np.random.default_rng(seed)
+        for i in range(inserts):
+            day = str(np.datetime64("2025-06-01T09:00") + np.timedelta64(int(rng.integers(0, 72)), "h"))
+            if i % 10 == 0:
+                insert_incident(day, "Phishing", "High", "Open", "Phishing email targeting payroll portal", "benchmark")
+            insert_ticket(None, "High", "Open", "Access", "Account locked", "Account locked out after phishing email",
+                          day, None, "IT_Support_001")
+        start = perf_counter()
+        new_incidents, new_tickets = correlate_new_rows()
+        print(f"{'':>10}  incremental run for {new_incidents} incidents + {new_tickets} tickets "
+              f"{(perf_counter() - start) * 1000:>8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--inserts", type=int, default=100, help="Tickets inserted before the incremental run")
+    parser.add_argument("--seed", type=int, default=1510)
+    args = parser.parse_args()
+
+    for rows in args.rows:
+        time_join(rows, args.seed)
+    for rows in args.rows:
+        time_pipeline(rows, args.inserts, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+# benchmarks/dedup.py
+"""
+Benchmarks near-duplicate clustering of cyber incidents at increasing scale.
+
+For every size it generates synthetic incidents (many near-identical SIEM-style
+descriptions), bulk loads them into a scratch SQLite database with clustering on,
+then times single insert_incident calls against the loaded table. With LSH bucket
+lookups the per-insert time should stay flat as the table grows:
+
+    python benchmarks/dedup.py --rows 10000 100000 1000000 --inserts 200
+"""
+import argparse
+import statistics
+import sys
+import tempfile
+from pathlib import Path
+from time import perf_counter
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+for path in (REPO_ROOT, Path(__file__).resolve().parent):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+import numpy as np
+
+import synthetic_data
+from app.data.clusters import minhash_signatures
+from app.data.datasets import load_csv_to_table
+from app.data.db import fetch_one
+from app.data.incidents import insert_incident
+from app.instrumentation import get_metrics_summary, reset_metrics
+from run_benchmarks import CYBER_MAP, use_fresh_database
+
+
+def cluster_stage_seconds():
+    for row in get_metrics_summary():
+        if row["metric"] == "csv_ingest_seconds" and "stage=cluster" in row["labels"]:
+            return row["mean_ms"] / 1000
+    return 0.0
+
+
+def time_inserts(count, seed):
+    """Inserts near-copies of generated incidents one at a time; returns per-insert seconds."""
+    rng = np.random.default_rng(seed)
+    samples = []
+    for i in range(count):
+        category = synthetic_data.INCIDENT_CATEGORIES[0][i % len(synthetic_data.INCIDENT_CATEGORIES[0])]
+        description = synthetic_data.INCIDENT_TEMPLATES[category].format(
+            host=f"WS-{rng.integers(0, 5000):04d}", target=rng.choice(synthetic_data.TARGETS)
+        )
+        day = np.datetime64("2022-01-01") + rng.integers(0, 4 * 365)
+        start = perf_counter()
+        insert_incident(str(day), category, "High", "Open", description, "benchmark")
+        samples.append(perf_counter() - start)
+    return samples
+
+
+def run(rows, inserts, seed):
+    with tempfile.TemporaryDirectory(prefix="platform-dedup-") as work_dir:
+        csv_paths = synthetic_data.generate(work_dir, rows, 10, 10, seed)
+        use_fresh_database(work_dir, "dedup")
+        reset_metrics()
+
+        start = perf_counter()
+        load_csv_to_table(str(csv_paths["cyber_incidents"]), "cyber_incidents", column_map=CYBER_MAP)
+        load_seconds = perf_counter() - start
+
+        clustered, clusters = fetch_one("SELECT COUNT(*), COUNT(DISTINCT cluster_id) FROM incident_clusters")
+        buckets = fetch_one("SELECT COUNT(*) FROM incident_lsh_buckets")[0]
+        samples = time_inserts(inserts, seed)
+
+    print(f"{rows:>10,} rows  load {load_seconds:>7.2f} s (clustering {cluster_stage_seconds():>6.2f} s)  "
+          f"{clustered:,} -> {clusters:,} clusters, {buckets:,} buckets  "
+          f"insert p50 {statistics.median(samples) * 1000:>6.2f} ms  "
+          f"p95 {np.percentile(samples, 95) * 1000:>6.2f} ms")
+
+
+def time_signatures(count=100_000):
+    texts = [f"Malware detected on endpoint WS-{i:06d} by EDR, process quarantined" for i in range(count)]
+    start = perf_counter()
+    minhash_signatures(texts)
+    elapsed = perf_counter() - start
+    print(f"[*] MinHash: {count:,} distinct descriptions in {elapsed:.2f} s ({count / elapsed:,.0f}/s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--inserts", type=int, default=200, help="Single inserts timed after each load")
+    parser.add_argument("--seed", type=int, default=1510)
+    args = parser.parse_args()
+
+    time_signatures()
+    for rows in args.rows:
+        run(rows, args.inserts, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+# benchmarks/page_interactions.py
+"""
+Measures how long each Streamlit interaction takes on the dashboard pages.
+
+Uses streamlit.testing AppTest to drive the pages headlessly through a first load,
+a plain rerun, and a chat message, and reports for each interaction:
+
+  script      the full script run. AppTest always reruns the whole page, even
+              for a widget inside a fragment, so this is the cost without
+              fragment isolation.
+  chat_panel  time spent in run_contextual_chat. In the browser a chat message
+              only reruns the chat fragment, so this is what it actually costs.
+  data_reads  calls that reached the app/data readers behind the cached loaders,
+              i.e. cache misses. A chat message or rerun should read nothing.
+
+Run it on two commits and compare the output to see the effect of a change:
+
+    python benchmarks/page_interactions.py --runs 10 --json before.json
+"""
+import argparse
+import importlib
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+from pathlib import Path
+from time import perf_counter
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+PAGES = ["pages/Cybersecurity.py", "pages/IT_operations.py", "pages/Data_Science.py"]
+
+# Pages use paths relative to the repository root (DATA/, .streamlit/)
+os.chdir(REPO_ROOT)
+for path in (REPO_ROOT, REPO_ROOT / "pages"):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+from streamlit.testing.v1 import AppTest
+
+
+class _EchoModels:
+    def generate_content(self, model, contents):
+        return type("Response", (), {"text": f"{len(contents)} characters received."})()
+
+
+class EchoClient:
+    """Offline stand-in for the Gemini client so chat timings exclude network latency."""
+    models = _EchoModels()
+
+
+def use_scratch_database(work_dir):
+    """Runs the pages on a copy of DATA/ with the current schema, leaving the shipped database untouched."""
+    from app.data.db import DB_PATH, connect_database
+    from app.data.schema import create_all_tables
+
+    scratch = Path(work_dir) / DB_PATH.name
+    shutil.copy(DB_PATH, scratch)
+    os.environ["DATABASE_URL"] = f"sqlite:///{scratch}"
+    conn = connect_database()
+    create_all_tables(conn)
+    conn.close()
+
+
+def use_offline_client():
+    import ai_assistant
+    ai_assistant.get_client = lambda: EchoClient()
+
+
+# Readers the pages' cached loaders call; pages import them at script run, so patching the module is enough
+DATA_READERS = {
+    "app.data.incidents": ["get_all_incidents"],
+    "app.data.tickets": ["get_all_tickets"],
+    "app.data.datasets": ["get_all_datasets"],
+    "app.data.clusters": ["collapse_duplicates"],
+    "app.data.correlation": ["get_top_incident_ticket_load", "get_ticket_load_by_incident_type", "get_linked_tickets"],
+    "app.data.anomalies": ["get_recent_alerts"],
+    "app.data.archive": ["count_archived_rows"],
+    "app.data.briefs": ["get_latest_brief"],
+}
+# Filled in by the wrappers below during each interaction
+probe = {"data_reads": 0, "chat_panel": 0.0}
+
+
+def instrument_pages():
+    """Counts data reads and times the chat panel's own work."""
+    for module_name, names in DATA_READERS.items():
+        module = importlib.import_module(module_name)
+        for name in names:
+            def counted(*args, _reader=getattr(module, name), **kwargs):
+                probe["data_reads"] += 1
+                return _reader(*args, **kwargs)
+            setattr(module, name, counted)
+
+    import ai_assistant
+    run_contextual_chat = ai_assistant.run_contextual_chat
+
+    def timed_chat(*args, **kwargs):
+        start = perf_counter()
+        try:
+            return run_contextual_chat(*args, **kwargs)
+        finally:
+            probe["chat_panel"] += perf_counter() - start
+    ai_assistant.run_contextual_chat = timed_chat
+
+
+def measured_run(run, timings, interaction):
+    probe.update(data_reads=0, chat_panel=0.0)
+    start = perf_counter()
+    run()
+    timings[interaction]["script"].append(perf_counter() - start)
+    timings[interaction]["chat_panel"].append(probe["chat_panel"])
+    timings[interaction]["data_reads"].append(probe["data_reads"])
+
+
+def measure_page(page_path, runs):
+    """Returns {interaction: {measure: [values, ...]}} for a single page."""
+    at = AppTest.from_file(str(REPO_ROOT / page_path), default_timeout=120)
+    at.session_state.authenticated = True
+    at.session_state.username = "benchmark"
+
+    timings = {interaction: {"script": [], "chat_panel": [], "data_reads": []}
+               for interaction in ("first_load", "rerun", "chat_message")}
+    measured_run(at.run, timings, "first_load")
+    if at.exception:
+        raise RuntimeError(f"{page_path} failed: {at.exception[0].message}")
+
+    for i in range(runs):
+        measured_run(at.run, timings, "rerun")
+        if at.chat_input:
+            chat = at.chat_input[0].set_value(f"How many rows mention item {i}?")
+            measured_run(chat.run, timings, "chat_message")
+    return timings
+
+
+def summarize(timings):
+    return {
+        interaction: {
+            "script_ms": round(statistics.median(measures["script"]) * 1000, 2),
+            "chat_panel_ms": round(statistics.median(measures["chat_panel"]) * 1000, 2),
+            "data_reads": max(measures["data_reads"]),
+            "samples": len(measures["script"]),
+        }
+        for interaction, measures in timings.items() if measures["script"]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="Reruns and chat messages per page")
+    parser.add_argument("--online", action="store_true", help="Use the real Gemini client for chat")
+    parser.add_argument("--json", help="Write the results to this file")
+    args = parser.parse_args()
+
+    if not args.online:
+        use_offline_client()
+    instrument_pages()
+
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="platform-pages-") as work_dir:
+        use_scratch_database(work_dir)
+        for page_path in PAGES:
+            results[page_path] = summarize(measure_page(page_path, args.runs))
+            for name, stats in results[page_path].items():
+                print(f"{page_path:<28} {name:<14} script {stats['script_ms']:>9.2f} ms  "
+                      f"chat panel {stats['chat_panel_ms']:>8.2f} ms  data reads {stats['data_reads']:>3}  "
+                      f"(n={stats['samples']})")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+        print(f"[*] Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
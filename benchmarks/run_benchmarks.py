@@ -0,0 +1,217 @@
+# benchmarks/run_benchmarks.py
+"""
+Reproducible benchmark suite for the platform's hot paths.
+
+Generates synthetic data at the requested scale, loads it into a scratch SQLite
+database (the real DATA/ database is never touched) and times ingestion, the
+main.py bootstrap (over the synthetic CSVs), every get_all_* reader, the dashboard aggregations, login and
+chat prompt construction. Each run is saved to benchmarks/results/ under the
+current git commit so runs can be compared:
+
+    python benchmarks/run_benchmarks.py --rows 1000000
+    python benchmarks/run_benchmarks.py --compare benchmarks/results/A.json benchmarks/results/B.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from time import perf_counter
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+for path in (REPO_ROOT, REPO_ROOT / "pages", Path(__file__).resolve().parent):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+import pandas as pd
+
+import main as bootstrap
+import synthetic_data
+from app.data.db import SQLiteBackend, connect_database, set_backend
+from app.data.schema import create_all_tables
+from app.data.datasets import load_csv_to_table, get_all_datasets
+from app.data.incidents import get_all_incidents
+from app.data.tickets import get_all_tickets
+from app.services.user_service import login_user, register_user
+from ai_assistant import build_chat_prompt
+
+CYBER_MAP = {'timestamp': 'date', 'category': 'incident_type'}
+TICKETS_MAP = {'created_at': 'created_date'}
+
+
+def use_fresh_database(work_dir, name):
+    db_path = Path(work_dir) / f"{name}.db"
+    db_path.unlink(missing_ok=True)
+    set_backend(SQLiteBackend(db_path))
+    conn = connect_database()
+    create_all_tables(conn)
+    conn.close()
+
+
+def load_all(csv_paths):
+    load_csv_to_table(str(csv_paths["cyber_incidents"]), "cyber_incidents", column_map=CYBER_MAP)
+    load_csv_to_table(str(csv_paths["it_tickets"]), "it_tickets", column_map=TICKETS_MAP)
+    load_csv_to_table(str(csv_paths["datasets_metadata"]), "datasets_metadata")
+
+
+# ----------------------------------------------------------------------
+# Dashboard aggregations (same work as the cached loaders in pages/)
+# ----------------------------------------------------------------------
+
+def incident_aggregations(incidents_df):
+    return incidents_df['severity'].value_counts(), incidents_df['status'].value_counts()
+
+
+def ticket_aggregations(df_tickets):
+    return len(df_tickets), df_tickets['status'].value_counts(), df_tickets['priority'].value_counts()
+
+
+def dataset_aggregations(df_datasets):
+    record_count = pd.to_numeric(df_datasets['record_count'], errors='coerce').fillna(0).astype(int)
+    return record_count.sum(), df_datasets['category'].value_counts()
+
+
+# ----------------------------------------------------------------------
+# Suite
+# ----------------------------------------------------------------------
+
+def build_suite(work_dir, csv_paths):
+    """
+    Returns [(name, setup, run)]. setup runs untimed before every repeat;
+    whatever setup returns is passed to run.
+    """
+    def fresh_db():
+        use_fresh_database(work_dir, "ingest")
+
+    def loaded_db():
+        set_backend(SQLiteBackend(Path(work_dir) / "loaded.db"))
+
+    def incidents_frame():
+        loaded_db()
+        return get_all_incidents()
+
+    def tickets_frame():
+        loaded_db()
+        return get_all_tickets()
+
+    def datasets_frame():
+        loaded_db()
+        return get_all_datasets()
+
+    def quiet_bootstrap(_):
+        with contextlib.redirect_stdout(io.StringIO()):
+            bootstrap.main(data_dir=csv_paths["cyber_incidents"].parent)
+
+    return [
+        ("ingest.cyber_incidents", fresh_db,
+         lambda _: load_csv_to_table(str(csv_paths["cyber_incidents"]), "cyber_incidents", column_map=CYBER_MAP)),
+        ("ingest.it_tickets", fresh_db,
+         lambda _: load_csv_to_table(str(csv_paths["it_tickets"]), "it_tickets", column_map=TICKETS_MAP)),
+        ("ingest.datasets_metadata", fresh_db,
+         lambda _: load_csv_to_table(str(csv_paths["datasets_metadata"]), "datasets_metadata")),
+        ("bootstrap.main", lambda: use_fresh_database(work_dir, "bootstrap"), quiet_bootstrap),
+        ("read.get_all_incidents", loaded_db, lambda _: get_all_incidents()),
+        ("read.get_all_tickets", loaded_db, lambda _: get_all_tickets()),
+        ("read.get_all_datasets", loaded_db, lambda _: get_all_datasets()),
+        ("dashboard.incident_aggregations", incidents_frame, incident_aggregations),
+        ("dashboard.ticket_aggregations", tickets_frame, ticket_aggregations),
+        ("dashboard.dataset_aggregations", datasets_frame, dataset_aggregations),
+        ("auth.login_user", loaded_db, lambda _: login_user("bench_user", "Bench-Pass-1")),
+        ("ai.build_chat_prompt", incidents_frame,
+         lambda df: build_chat_prompt(df, "Which severity is growing fastest?")),
+    ]
+
+
+def run_suite(rows, repeat, only=None, seed=1510):
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="platform-bench-") as work_dir:
+        print(f"[*] Generating {rows:,} incidents and tickets...")
+        csv_paths = synthetic_data.generate(work_dir, rows, rows, max(rows // 100, 10), seed)
+
+        use_fresh_database(work_dir, "loaded")
+        load_all(csv_paths)
+        register_user("bench_user", "Bench-Pass-1", "analyst")
+
+        for name, setup, run in build_suite(work_dir, csv_paths):
+            if only and not name.startswith(only):
+                continue
+            samples = []
+            for _ in range(repeat):
+                arg = setup()
+                start = perf_counter()
+                run(arg)
+                samples.append(perf_counter() - start)
+            results[name] = {"min_s": min(samples), "median_s": statistics.median(samples), "samples": samples}
+            print(f"{name:<36} median {results[name]['median_s'] * 1000:>10.2f} ms   min {results[name]['min_s'] * 1000:>10.2f} ms")
+    return results
+
+
+def current_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def save_results(results, rows, repeat):
+    RESULTS_DIR.mkdir(exist_ok=True)
+    commit = current_commit()
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    path = RESULTS_DIR / f"{stamp}-{commit}-{rows}.json"
+    path.write_text(json.dumps({
+        "commit": commit,
+        "created_at": stamp,
+        "rows": rows,
+        "repeat": repeat,
+        "python": platform.python_version(),
+        "machine": platform.platform(),
+        "benchmarks": results,
+    }, indent=2))
+    return path
+
+
+def compare(baseline_path, candidate_path, threshold=1.10):
+    """Prints the median ratio per benchmark; returns False if anything regressed past the threshold."""
+    baseline = json.loads(Path(baseline_path).read_text())
+    candidate = json.loads(Path(candidate_path).read_text())
+    print(f"baseline {baseline['commit']} ({baseline['rows']:,} rows) -> candidate {candidate['commit']} ({candidate['rows']:,} rows)")
+
+    ok = True
+    for name, new in candidate["benchmarks"].items():
+        old = baseline["benchmarks"].get(name)
+        if old is None:
+            print(f"{name:<36} new")
+            continue
+        ratio = new["median_s"] / old["median_s"] if old["median_s"] else float("inf")
+        flag = "REGRESSION" if ratio > threshold else ""
+        ok = ok and not flag
+        print(f"{name:<36} {old['median_s'] * 1000:>10.2f} ms -> {new['median_s'] * 1000:>10.2f} ms  x{ratio:.2f} {flag}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000, help="Synthetic incidents and tickets to generate")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--only", help="Run only benchmarks whose name starts with this prefix")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CANDIDATE"))
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(0 if compare(*args.compare) else 1)
+
+    results = run_suite(args.rows, args.repeat, args.only)
+    print(f"[*] Results written to {save_results(results, args.rows, args.repeat)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# benchmarks/startup.py
+"""
+Cold-start benchmark with a regression budget.
+
+1. Runs `python -X importtime` over the modules Home.py and the dashboard pages
+   import before the login check, and reports the slowest imports.
+2. Renders Home.py for an unauthenticated visitor through AppTest in a fresh
+   interpreter and times the first render.
+
+Both runs fail the budget if pandas, google.genai or bcrypt get loaded before
+login, or if a time budget is exceeded:
+
+    python benchmarks/startup.py --import-budget-ms 400 --render-budget-ms 2000
+"""
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# Heavy modules that must only load once a logged-in user needs them
+HEAVY_MODULES = ("pandas", "google.genai", "bcrypt")
+
+# Everything a page imports at module level, i.e. before require_login() runs
+PRE_LOGIN_IMPORTS = (
+    "app.auth", "app.instrumentation", "app.data.incidents", "app.data.tickets",
+    "app.data.datasets", "app.services.gemini_service", "ai_assistant",
+)
+
+_PATH_SETUP = f"import sys; sys.path[:0] = [{str(REPO_ROOT)!r}, {str(REPO_ROOT / 'pages')!r}]"
+
+_FIRST_RENDER = _PATH_SETUP + f"""
+import json, os, time
+os.chdir({str(REPO_ROOT)!r})
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file("Home.py", default_timeout=60)
+at.run()
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    "first_render_ms": elapsed * 1000,
+    "exception": [e.message for e in at.exception],
+    "heavy_loaded": [m for m in {HEAVY_MODULES!r} if m in sys.modules],
+}}))
+"""
+
+
+def measure_imports():
+    """Returns (total cumulative ms, [(module, cumulative ms)], heavy modules loaded)."""
+    code = _PATH_SETUP + "\nimport streamlit\n" + "\n".join(f"import {m}" for m in PRE_LOGIN_IMPORTS) + f"""
+print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))
+"""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                          capture_output=True, text=True, cwd=REPO_ROOT, check=True)
+
+    timings = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        timings.append((name, int(cumulative) / 1000))
+
+    # Only our own modules count against the budget; streamlit's own import is reported separately
+    ours = [(name, ms) for name, ms in timings if name.strip() in PRE_LOGIN_IMPORTS]
+    heavy = [m for m in proc.stdout.strip().split(",") if m]
+    return sum(ms for _, ms in ours), sorted(timings, key=lambda t: -t[1]), heavy
+
+
+def measure_first_render():
+    proc = subprocess.run([sys.executable, "-c", _FIRST_RENDER],
+                          capture_output=True, text=True, cwd=REPO_ROOT, check=True)
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--import-budget-ms", type=float, default=400.0)
+    parser.add_argument("--render-budget-ms", type=float, default=2000.0)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    failures = []
+
+    import_ms, timings, heavy = measure_imports()
+    print(f"[*] Pre-login app imports: {import_ms:.1f} ms (budget {args.import_budget_ms:.0f} ms)")
+    for name, ms in timings[:args.top]:
+        print(f"    {ms:>9.1f} ms  {name.strip()}")
+    if import_ms > args.import_budget_ms:
+        failures.append(f"app imports took {import_ms:.1f} ms")
+    if heavy:
+        failures.append(f"heavy modules imported before login: {', '.join(heavy)}")
+
+    render = measure_first_render()
+    print(f"[*] Home.py first render (unauthenticated): {render['first_render_ms']:.1f} ms "
+          f"(budget {args.render_budget_ms:.0f} ms)")
+    if render["exception"]:
+        failures.append(f"Home.py raised: {render['exception']}")
+    if render["first_render_ms"] > args.render_budget_ms:
+        failures.append(f"first render took {render['first_render_ms']:.1f} ms")
+    if render["heavy_loaded"]:
+        failures.append(f"heavy modules loaded by the login page: {', '.join(render['heavy_loaded'])}")
+
+    if failures:
+        print("[!] Startup budget exceeded:\n    " + "\n    ".join(failures))
+        sys.exit(1)
+    print("[*] Startup within budget.")
+
+
+if __name__ == "__main__":
+    main()
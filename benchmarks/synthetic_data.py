@@ -0,0 +1,144 @@
+# benchmarks/synthetic_data.py
+"""
+Generates production-scale synthetic CSVs in the same layout as the files in DATA/.
+
+Rows are written in chunks, so 100M-row files don't need 100M rows in memory.
+Severity, priority, category and assignee are skewed the way real registers are:
+most incidents are Low/Medium phishing, and a few analysts own most tickets.
+
+    python benchmarks/synthetic_data.py --incidents 1000000 --tickets 1000000 --out /tmp/synthetic
+"""
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+CHUNK_ROWS = 500_000
+START = np.datetime64("2022-01-01T00:00:00")
+SPAN_HOURS = 4 * 365 * 24
+
+SEVERITIES = (["Low", "Medium", "High", "Critical"], [0.45, 0.32, 0.17, 0.06])
+INCIDENT_CATEGORIES = (
+    ["Phishing", "Malware", "DDoS", "Unauthorized Access", "Misconfiguration", "Ransomware"],
+    [0.50, 0.20, 0.10, 0.08, 0.08, 0.04],
+)
+INCIDENT_STATUSES = (["Resolved", "Closed", "In Progress", "Open"], [0.40, 0.25, 0.20, 0.15])
+PRIORITIES = (["Low", "Medium", "High", "Critical"], [0.35, 0.40, 0.20, 0.05])
+TICKET_STATUSES = (["Resolved", "Closed", "In Progress", "Open", "Waiting for User"], [0.50, 0.15, 0.15, 0.12, 0.08])
+TICKET_ISSUES = [
+    "Password reset request", "VPN connection drops", "Laptop running slow", "Email not syncing",
+    "Printer offline", "Software install request", "Account locked out", "Shared drive access denied",
+]
+INCIDENT_TEMPLATES = {
+    "Phishing": "Phishing email reported by user impersonating {target} with credential harvesting link",
+    "Malware": "Malware detected on endpoint {host} by EDR, process quarantined",
+    "DDoS": "Traffic spike against {target} from distributed sources, rate limiting applied",
+    "Unauthorized Access": "Unauthorized login attempt on {host} from unrecognised location",
+    "Misconfiguration": "Storage bucket on {host} found publicly readable",
+    "Ransomware": "Ransomware note found on {host}, file shares encrypted",
+}
+TARGETS = ["payroll portal", "CEO mailbox", "VPN gateway", "customer portal", "HR system", "finance share"]
+DATASET_CATEGORIES = (["Security", "Finance", "Operations", "HR", "Marketing"], [0.35, 0.25, 0.2, 0.1, 0.1])
+
+# Relative arrival weight per hour of day
+_HOUR_WEIGHTS = np.array([1, 1, 1, 1, 1, 2, 3, 5, 8, 9, 9, 8, 7, 8, 9, 9, 8, 6, 4, 3, 2, 2, 1, 1], dtype=float)
+_HOUR_WEIGHTS /= _HOUR_WEIGHTS.sum()
+
+
+def _choice(rng, spec, size):
+    values, weights = spec
+    return rng.choice(values, size=size, p=weights)
+
+
+def _timestamps(rng, size):
+    # Skew arrivals towards working hours on top of a uniform spread over the span
+    hours = rng.integers(0, SPAN_HOURS, size=size)
+    hours = hours - hours % 24 + rng.choice(24, size=size, p=_HOUR_WEIGHTS)
+    return START + hours.astype("timedelta64[h]")
+
+
+def incidents_chunk(rng, start_id, size):
+    categories = _choice(rng, INCIDENT_CATEGORIES, size)
+    hosts = rng.zipf(1.5, size=size) % 5000
+    targets = rng.choice(TARGETS, size=size)
+    descriptions = [
+        INCIDENT_TEMPLATES[category].format(host=f"WS-{host:04d}", target=target)
+        for category, host, target in zip(categories, hosts, targets)
+    ]
+    return pd.DataFrame({
+        "incident_id": np.arange(start_id, start_id + size),
+        "timestamp": _timestamps(rng, size),
+        "severity": _choice(rng, SEVERITIES, size),
+        "category": categories,
+        "status": _choice(rng, INCIDENT_STATUSES, size),
+        "description": descriptions,
+    })
+
+
+def tickets_chunk(rng, start_id, size):
+    # Zipf-distributed assignees: a handful of support staff own most of the queue
+    assignees = rng.zipf(1.3, size=size) % 500
+    issues = rng.choice(TICKET_ISSUES, size=size)
+    return pd.DataFrame({
+        "ticket_id": np.arange(start_id, start_id + size),
+        "priority": _choice(rng, PRIORITIES, size),
+        "description": [f"{issue} (ref {n})" for issue, n in zip(issues, rng.integers(0, 10_000, size=size))],
+        "status": _choice(rng, TICKET_STATUSES, size),
+        "assigned_to": [f"IT_Support_{a:03d}" for a in assignees],
+        "created_at": _timestamps(rng, size),
+        "resolution_time_hours": rng.gamma(2.0, 12.0, size=size).round().astype(int),
+    })
+
+
+def datasets_chunk(rng, start_id, size):
+    return pd.DataFrame({
+        "dataset_id": np.arange(start_id, start_id + size),
+        "name": [f"{category}_Dataset_{i}" for i, category in
+                 zip(range(start_id, start_id + size), _choice(rng, DATASET_CATEGORIES, size))],
+        "rows": rng.lognormal(10, 2, size=size).astype(int),
+        "columns": rng.integers(3, 80, size=size),
+        "uploaded_by": rng.choice(["data_scientist", "cyber_admin", "it_admin"], size=size, p=[0.6, 0.25, 0.15]),
+        "upload_date": (START + rng.integers(0, SPAN_HOURS // 24, size=size).astype("timedelta64[D]")).astype("datetime64[D]"),
+    })
+
+
+def write_csv(path, rows, make_chunk, seed, start_id=1):
+    """Writes `rows` generated rows to `path`, one chunk at a time."""
+    rng = np.random.default_rng(seed)
+    written = 0
+    while written < rows:
+        size = min(CHUNK_ROWS, rows - written)
+        chunk = make_chunk(rng, start_id + written, size)
+        chunk.to_csv(path, mode="w" if written == 0 else "a", header=written == 0, index=False)
+        written += size
+    return Path(path)
+
+
+def generate(out_dir, incidents, tickets, datasets, seed=1510):
+    """Generates all three CSVs into out_dir and returns their paths by table name."""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    return {
+        "cyber_incidents": write_csv(out_dir / "cyber_incidents.csv", incidents, incidents_chunk, seed, start_id=1000),
+        "it_tickets": write_csv(out_dir / "it_tickets.csv", tickets, tickets_chunk, seed + 1, start_id=2000),
+        "datasets_metadata": write_csv(out_dir / "datasets_metadata.csv", datasets, datasets_chunk, seed + 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--incidents", type=int, default=1_000_000)
+    parser.add_argument("--tickets", type=int, default=1_000_000)
+    parser.add_argument("--datasets", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=1510)
+    parser.add_argument("--out", default="synthetic_data")
+    args = parser.parse_args()
+
+    paths = generate(args.out, args.incidents, args.tickets, args.datasets, args.seed)
+    for table_name, path in paths.items():
+        print(f"[*] {table_name}: {path}")
+
+
+if __name__ == "__main__":
+    main()
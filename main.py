@@ -1,14 +1,25 @@
 # main.py
-import pandas as pd
+import argparse
 from pathlib import Path
 
-from app.data.db import connect_database
+from app.data.db import DATA_DIR, connect_database, get_backend
 from app.data.schema import create_all_tables
 from app.data.datasets import load_csv_to_table
+from app.data.archive import archive_all, count_hot_rows
 from app.services.user_service import register_user
+from app.services.anomaly import DETECTORS, replay_history
+from app.services.scheduler import DEFAULT_INTERVAL_SECONDS, run_scheduler
+
+def archive_history():
+    """Moves closed records past the horizon into the archive partitions."""
+    for table_name, moved in archive_all().items():
+        print(f"[*] Archived {moved} closed records from {table_name} ({count_hot_rows(table_name)} remain live).")
+
+
+def main(data_dir=DATA_DIR):
+    """Builds the schema and loads the CSVs in data_dir (DATA/ by default)."""
+    data_dir = Path(data_dir)
 
-def main():
-    
     # 1. Database & Schema Initialization
     conn = connect_database()
     create_all_tables(conn)
@@ -21,13 +32,15 @@ def main():
     # A. Load Cyber Incidents
     cyber_map = {
         'Date': 'date',
+        'timestamp': 'date',
         'Incident Type': 'incident_type',
+        'category': 'incident_type',
         'Severity': 'severity',
         'Status': 'status',
         'Description': 'description',
         'Reported By': 'reported_by'
     }
-    csv_path_incidents = Path("DATA") / "cyber_incidents.csv"
+    csv_path_incidents = data_dir / "cyber_incidents.csv"
     count = load_csv_to_table(
         csv_path=str(csv_path_incidents),
         table_name="cyber_incidents",
@@ -44,10 +57,11 @@ def main():
         'Subject': 'subject',
         'Description': 'description',
         'Created Date': 'created_date',
+        'created_at': 'created_date',
         'Resolved Date': 'resolved_date',
         'Assigned To': 'assigned_to'
     }
-    csv_path_tickets = Path("DATA") / "it_tickets.csv"
+    csv_path_tickets = data_dir / "it_tickets.csv"
     count = load_csv_to_table(
         csv_path=str(csv_path_tickets),
         table_name="it_tickets",
@@ -64,7 +78,7 @@ def main():
         'record_count': 'record_count',
         'file_size_mb': 'file_size_mb'
     }
-    csv_path_datasets = Path("DATA") / "datasets_metadata.csv"
+    csv_path_datasets = data_dir / "datasets_metadata.csv"
     count = load_csv_to_table(
         csv_path=str(csv_path_datasets),
         table_name="datasets_metadata",
@@ -72,17 +86,51 @@ def main():
     )
     print(f"[*] Loaded {count} records into datasets_metadata table.")
 
+
+    # 3. Move closed history out of the hot tables
+    archive_history()
+
     
-    # 3. Initial User Creation
+    # 4. Initial User Creation
     try:
         register_user("admin", "admin", "admin")
         print("[*] Default 'admin' user provisioned.")
+    except get_backend().integrity_errors:
+        print("[*] Default 'admin' user already exists.")
     except Exception as e:
-        if "UNIQUE constraint failed" in str(e):
-            print("[*] Default 'admin' user already exists.")
-        else:
-            print(f"[!] Error provisioning admin user: {e}")
+        print(f"[!] Error provisioning admin user: {e}")
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Initialize the platform database, or keep the AI briefs fresh.")
+    parser.add_argument("--scheduler", action="store_true",
+                        help="Skip the CSV load and run the background scheduler (correlation and AI briefs) until interrupted")
+    parser.add_argument("--interval", type=int, default=DEFAULT_INTERVAL_SECONDS,
+                        help="Seconds between brief refreshes (default: %(default)s)")
+    parser.add_argument("--replay-anomalies", action="store_true",
+                        help="Skip the CSV load and rebuild the arrival-rate anomaly baselines from all history")
+    parser.add_argument("--archive", action="store_true",
+                        help="Skip the CSV load and only archive closed records past the horizon")
+    parser.add_argument("--data-dir", type=Path, default=DATA_DIR,
+                        help="Directory holding the CSVs to load (default: %(default)s)")
+    args = parser.parse_args()
+
+    if args.replay_anomalies:
+        conn = connect_database()
+        create_all_tables(conn)
+        conn.close()
+        for table_name in DETECTORS:
+            rows, alerts = replay_history(table_name)
+            print(f"[*] Replayed {rows} {table_name} rows into the anomaly detector ({alerts} alerts).")
+    elif args.archive:
+        conn = connect_database()
+        create_all_tables(conn)
+        conn.close()
+        archive_history()
+    elif args.scheduler:
+        conn = connect_database()
+        create_all_tables(conn)
+        conn.close()
+        run_scheduler(interval_seconds=args.interval)
+    else:
+        main(args.data_dir)
@@ -0,0 +1,92 @@
+# Admin_Metrics.py
+import streamlit as st
+
+from app.auth import require_admin, logout_button
+from app.data.briefs import get_job_statuses
+from app.services.anomaly import DETECTORS, replay_history
+from app.instrumentation import (
+    METRICS_EXPORT_SECONDS, get_counters, get_metrics_summary, get_profiles, metrics_file_path, render_prometheus,
+    reset_metrics, start_metrics_export, write_prometheus_file
+)
+
+
+def page():
+    require_admin()
+    start_metrics_export()
+
+    import pandas as pd
+
+    st.set_page_config(page_title="Admin — Performance Metrics", layout="wide")
+
+    col_header, col_logout = st.columns([10, 2])
+    with col_header:
+        st.header("📈 Performance Metrics")
+    with col_logout:
+        st.markdown("<br>", unsafe_allow_html=True)
+        logout_button()
+
+    st.caption("Timings are collected in this server process since it started. "
+               "Open any dashboard with ?profile=1 to capture a cProfile/tracemalloc report of one run.")
+    st.markdown("---")
+
+    summary = get_metrics_summary()
+    if not summary:
+        st.info("No metrics recorded yet. Open a dashboard to generate some.")
+    else:
+        st.subheader("Latency Histograms")
+        st.dataframe(pd.DataFrame(summary), use_container_width=True)
+
+    counters = get_counters()
+    if counters:
+        st.subheader("Counters")
+        st.dataframe(pd.Series(counters, name="value"), use_container_width=True)
+
+    prometheus_text = render_prometheus()
+    metrics_file = metrics_file_path()
+    if metrics_file:
+        st.caption(f"Written to {metrics_file} every {METRICS_EXPORT_SECONDS}s for node_exporter's "
+                   "textfile collector (set METRICS_FILE to move it, or to an empty value to turn it off).")
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.download_button("⬇️ Download Prometheus text", prometheus_text, file_name="metrics.prom")
+    with col2:
+        if metrics_file and st.button("💾 Export to metrics file now"):
+            write_prometheus_file(metrics_file)
+            st.success(f"Metrics written to {metrics_file}")
+    with col3:
+        if st.button("🧹 Reset metrics"):
+            reset_metrics()
+            st.rerun()
+
+    with st.expander("Prometheus exposition"):
+        st.code(prometheus_text, language="text")
+
+    st.subheader("Background Jobs")
+    job_statuses = get_job_statuses()
+    if job_statuses.empty:
+        st.info("The background scheduler hasn't run yet. Start it with `python main.py --scheduler`.")
+    else:
+        st.dataframe(job_statuses, use_container_width=True, hide_index=True)
+
+    st.subheader("Rate Anomaly Detectors")
+    st.caption("Baselines update on every insert and load. Replaying rebuilds them from all history, "
+               "hot and archived, and replaces the stored alerts.")
+    if st.button("🔁 Replay history"):
+        with st.spinner("Replaying incident and ticket history..."):
+            for table_name in DETECTORS:
+                rows, alerts = replay_history(table_name)
+                st.success(f"{table_name}: replayed {rows} rows, {alerts} alerts raised.")
+
+    st.subheader("Captured Profiles")
+    profiles = get_profiles()
+    if not profiles:
+        st.info("No profiles captured yet.")
+    for profile in profiles:
+        with st.expander(f"{profile['label']} — {profile['captured_at']} — peak {profile['peak_memory_mb']} MB"):
+            st.markdown("**CPU (cProfile, cumulative)**")
+            st.code(profile["cpu_profile"], language="text")
+            st.markdown("**Top allocations (tracemalloc)**")
+            st.code(profile["allocations"], language="text")
+
+# Call the page function to execute the page content
+page()
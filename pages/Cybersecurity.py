@@ -1,10 +1,17 @@
 # Cybersecurity.py
 import streamlit as st
-import pandas as pd
 from pathlib import Path
 import sys
 
 from app.auth import require_login, logout_button
+from app.instrumentation import run_page
+from app.data.anomalies import get_recent_alerts
+from app.data.archive import ARCHIVE_HORIZON_DAYS, count_archived_rows
+from app.data.clusters import collapse_duplicates
+from app.data.correlation import (
+    CORRELATION_FOLLOW_HOURS, CORRELATION_LEAD_HOURS, get_linked_tickets, get_ticket_load_by_incident_type,
+    get_top_incident_ticket_load
+)
 from app.data.incidents import get_all_incidents, insert_incident
 
 # Ensure pages directory is on sys.path so ai_assistant can be imported when pages run standalone
@@ -12,54 +19,166 @@ pages_dir = Path(__file__).parent
 if str(pages_dir) not in sys.path:
     sys.path.insert(0, str(pages_dir))
 
-from ai_assistant import get_client, run_contextual_chat
+from ai_assistant import get_client, run_contextual_chat, show_executive_brief, CHAT_CONTEXT_ROWS
 
 # ⚠️ CRITICAL FIX: Removed global require_login() call
 
-def page():
-    # Enforce Login Check immediately inside the page function
-    require_login()
-    
-    st.set_page_config(page_title="Cybersecurity — Incidents", layout="wide")
-    
-    col_header, col_logout = st.columns([10, 2])
+# --- Cached Data Access ---
+# Each panel below is a fragment, so chat messages and form input only rerun their own panel.
+# The cached loaders make sure the table is fetched and aggregated once, not on every rerun.
+# st.cache_data keys on the arguments as passed, so f() and f(flag=False) would be two
+# entries; loader flags have no default and are always passed by keyword.
 
-    with col_header:
-        st.header("🛡️ Cyber Incidents Analysis")
-    with col_logout:
-        st.markdown("<br>", unsafe_allow_html=True)
-        logout_button()
-        
-    incidents_df = get_all_incidents()
+@st.cache_data(ttl=300, show_spinner=False)
+def load_incidents(include_archive):
+    return get_all_incidents(include_archive=include_archive)
 
-    st.markdown("---")
-    col_vis, col_chat = st.columns([2, 1])
 
-    with col_vis:
-        if incidents_df.empty:
-            st.info("No incident data found.")
+@st.cache_data(ttl=300, show_spinner=False)
+def load_archived_count():
+    return count_archived_rows("cyber_incidents")
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def load_incident_clusters(include_archive):
+    # One row per near-duplicate cluster, with the number of incidents it covers
+    return collapse_duplicates(load_incidents(include_archive=include_archive))
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def load_incident_breakdowns(grouped):
+    loader = load_incident_clusters if grouped else load_incidents
+    incidents_df = loader(include_archive=False)
+    return incidents_df['severity'].value_counts(), incidents_df['status'].value_counts()
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def load_incident_chat_context():
+    # Clusters rather than raw rows, so repeated alerts don't crowd out everything else
+    return load_incident_clusters(include_archive=False).head(CHAT_CONTEXT_ROWS)
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def load_ticket_correlation():
+    return get_top_incident_ticket_load(20), get_ticket_load_by_incident_type()
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def load_linked_tickets(incident_id):
+    return get_linked_tickets(incident_id)
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def load_rate_alerts():
+    return get_recent_alerts("incidents")
+
+
+def clear_incident_cache():
+    load_incidents.clear()
+    load_archived_count.clear()
+    load_incident_clusters.clear()
+    load_incident_breakdowns.clear()
+    load_incident_chat_context.clear()
+    load_ticket_correlation.clear()
+    load_linked_tickets.clear()
+    load_rate_alerts.clear()
+
+# --- Page Panels ---
+
+@st.fragment
+def rate_alerts_panel():
+    st.subheader("🚨 Incident Rate Alerts")
+    alerts = load_rate_alerts()
+    if alerts.empty:
+        st.success("No unusual spikes in incident arrivals.")
+        return
+    latest = alerts.iloc[0]
+    st.error(f"{latest['alert_key']}: {latest['observed']} incidents in the hour from {latest['bucket_start']} "
+             f"(about {latest['expected']:.1f} expected)")
+    with st.expander("Recent alerts"):
+        st.dataframe(alerts, use_container_width=True, hide_index=True)
+
+
+@st.fragment
+def brief_panel():
+    show_executive_brief("incident_summary", "📝 Executive Brief — Incidents")
+
+
+@st.fragment
+def chart_panel():
+    live, archived = len(load_incidents(include_archive=False)), load_archived_count()
+    if live == 0 and archived == 0:
+        st.info("No incident data found.")
+        return
+
+    grouped = st.toggle("Count near-duplicates once", key="incidents_grouped_charts")
+    severity_counts, status_counts = load_incident_breakdowns(grouped=grouped)
+
+    m_col1, m_col2, m_col3 = st.columns(3)
+    m_col1.metric("Incidents (incl. archived)", live + archived)
+    m_col2.metric("Live", live)
+    m_col3.metric("Distinct live (near-duplicates grouped)", len(load_incident_clusters(include_archive=False)))
+    if archived:
+        # Archived rows are only counted from the partition catalogue; the charts don't scan them
+        st.caption(f"Charts cover live incidents only. {archived} closed incidents older than "
+                   f"{ARCHIVE_HORIZON_DAYS} days are archived; include them in the table below.")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.subheader("Severity Distribution (live)")
+        st.bar_chart(severity_counts)
+    with col2:
+        st.subheader("Status Breakdown (live)")
+        st.area_chart(status_counts)
+
+
+@st.fragment
+def table_panel():
+    # Closed incidents past the archive horizon live in cold partitions and are only read on request
+    include_archive = st.toggle("Include archived incidents", key="incidents_include_archive")
+    grouped = st.toggle("Group near-duplicates", key="incidents_grouped_table")
+    loader = load_incident_clusters if grouped else load_incidents
+    incidents_df = loader(include_archive=include_archive)
+    if not incidents_df.empty:
+        st.dataframe(incidents_df, use_container_width=True)
+
+
+@st.fragment
+def ticket_load_panel():
+    st.subheader("🔗 Related IT Ticket Load")
+    top_incidents, load_by_type = load_ticket_correlation()
+    if top_incidents.empty:
+        st.info("No incidents have been correlated with IT tickets yet.")
+        return
+
+    st.caption(f"Tickets raised from {CORRELATION_LEAD_HOURS}h before to {CORRELATION_FOLLOW_HOURS}h after each incident. "
+               "Related tickets also share a topic with the incident (account, email, network, storage, endpoint).")
+    st.bar_chart(load_by_type.set_index("incident_type")[["avg_related_tickets", "avg_window_tickets"]])
+    st.dataframe(top_incidents, use_container_width=True, hide_index=True)
+
+    incident_id = st.selectbox("Show related tickets for incident", top_incidents["id"], key="ticket_load_incident")
+    if incident_id is not None:
+        linked_tickets = load_linked_tickets(incident_id)
+        if linked_tickets.empty:
+            st.caption("No ticket in this incident's window shares a topic with it.")
         else:
-            col1, col2 = st.columns(2)
-            with col1:
-                st.subheader("Severity Distribution")
-                st.bar_chart(incidents_df['severity'].value_counts())
-            with col2:
-                st.subheader("Status Breakdown")
-                st.area_chart(incidents_df['status'].value_counts())
+            st.dataframe(linked_tickets, use_container_width=True, hide_index=True)
 
-            st.dataframe(incidents_df, use_container_width=True)
 
-    with col_chat:
-        st.subheader("🤖 Incident Data Navigator")
-        gemini_client = get_client()
-        run_contextual_chat(
-            chat_key="incident_chat",
-            data_df=incidents_df,
-            system_prompt="Hello! I am the Cyber Data Navigator. Ask me anything about the incident data.",
-            client=gemini_client
-        )
+@st.fragment
+def chat_panel():
+    st.subheader("🤖 Incident Data Navigator")
+    gemini_client = get_client()
+    run_contextual_chat(
+        chat_key="incident_chat",
+        data_df=load_incident_chat_context(),
+        system_prompt="Hello! I am the Cyber Data Navigator. Ask me anything about the incident data.",
+        client=gemini_client
+    )
 
-    # Incident Entry Form
+
+@st.fragment
+def entry_form_panel():
     with st.expander("➕ Log New Cyber Incident"):
         with st.form("incident_entry_form"):
             f_col1, f_col2 = st.columns(2)
@@ -82,7 +201,40 @@ def page():
                     reported_by=st.session_state.username
                 )
                 st.success("New incident logged successfully! Refreshing data...")
-                st.experimental_rerun()
+                # The new row changes every panel, so drop the cache and rerun the whole page
+                clear_incident_cache()
+                st.rerun()
+
+
+def page():
+    # Enforce Login Check immediately inside the page function
+    require_login()
+
+    st.set_page_config(page_title="Cybersecurity — Incidents", layout="wide")
+
+    col_header, col_logout = st.columns([10, 2])
+
+    with col_header:
+        st.header("🛡️ Cyber Incidents Analysis")
+    with col_logout:
+        st.markdown("<br>", unsafe_allow_html=True)
+        logout_button()
+
+    st.markdown("---")
+    col_vis, col_chat = st.columns([2, 1])
+
+    with col_vis:
+        rate_alerts_panel()
+        brief_panel()
+        chart_panel()
+        table_panel()
+        ticket_load_panel()
+
+    with col_chat:
+        chat_panel()
+
+    # Incident Entry Form
+    entry_form_panel()
 
 # Call the page function to execute the page content
-page()
\ No newline at end of file
+run_page(page, "Cybersecurity")
@@ -1,10 +1,10 @@
 # Data_Science.py
 import streamlit as st
-import pandas as pd
 from pathlib import Path
 import sys
 
 from app.auth import require_login, logout_button
+from app.instrumentation import run_page
 from app.data.datasets import get_all_datasets
 
 # Ensure pages directory is on sys.path so ai_assistant can be imported when pages run standalone
@@ -12,10 +12,77 @@ pages_dir = Path(__file__).parent
 if str(pages_dir) not in sys.path:
     sys.path.insert(0, str(pages_dir))
 
-from ai_assistant import get_client, run_contextual_chat
+from ai_assistant import get_client, run_contextual_chat, show_executive_brief, CHAT_CONTEXT_ROWS
 
 # ⚠️ CRITICAL FIX: Removed global require_login() call
 
+# --- Cached Data Access ---
+# Each panel below is a fragment, so a chat message only reruns the chat panel.
+# The cached loaders make sure the table is fetched and cleaned once, not on every rerun.
+
+@st.cache_data(ttl=300, show_spinner=False)
+def load_datasets():
+    import pandas as pd
+
+    df_datasets = get_all_datasets()
+    if not df_datasets.empty:
+        df_datasets['record_count'] = pd.to_numeric(df_datasets['record_count'], errors='coerce').fillna(0).astype(int)
+        df_datasets['file_size_mb'] = pd.to_numeric(df_datasets['file_size_mb'], errors='coerce').fillna(0)
+    return df_datasets
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def load_dataset_summary():
+    df_datasets = load_datasets()
+    return df_datasets['record_count'].sum(), df_datasets['category'].value_counts()
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def load_dataset_chat_context():
+    return load_datasets().head(CHAT_CONTEXT_ROWS)
+
+# --- Page Panels ---
+
+@st.fragment
+def brief_panel():
+    show_executive_brief("dataset_value", "📝 Executive Brief — Data Catalog")
+
+
+@st.fragment
+def chart_panel():
+    if load_datasets().empty:
+        st.info("No datasets metadata found.")
+        return
+
+    total_records, category_counts = load_dataset_summary()
+    st.metric("Total Records Across All Datasets", f"{total_records:,}")
+
+    st.subheader("Datasets by Category")
+    if category_counts.empty:
+        st.info("No dataset categories recorded in the catalog.")
+    else:
+        st.bar_chart(category_counts)
+
+
+@st.fragment
+def table_panel():
+    df_datasets = load_datasets()
+    if not df_datasets.empty:
+        st.dataframe(df_datasets, use_container_width=True)
+
+
+@st.fragment
+def chat_panel():
+    st.subheader("🤖 Data Catalog Expert")
+    gemini_client = get_client()
+    run_contextual_chat(
+        chat_key="datasets_chat",
+        data_df=load_dataset_chat_context(),
+        system_prompt="Hello! I am the Data Catalog Expert. Ask me anything about dataset metadata.",
+        client=gemini_client
+    )
+
+
 def page():
     # Enforce Login Check immediately inside the page function
     require_login()
@@ -29,36 +96,17 @@ def page():
     with col_logout:
         st.markdown("<br>", unsafe_allow_html=True)
         logout_button()
-        
-    df_datasets = get_all_datasets()
 
     st.markdown("---")
     col_vis, col_chat = st.columns([2, 1])
 
     with col_vis:
-        if df_datasets.empty:
-            st.info("No datasets metadata found.")
-        else:
-            df_datasets['record_count'] = pd.to_numeric(df_datasets['record_count'], errors='coerce').fillna(0).astype(int)
-            df_datasets['file_size_mb'] = pd.to_numeric(df_datasets['file_size_mb'], errors='coerce').fillna(0)
-
-            total_records = df_datasets['record_count'].sum()
-            st.metric("Total Records Across All Datasets", f"{total_records:,}")
-
-            st.subheader("Datasets by Category")
-            st.bar_chart(df_datasets['category'].value_counts())
-
-            st.dataframe(df_datasets, use_container_width=True)
+        brief_panel()
+        chart_panel()
+        table_panel()
 
     with col_chat:
-        st.subheader("🤖 Data Catalog Expert")
-        gemini_client = get_client()
-        run_contextual_chat(
-            chat_key="datasets_chat",
-            data_df=df_datasets,
-            system_prompt="Hello! I am the Data Catalog Expert. Ask me anything about dataset metadata.",
-            client=gemini_client
-        )
+        chat_panel()
 
 # Call the page function to execute the page content
-page()
\ No newline at end of file
+run_page(page, "Data_Science")
@@ -1,10 +1,13 @@
 # IT_Operations.py
 import streamlit as st
-import pandas as pd
 from pathlib import Path
 import sys
 
 from app.auth import require_login, logout_button
+from app.instrumentation import run_page
+from app.data.anomalies import get_recent_alerts
+from app.data.archive import ARCHIVE_HORIZON_DAYS, count_archived_rows
+from app.data.correlation import get_top_incident_ticket_load
 from app.data.tickets import get_all_tickets
 
 # Ensure pages directory is on sys.path so ai_assistant can be imported when pages run standalone
@@ -12,7 +15,118 @@ pages_dir = Path(__file__).parent
 if str(pages_dir) not in sys.path:
     sys.path.insert(0, str(pages_dir))
 
-from ai_assistant import get_client, run_contextual_chat
+from ai_assistant import get_client, run_contextual_chat, show_executive_brief, CHAT_CONTEXT_ROWS
+
+# --- Cached Data Access ---
+# Each panel below is a fragment, so a chat message only reruns the chat panel.
+# The cached loaders make sure the table is fetched and aggregated once, not on every rerun.
+# st.cache_data keys on the arguments as passed, so f() and f(flag=False) would be two
+# entries; loader flags have no default and are always passed by keyword.
+
+@st.cache_data(ttl=300, show_spinner=False)
+def load_tickets(include_archive):
+    return get_all_tickets(include_archive=include_archive)
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def load_archived_count():
+    return count_archived_rows("it_tickets")
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def load_ticket_breakdowns():
+    df_tickets = load_tickets(include_archive=False)
+    return df_tickets['status'].value_counts(), df_tickets['priority'].value_counts()
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def load_ticket_chat_context():
+    return load_tickets(include_archive=False).head(CHAT_CONTEXT_ROWS)
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def load_incident_ticket_load():
+    return get_top_incident_ticket_load(10)
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def load_rate_alerts():
+    return get_recent_alerts("tickets")
+
+# --- Page Panels ---
+
+@st.fragment
+def rate_alerts_panel():
+    st.subheader("🚨 Ticket Rate Alerts")
+    alerts = load_rate_alerts()
+    if alerts.empty:
+        st.success("No unusual spikes in ticket arrivals.")
+        return
+    latest = alerts.iloc[0]
+    st.error(f"{latest['alert_key']}: {latest['observed']} tickets in the hour from {latest['bucket_start']} "
+             f"(about {latest['expected']:.1f} expected)")
+    with st.expander("Recent alerts"):
+        st.dataframe(alerts, use_container_width=True, hide_index=True)
+
+
+@st.fragment
+def brief_panel():
+    show_executive_brief("ticket_trends", "📝 Executive Brief — Ticket Trends")
+
+
+@st.fragment
+def chart_panel():
+    live, archived = len(load_tickets(include_archive=False)), load_archived_count()
+    if live == 0 and archived == 0:
+        st.info("No IT ticket data found.")
+        return
+
+    status_counts, priority_counts = load_ticket_breakdowns()
+    m_col1, m_col2 = st.columns(2)
+    m_col1.metric("Total Tickets (incl. archived)", live + archived)
+    m_col2.metric("Live Tickets", live)
+    if archived:
+        # Archived rows are only counted from the partition catalogue; the charts don't scan them
+        st.caption(f"Charts cover live tickets only. {archived} resolved tickets older than "
+                   f"{ARCHIVE_HORIZON_DAYS} days are archived; include them in the table below.")
+    colA, colB = st.columns(2)
+    with colA:
+        st.subheader("Ticket Status Breakdown (live)")
+        st.bar_chart(status_counts)
+    with colB:
+        st.subheader("Priority Distribution (live)")
+        st.bar_chart(priority_counts)
+
+
+@st.fragment
+def table_panel():
+    # Resolved tickets past the archive horizon live in cold partitions and are only read on request
+    include_archive = st.toggle("Include archived tickets", key="tickets_include_archive")
+    df_tickets = load_tickets(include_archive=include_archive)
+    if not df_tickets.empty:
+        st.dataframe(df_tickets, use_container_width=True)
+
+
+@st.fragment
+def incident_load_panel():
+    st.subheader("🛡️ Security Incidents Driving Ticket Load")
+    top_incidents = load_incident_ticket_load()
+    if top_incidents.empty:
+        st.info("No incidents have been correlated with IT tickets yet.")
+        return
+    st.dataframe(top_incidents, use_container_width=True, hide_index=True)
+
+
+@st.fragment
+def chat_panel():
+    st.subheader("🤖 IT Tickets Assistant")
+    gemini_client = get_client()
+    run_contextual_chat(
+        chat_key="tickets_chat",
+        data_df=load_ticket_chat_context(),
+        system_prompt="Hello! I am the IT Tickets Assistant. Ask questions about trends, workloads, and ticket patterns.",
+        client=gemini_client
+    )
 
 # --- Login/Logout Setup ---
 # ⚠️ CRITICAL FIX: The login check is moved inside the page() function 
@@ -32,35 +146,19 @@ def page():
     with col_logout:
         st.markdown("<br>", unsafe_allow_html=True) 
         logout_button()
-        
-    df_tickets = get_all_tickets()
 
     st.markdown("---")
     col_vis, col_chat = st.columns([2, 1])
 
     with col_vis:
-        if df_tickets.empty:
-            st.info("No IT ticket data found.")
-        else:
-            st.metric("Total Tickets", len(df_tickets))
-            colA, colB = st.columns(2)
-            with colA:
-                st.subheader("Ticket Status Breakdown")
-                st.bar_chart(df_tickets['status'].value_counts())
-            with colB:
-                st.subheader("Priority Distribution")
-                st.bar_chart(df_tickets['priority'].value_counts())
-            st.dataframe(df_tickets, use_container_width=True)
+        rate_alerts_panel()
+        brief_panel()
+        chart_panel()
+        table_panel()
+        incident_load_panel()
 
     with col_chat:
-        st.subheader("🤖 IT Tickets Assistant")
-        gemini_client = get_client()
-        run_contextual_chat(
-            chat_key="tickets_chat",
-            data_df=df_tickets,
-            system_prompt="Hello! I am the IT Tickets Assistant. Ask questions about trends, workloads, and ticket patterns.",
-            client=gemini_client
-        )
+        chat_panel()
 
 # Execute the page content
-page()
\ No newline at end of file
+run_page(page, "IT_operations")
@@ -1,14 +1,60 @@
 # ai_assistant.py
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
 import streamlit as st
-import pandas as pd
 
-from app.services.gemini_service import initialize_gemini_client
+from app.data.briefs import get_latest_brief
+from app.instrumentation import track
+from app.services.gemini_service import get_shared_gemini_client, generate_content
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Number of rows sent to the model as chat context
+CHAT_CONTEXT_ROWS = 50
 
 def get_client():
-    if 'gemini_client' not in st.session_state:
-        # Initialize and cache the client
-        st.session_state.gemini_client = initialize_gemini_client()
-    return st.session_state.gemini_client
+    client = get_shared_gemini_client()
+    if client is None:
+        # Don't keep a failed initialization cached for the lifetime of the process
+        get_shared_gemini_client.clear()
+    return client
+
+@st.cache_data(ttl=60, show_spinner=False)
+def load_latest_brief(brief_type: str):
+    return get_latest_brief(brief_type)
+
+def show_executive_brief(brief_type: str, title: str):
+    """Shows the newest precomputed brief; they are generated by `python main.py --scheduler`."""
+    brief = load_latest_brief(brief_type)
+    with st.expander(title, expanded=brief is not None):
+        if brief is None:
+            st.info("No brief has been generated yet. Start the scheduler with `python main.py --scheduler`.")
+            return
+        content, created_at = brief
+        st.caption(f"Generated {created_at}")
+        st.markdown(content)
+
+def build_chat_prompt(data_df: pd.DataFrame, question: str) -> str:
+    """Builds the model prompt for one chat question from the first rows of the page's data."""
+    # Limit the DataFrame size to save token usage and prevent API issues
+    limited_df = data_df.head(CHAT_CONTEXT_ROWS)
+    data_string = limited_df.to_markdown(index=False)
+
+    return f"""
+        CONTEXT: You are an expert AI data analyst. Your knowledge is strictly limited to the provided dataset.
+        Only the first {len(limited_df)} rows are shown.
+
+        DATA:
+        {data_string}
+
+        USER QUESTION:
+        {question}
+
+        Provide insights only from the given data.
+        """
 
 def run_contextual_chat(chat_key: str, data_df: pd.DataFrame, system_prompt: str, client):
     """
@@ -34,30 +80,12 @@ def run_contextual_chat(chat_key: str, data_df: pd.DataFrame, system_prompt: str
         with st.chat_message("user"):
             st.markdown(prompt)
 
-        # Limit the DataFrame size to save token usage and prevent API issues
-        limited_df = data_df.head(50)
-        data_string = limited_df.to_markdown(index=False)
-
-        full_query = f"""
-        CONTEXT: You are an expert AI data analyst. Your knowledge is strictly limited to the provided dataset.
-        Only the first {len(limited_df)} rows are shown.
-
-        DATA:
-        {data_string}
-
-        USER QUESTION:
-        {prompt}
-
-        Provide insights only from the given data.
-        """
+        with track("gemini_prompt_build_seconds", operation=chat_key):
+            full_query = build_chat_prompt(data_df, prompt)
 
         with st.spinner("Thinking..."):
             try:
-                response = client.models.generate_content(
-                    model='gemini-2.5-flash',
-                    contents=full_query
-                )
-                assistant_response = response.text
+                assistant_response = generate_content(client, full_query, chat_key)
             except Exception as e:
                 # 🛠️ MINOR IMPROVEMENT: Provide a clearer message for token or connection issues.
                 if "400" in str(e):
@@ -0,0 +1,65 @@
+"""
+Shared fixtures. The `backend` fixture always runs a test against a scratch SQLite
+file, and also against PostgreSQL when DATABASE_URL points at one (each run gets
+its own schema, dropped afterwards):
+
+    DATABASE_URL=postgresql://localhost/platform_test python -m pytest tests
+"""
+import os
+import sys
+import uuid
+from pathlib import Path
+
+import pytest
+
+# Tests import the app the same way the pages do, from the repository root
+REPO_ROOT = Path(__file__).resolve().parent.parent
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from app.data.db import SQLiteBackend, create_backend, set_backend  # noqa: E402
+from app.data.schema import create_all_tables  # noqa: E402
+
+POSTGRES_URL = os.environ.get("DATABASE_URL", "")
+BACKENDS = [
+    "sqlite",
+    pytest.param("postgresql", marks=pytest.mark.skipif(
+        not POSTGRES_URL.startswith(("postgresql://", "postgres://")),
+        reason="set DATABASE_URL to a PostgreSQL database to run these",
+    )),
+]
+
+
+def _postgres_backend(request):
+    schema = f"test_{uuid.uuid4().hex[:12]}"
+    admin = create_backend(POSTGRES_URL, pool_size=1)
+
+    def run_admin(statement):
+        conn = admin.connect()
+        try:
+            conn.cursor().execute(statement)
+            conn.commit()
+        finally:
+            conn.close()
+
+    run_admin(f"CREATE SCHEMA {schema}")
+    separator = "&" if "?" in POSTGRES_URL else "?"
+    backend = create_backend(f"{POSTGRES_URL}{separator}options=-csearch_path%3D{schema}", pool_size=4)
+
+    def drop_schema():
+        backend.pool.closeall()
+        run_admin(f"DROP SCHEMA {schema} CASCADE")
+        admin.pool.closeall()
+    request.addfinalizer(drop_schema)
+    return backend
+
+
+@pytest.fixture(params=BACKENDS)
+def backend(request, tmp_path):
+    backend = SQLiteBackend(tmp_path / "test.db") if request.param == "sqlite" else _postgres_backend(request)
+    set_backend(backend)
+    conn = backend.connect()
+    create_all_tables(conn)
+    conn.close()
+    yield backend
+    set_backend(None)
@@ -0,0 +1,137 @@
+"""Arrival-rate anomaly detector tests: alerting, numerical edge cases and stored state."""
+import json
+import math
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from app.data.anomalies import get_recent_alerts
+from app.data.db import execute_many, fetch_one, read_dataframe
+from app.services import anomaly
+from app.services.anomaly import HOURS_PER_WEEK, DetectorState, replay_history, update_detector
+
+START_HOUR = 480_000  # 2024-10-04 00:00
+
+
+def steady_hours(state, hours):
+    """Feeds `hours` hours of two to six arrivals an hour, all from one reporter."""
+    alerts = []
+    for hour in range(START_HOUR, START_HOUR + hours):
+        count = (3, 5, 4, 6, 2)[hour % 5]
+        alerts += state.process([(hour, "rate", "all", count), (hour, "sketch", "reported_by=soc", count)])
+    return alerts
+
+
+def test_a_spike_raises_an_alert():
+    state = DetectorState()
+    steady_hours(state, 3 * HOURS_PER_WEEK)
+
+    spike_hour = START_HOUR + 3 * HOURS_PER_WEEK
+    alerts = []
+    for _ in range(30):
+        alerts += state.process([(spike_hour, "rate", "all", 1), (spike_hour, "sketch", "reported_by=intruder", 1)])
+
+    assert {key for key, *_ in alerts} == {"all", "reported_by=intruder"}
+    # Each key alerts once per hour, however long the spike goes on
+    assert len(alerts) == 2
+    assert all(math.isfinite(expected) and score >= anomaly.ALERT_SCORE for *_, expected, score in alerts)
+
+
+def test_a_steady_rate_raises_nothing():
+    assert steady_hours(DetectorState(), 4 * HOURS_PER_WEEK) == []
+
+
+def test_a_decayed_baseline_stays_finite():
+    state = DetectorState()
+    steady_hours(state, 3 * HOURS_PER_WEEK)
+    # Months of silence decay the total's level to a subnormal float, but not to zero
+    quiet_hour = START_HOUR + 3 * HOURS_PER_WEEK + 6_900
+    state.process([(quiet_hour, "rate", "all", 1)])
+    assert 0 < state.estimates["all"].level < 1e-300
+
+    alerts = state.process([(quiet_hour, "sketch", "reported_by=soc", 20)])
+    assert state._seasonal_factor() == 1.0
+    assert all(math.isfinite(expected) and math.isfinite(score) for *_, expected, score in alerts)
+    assert "NaN" not in state.to_json() + state.baseline_json()
+    assert "Infinity" not in state.to_json() + state.baseline_json()
+
+
+def test_state_survives_a_json_round_trip():
+    state = DetectorState()
+    steady_hours(state, HOURS_PER_WEEK + 5)
+    state.process([(START_HOUR + HOURS_PER_WEEK + 5, "sketch", "reported_by=user9", 2)])
+
+    restored = DetectorState(json.loads(state.to_json()), json.loads(state.baseline_json()))
+    assert (restored.to_json(), restored.baseline_json()) == (state.to_json(), state.baseline_json())
+    assert not restored.baseline_changed
+
+    # States saved before the baselines were split off hold everything in one document
+    combined = {**json.loads(state.baseline_json()), **json.loads(state.to_json())}
+    legacy = DetectorState(combined)
+    assert legacy.baseline_json() == state.baseline_json()
+    assert legacy.baseline_changed
+
+
+def insert_incidents(times, reporter="soc"):
+    execute_many(
+        "INSERT INTO cyber_incidents (date, incident_type, severity, status, description, reported_by) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        [(when.strftime("%Y-%m-%d %H:%M:%S"), "Phishing", "High", "Open", "Suspicious email", reporter)
+         for when in times])
+
+
+def history_times(seed=3, weeks=3):
+    rng = np.random.default_rng(seed)
+    start = datetime(2024, 6, 3)
+    times = [start + timedelta(hours=hour, minutes=int(rng.integers(60)))
+             for hour in range(weeks * HOURS_PER_WEEK) for _ in range(int(rng.poisson(3)))]
+    # A burst on the last afternoon
+    times += [start + timedelta(hours=weeks * HOURS_PER_WEEK - 10, minutes=i) for i in range(25)]
+    return times
+
+
+def stored_detector(stream):
+    return fetch_one("""
+        SELECT s.state, b.state FROM anomaly_state s JOIN anomaly_baselines b ON b.stream = s.stream
+        WHERE s.stream = ?
+    """, (stream,))
+
+
+def test_replay_history_is_deterministic(backend):
+    insert_incidents(history_times())
+    rows, alerts = replay_history("cyber_incidents")
+    first = stored_detector("incidents"), get_recent_alerts("incidents").drop(columns="created_at")
+    assert alerts >= 1
+
+    assert replay_history("cyber_incidents") == (rows, alerts)
+    second = stored_detector("incidents"), get_recent_alerts("incidents").drop(columns="created_at")
+    assert first[0] == second[0]
+    assert first[1].equals(second[1])
+
+
+def test_stored_state_matches_the_detector_in_memory(backend):
+    insert_incidents(history_times(weeks=2))
+    update_detector("cyber_incidents")
+    # Inserts within the open hour leave the stored baselines alone
+    last_hour = history_times(weeks=2)[-1]
+    baseline_before = stored_detector("incidents")[1]
+    insert_incidents([last_hour, last_hour + timedelta(minutes=1)])
+    update_detector("cyber_incidents")
+    assert stored_detector("incidents")[1] == baseline_before
+
+    in_memory = anomaly._cache["incidents"][1]
+    anomaly._cache.clear()
+    version, loaded = anomaly._load_state("incidents")
+    assert version == 2
+    assert (loaded.to_json(), loaded.baseline_json()) == (in_memory.to_json(), in_memory.baseline_json())
+
+
+def test_recent_alerts_leave_out_non_finite_values(backend):
+    execute_many(
+        "INSERT INTO anomaly_alerts (stream, alert_key, bucket_start, observed, expected, score) VALUES (?, ?, ?, ?, ?, ?)",
+        [("tickets", "all", "2024-06-01 10:00", 9, 1.5, 6.2),
+         ("tickets", "priority=High", "2024-06-01 10:00", 8, None, None),
+         ("tickets", "assigned_to=bob", "2024-06-01 10:00", 7, float("nan"), float("nan")),
+         ("tickets", "category=Email", "2024-06-01 10:00", 6, float("inf"), float("-inf"))])
+    assert get_recent_alerts("tickets")["alert_key"].tolist() == ["all"]
+    assert len(read_dataframe("SELECT * FROM anomaly_alerts")) == 4
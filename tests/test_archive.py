@@ -0,0 +1,65 @@
+"""Archive partition tests: moving closed rows, the hot/cold read path and the catalogue."""
+from datetime import date
+
+import pytest
+
+from app.data.archive import (
+    archive_closed_records, count_archived_rows, count_hot_rows, get_partitions, read_table
+)
+from app.data.correlation import correlate_new_rows
+from app.data.incidents import insert_incident
+
+TODAY = date(2025, 1, 1)
+
+
+@pytest.fixture
+def incidents(backend):
+    """Three old closed incidents in two months, an old open one and a recent closed one, archived."""
+    rows = [
+        ("2024-01-10 09:00:00", "Closed"),
+        ("2024-01-20 14:30:00", "Resolved"),
+        ("2024-02-05 08:00:00", "Closed"),
+        ("2024-02-06 10:00:00", "Open"),
+        ("2024-12-01 12:00:00", "Closed"),
+    ]
+    ids = [insert_incident(when, "Phishing", "High", status, f"Incident {i}", "tester")
+           for i, (when, status) in enumerate(rows)]
+    correlate_new_rows()
+    assert archive_closed_records("cyber_incidents", today=TODAY) == 3
+    return ids
+
+
+def test_archive_keeps_open_and_recent_rows_hot(incidents):
+    hot = read_table("cyber_incidents")
+    assert sorted(hot["id"]) == [incidents[3], incidents[4]]
+    assert count_hot_rows("cyber_incidents") == 2
+    # Archiving again moves nothing
+    assert archive_closed_records("cyber_incidents", today=TODAY) == 0
+
+
+def test_read_table_unions_hot_and_cold_rows(incidents):
+    df = read_table("cyber_incidents", include_archive=True)
+    assert df["id"].tolist() == sorted(incidents, reverse=True)
+    assert df.columns.tolist() == read_table("cyber_incidents").columns.tolist()
+
+
+def test_date_range_reads_only_overlapping_partitions(incidents):
+    assert get_partitions("cyber_incidents", "2024-02-01", "2024-02-29") == ["cyber_incidents_archive_2024_02"]
+    assert get_partitions("cyber_incidents", "2024-03-01") == []
+
+    february = read_table("cyber_incidents", "2024-02-01", "2024-02-29")
+    assert sorted(february["id"]) == [incidents[2], incidents[3]]
+    # The end date covers the whole day
+    january = read_table("cyber_incidents", "2024-01-01", "2024-01-20")
+    assert sorted(january["id"]) == [incidents[0], incidents[1]]
+
+
+def test_catalogue_counts_archived_rows(incidents):
+    assert count_archived_rows("cyber_incidents") == 3
+    assert count_archived_rows("it_tickets") == 0
+
+    # A late closed incident in an archived month is added to that partition's count
+    insert_incident("2024-02-20 16:00:00", "Phishing", "High", "Closed", "Late closure", "tester")
+    correlate_new_rows()
+    assert archive_closed_records("cyber_incidents", today=TODAY) == 1
+    assert count_archived_rows("cyber_incidents") == 4
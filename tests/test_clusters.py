@@ -0,0 +1,92 @@
+"""Near-duplicate incident clustering (MinHash/LSH) and collapse_duplicates."""
+import pandas as pd
+
+from app.data import clusters
+from app.data.clusters import assign_clusters, cluster_new_incidents, collapse_duplicates
+from app.data.db import fetch_one, read_dataframe
+from app.data.incidents import insert_incident
+
+PHISHING = "Phishing email reported by user {n}: credential harvesting link to login-portal.example.com"
+
+
+def incident_frame(rows, first_id=1):
+    """rows are (event_time, incident_type, severity, description)."""
+    return pd.DataFrame([
+        {"id": first_id + i, "event_time": when, "incident_type": kind, "severity": severity, "description": text}
+        for i, (when, kind, severity, text) in enumerate(rows)
+    ])
+
+
+def cluster_of(incident_id):
+    return fetch_one("SELECT cluster_id FROM incident_clusters WHERE incident_id = ?", (incident_id,))[0]
+
+
+def test_near_duplicates_share_a_cluster(backend):
+    first = insert_incident("2024-05-01 09:00:00", "Phishing", "High", "Open", PHISHING.format(n="alice"), "soc")
+    second = insert_incident("2024-05-01 13:00:00", "Phishing", "High", "Open", PHISHING.format(n="bob"), "soc")
+    # The next day still joins, so an alert that keeps firing stays in one cluster
+    third = insert_incident("2024-05-02 08:00:00", "Phishing", "High", "Open", PHISHING.format(n="carol"), "soc")
+
+    assert cluster_of(first) == cluster_of(second) == cluster_of(third) == first
+
+
+def test_distinct_incidents_get_their_own_clusters(backend):
+    base = insert_incident("2024-05-01 09:00:00", "Phishing", "High", "Open", PHISHING.format(n="alice"), "soc")
+    others = [
+        insert_incident("2024-05-01 10:00:00", "Phishing", "High", "Open",
+                        "Ransomware note found on file server FS-02, shares encrypted", "soc"),
+        insert_incident("2024-05-01 11:00:00", "Phishing", "Low", "Open", PHISHING.format(n="bob"), "soc"),
+        insert_incident("2024-05-01 12:00:00", "Malware", "High", "Open", PHISHING.format(n="carol"), "soc"),
+        insert_incident("2024-05-09 09:00:00", "Phishing", "High", "Open", PHISHING.format(n="dave"), "soc"),
+    ]
+    assert [cluster_of(incident_id) for incident_id in others] == others
+    assert cluster_of(base) == base
+
+
+def test_clusters_stay_stable_across_incremental_inserts(backend):
+    rows = [(f"2024-06-{day:02d} 10:00:00", "Phishing", "High", PHISHING.format(n=f"user{day}")) for day in range(1, 6)]
+    rows += [("2024-06-03 12:00:00", "DDoS", "Critical", "SYN flood against the public web tier from botnet")]
+    bulk = assign_clusters(incident_frame(rows))
+    assert set(bulk.values()) == {1, 6}
+
+    later = insert_incident("2024-06-05 18:00:00", "Phishing", "High", "Open", PHISHING.format(n="late"), "soc")
+    assert cluster_of(later) == 1
+    # Backfilling finds nothing left to do and moves nobody
+    assert cluster_new_incidents() == 0
+    stored = read_dataframe("SELECT incident_id, cluster_id FROM incident_clusters ORDER BY incident_id")
+    assert dict(zip(stored["incident_id"], stored["cluster_id"])) == {**bulk, later: 1}
+
+
+def test_bulk_batches_match_a_single_pass(backend, monkeypatch):
+    rows = [(f"2024-07-{1 + i // 4:02d} {8 + i % 4}:00:00", "Phishing", "High", PHISHING.format(n=f"user{i}"))
+            for i in range(40)]
+    rows += [(f"2024-07-{1 + i:02d} 09:30:00", "Malware", "Medium", f"EDR quarantined payload on WS-{i:04d}")
+             for i in range(10)]
+    frame = incident_frame(rows)
+    single = assign_clusters(frame)
+
+    # The same rows again under new ids, in batches of at most three windows' worth of rows
+    monkeypatch.setattr(clusters, "CLUSTER_BATCH_ROWS", 10)
+    monkeypatch.setattr(clusters, "_KEY_LOOKUP_ROWS", 0)
+    shifted = assign_clusters(incident_frame(rows, first_id=1001))
+    assert {incident_id - 1000: cluster_id for incident_id, cluster_id in shifted.items()} == single
+
+
+def test_window_batches_never_split_a_window():
+    windows = pd.Series([1, 1, 1, 2, 2, 3, 3, 3, 3, 4]).to_numpy()
+    assert list(clusters._window_batches(windows, 4)) == [(0, 3), (3, 5), (5, 9), (9, 10)]
+    assert list(clusters._window_batches(windows, 2)) == [(0, 3), (3, 5), (5, 9), (9, 10)]
+    assert list(clusters._window_batches(windows, 100)) == [(0, 10)]
+
+
+def test_collapse_duplicates_keeps_one_row_per_cluster(backend):
+    ids = [insert_incident(f"2024-05-01 {9 + i}:00:00", "Phishing", "High", "Open", PHISHING.format(n=f"u{i}"), "soc")
+           for i in range(3)]
+    loner = insert_incident("2024-05-01 15:00:00", "DDoS", "Critical", "Open", "SYN flood on the VPN gateway", "soc")
+    incidents = read_dataframe("SELECT * FROM cyber_incidents ORDER BY id DESC")
+
+    collapsed = collapse_duplicates(incidents)
+    assert collapsed["id"].tolist() == [loner, ids[-1]]
+    assert collapsed["duplicates"].tolist() == [1, 3]
+    assert collapsed["cluster_id"].tolist() == [loner, ids[0]]
+    assert collapse_duplicates(incidents.iloc[0:0]).empty
@@ -0,0 +1,144 @@
+"""Incident/ticket correlation: the interval join and its incremental materialization."""
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from app.data.correlation import (
+    CORRELATION_FOLLOW_HOURS, CORRELATION_LEAD_HOURS, MAX_LINKS_PER_INCIDENT, TOPIC_KEYWORDS,
+    _epoch_seconds, correlate_new_rows, incident_topics, interval_join, ticket_topics
+)
+from app.data.db import execute, read_dataframe
+from app.data.incidents import insert_incident
+from app.data.tickets import insert_ticket
+
+START = datetime(2024, 3, 1)
+INCIDENT_TYPES = ["Phishing", "Malware", "DDoS", "Unauthorized Access", "Misconfiguration", "Ransomware"]
+TICKET_TEXTS = [
+    ("Access", "Password reset", "User locked out after MFA prompt"),
+    ("Email", "Spam in mailbox", "Outlook keeps flagging messages"),
+    ("Network", "VPN drops", "Connection to the gateway times out"),
+    ("Storage", "Share missing", "Folder permission denied"),
+    ("Hardware", "Laptop slow", "Crash after software install"),
+    ("Other", "Desk move", "Needs a new chair"),
+]
+
+
+def stamp(when, date_only=False):
+    return when.strftime("%Y-%m-%d" if date_only else "%Y-%m-%d %H:%M:%S")
+
+
+def random_rows(rng, incidents=40, tickets=300):
+    incident_times = [START + timedelta(minutes=int(m)) for m in rng.integers(0, 20 * 24 * 60, incidents)]
+    incidents_df = pd.DataFrame({
+        "id": np.arange(1, incidents + 1),
+        "incident_type": rng.choice(INCIDENT_TYPES, incidents),
+        "description": rng.choice(["Suspicious login", "Encrypted file share", "Traffic spike", "Odd process"], incidents),
+        "event_time": [stamp(when) for when in incident_times],
+    })
+
+    ticket_times = [START + timedelta(minutes=int(m)) for m in rng.integers(-3 * 24 * 60, 23 * 24 * 60, tickets)]
+    # Tickets exactly on, and a second outside, the first incidents' window edges
+    for when in incident_times[:10]:
+        for edge in (when - timedelta(hours=CORRELATION_LEAD_HOURS), when + timedelta(hours=CORRELATION_FOLLOW_HOURS)):
+            ticket_times += [edge, edge - timedelta(seconds=1), edge + timedelta(seconds=1)]
+    texts = [TICKET_TEXTS[i] for i in rng.integers(0, len(TICKET_TEXTS), len(ticket_times))]
+    tickets_df = pd.DataFrame({
+        "id": np.arange(1, len(ticket_times) + 1),
+        "category": [category for category, _, _ in texts],
+        "subject": [subject for _, subject, _ in texts],
+        "description": [description for _, _, description in texts],
+        # Some tickets only carry a date, which counts as midnight
+        "event_time": [stamp(when, date_only=i % 17 == 0) for i, when in enumerate(ticket_times)],
+    })
+    return incidents_df, tickets_df
+
+
+def nested_loop_join(incidents_df, tickets_df):
+    """Compares every incident with every ticket; the reference for interval_join."""
+    incident_times, ticket_times = _epoch_seconds(incidents_df["event_time"]), _epoch_seconds(tickets_df["event_time"])
+    incident_matrix, topic_by_ticket = incident_topics(incidents_df), ticket_topics(tickets_df)
+    window_counts, related_counts, lags = [], [], []
+    for i, incident_time in enumerate(incident_times):
+        window = [j for j, ticket_time in enumerate(ticket_times)
+                  if incident_time - CORRELATION_LEAD_HOURS * 3600 <= ticket_time
+                  <= incident_time + CORRELATION_FOLLOW_HOURS * 3600]
+        related = [j for j in window if topic_by_ticket[j] >= 0 and incident_matrix[i, topic_by_ticket[j]]]
+        window_counts.append(len(window))
+        related_counts.append(len(related))
+        lags.append(sorted((ticket_times[j] - incident_time) / 3600 for j in related)[:MAX_LINKS_PER_INCIDENT])
+    return window_counts, related_counts, lags
+
+
+def test_interval_join_matches_a_nested_loop():
+    for seed in range(5):
+        incidents_df, tickets_df = random_rows(np.random.default_rng(seed))
+        window_counts, related_counts, links = interval_join(incidents_df, tickets_df)
+        expected_window, expected_related, expected_lags = nested_loop_join(incidents_df, tickets_df)
+
+        assert window_counts.tolist() == expected_window
+        assert related_counts.tolist() == expected_related
+        # Equal-time tickets may be linked in either order, so links are compared by lag
+        for incident_id, lags in zip(incidents_df["id"], expected_lags):
+            assert links.loc[links["incident_id"] == incident_id, "lag_hours"].tolist() == lags
+        assert set(links["topic"]) <= set(TOPIC_KEYWORDS)
+
+
+def test_window_edges_are_inclusive():
+    incidents_df = pd.DataFrame({"id": [1], "incident_type": ["DDoS"], "description": [""],
+                                 "event_time": ["2024-03-10 02:00:00"]})
+    tickets_df = pd.DataFrame({
+        "id": [1, 2, 3, 4],
+        "category": ["Network"] * 4, "subject": ["VPN drops"] * 4, "description": [""] * 4,
+        # A date-only ticket is midnight, exactly the lead edge; the others straddle the follow edge
+        "event_time": ["2024-03-10", "2024-03-09 23:59:59", "2024-03-12 02:00:00", "2024-03-12 02:00:01"],
+    })
+    window_counts, related_counts, links = interval_join(incidents_df, tickets_df)
+    assert window_counts.tolist() == related_counts.tolist() == [2]
+    assert links["ticket_id"].tolist() == [1, 3]
+
+
+def stored_correlations():
+    loads = read_dataframe("SELECT incident_id, window_tickets, related_tickets FROM incident_ticket_load")
+    links = read_dataframe("SELECT incident_id, ticket_id FROM incident_ticket_links")
+    return (sorted(loads.itertuples(index=False, name=None)),
+            links.groupby("incident_id")["ticket_id"].apply(set).to_dict())
+
+
+def test_incremental_runs_match_a_full_recompute(backend):
+    incidents_df, tickets_df = random_rows(np.random.default_rng(7), incidents=12, tickets=60)
+    ticket_rows = list(tickets_df.itertuples(index=False))
+    # Incidents and tickets arrive in turns, with a run after each batch
+    for batch in range(4):
+        for row in incidents_df.iloc[batch * 3:(batch + 1) * 3].itertuples(index=False):
+            insert_incident(row.event_time, row.incident_type, "High", "Open", row.description, "soc")
+        for row in ticket_rows[batch::4]:
+            insert_ticket(f"T-{row.id}", "High", "Open", row.category, row.subject, row.description,
+                          row.event_time, None, "helpdesk")
+        correlate_new_rows()
+    incremental_loads, incremental_links = stored_correlations()
+
+    execute("DELETE FROM incident_ticket_load")
+    execute("DELETE FROM incident_ticket_links")
+    execute("UPDATE correlation_state SET last_id = 0")
+    assert correlate_new_rows() == (len(incidents_df), len(ticket_rows))
+    full_loads, full_links = stored_correlations()
+
+    assert incremental_loads == full_loads
+    assert any(related for _, _, related in full_loads)
+    # Both keep every related ticket up to the cap; past it, which ones depends on arrival order
+    related = {incident_id: count for incident_id, _, count in full_loads}
+    for incident_id, count in related.items():
+        incremental, full = incremental_links.get(incident_id, set()), full_links.get(incident_id, set())
+        assert len(incremental) == len(full) == min(count, MAX_LINKS_PER_INCIDENT)
+        if count <= MAX_LINKS_PER_INCIDENT:
+            assert incremental == full
+
+
+def test_date_only_tickets_on_the_window_start_day_are_read(backend):
+    insert_ticket("T-1", "High", "Open", "Network", "VPN drops", "", "2024-03-10", None, "helpdesk")
+    correlate_new_rows()
+    # The incident's window starts at midnight, the same instant as the date-only ticket
+    incident_id = insert_incident("2024-03-10 02:00:00", "DDoS", "High", "Open", "", "soc")
+    correlate_new_rows()
+    assert stored_correlations()[0] == [(incident_id, 1, 1)]
@@ -0,0 +1,90 @@
+"""Timing histograms, the timed/track helpers and the Prometheus export."""
+import time
+
+import pytest
+
+from app.instrumentation import (
+    Histogram, get_metrics_summary, increment, observe, render_prometheus, reset_metrics, start_metrics_export,
+    stop_metrics_export, timed, track, write_prometheus_file
+)
+
+
+@pytest.fixture(autouse=True)
+def empty_metrics():
+    reset_metrics()
+    yield
+    reset_metrics()
+
+
+def test_histogram_counts_are_cumulative():
+    histogram = Histogram(buckets=(0.1, 1.0, 10.0))
+    for value in (0.05, 0.5, 0.5, 5.0, 50.0):
+        histogram.observe(value)
+
+    assert histogram.counts == [1, 3, 4]
+    assert histogram.count == 5
+    assert histogram.total == pytest.approx(56.05)
+    assert histogram.quantile(0.5) == 1.0
+    assert histogram.quantile(0.99) == float("inf")
+    assert Histogram().quantile(0.5) == 0.0
+
+
+def test_track_records_blocks_that_raise():
+    with track("block_seconds", stage="ok"):
+        pass
+    with pytest.raises(ValueError):
+        with track("block_seconds", stage="failed"):
+            raise ValueError("boom")
+
+    rows = {row["labels"]: row["count"] for row in get_metrics_summary()}
+    assert rows == {"stage=ok": 1, "stage=failed": 1}
+
+
+def test_timed_labels_calls_with_the_function_name():
+    @timed("work_seconds", kind="test")
+    def do_work(x):
+        time.sleep(0.002)
+        return x * 2
+
+    assert do_work(21) == 42
+    assert do_work.__name__ == "do_work"
+    [row] = get_metrics_summary()
+    assert (row["metric"], row["labels"], row["count"]) == ("work_seconds", "kind=test, operation=do_work", 1)
+    assert row["mean_ms"] >= 2
+
+
+def test_render_prometheus_text():
+    observe("query_seconds", 0.003, operation="read")
+    observe("query_seconds", 0.2, operation="read")
+    increment("tokens_total", 7, direction="in")
+
+    lines = render_prometheus().splitlines()
+    assert lines[0] == "# TYPE query_seconds histogram"
+    assert 'query_seconds_bucket{operation="read",le="0.001"} 0' in lines
+    assert 'query_seconds_bucket{operation="read",le="0.005"} 1' in lines
+    assert 'query_seconds_bucket{operation="read",le="0.25"} 2' in lines
+    assert 'query_seconds_bucket{operation="read",le="+Inf"} 2' in lines
+    assert 'query_seconds_count{operation="read"} 2' in lines
+    assert "# TYPE tokens_total counter" in lines
+    assert 'tokens_total{direction="in"} 7' in lines
+
+
+def test_render_prometheus_escapes_label_values():
+    increment("errors_total", error='bad "path" C:\\tmp\nsecond line')
+    assert 'errors_total{error="bad \\"path\\" C:\\\\tmp\\nsecond line"} 1' in render_prometheus().splitlines()
+
+
+def test_metrics_file_is_written_periodically(tmp_path):
+    path = tmp_path / "metrics.prom"
+    observe("query_seconds", 0.01, operation="read")
+    start_metrics_export(str(path), interval_seconds=0.01)
+    try:
+        deadline = time.monotonic() + 5
+        while not path.exists() and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        stop_metrics_export()
+    assert 'query_seconds_count{operation="read"} 1' in path.read_text()
+
+    write_prometheus_file(str(path))
+    assert not (tmp_path / "metrics.prom.tmp").exists()
@@ -0,0 +1,84 @@
+"""Background job scheduler tests, against a scratch SQLite database."""
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.data.briefs import claim_job_run, get_job_state
+from app.data.db import SQLiteBackend, set_backend
+from app.data.schema import create_all_tables
+from app.services.scheduler import Job, JobScheduler
+
+
+@pytest.fixture(autouse=True)
+def scratch_database(tmp_path):
+    backend = SQLiteBackend(tmp_path / "jobs.db")
+    set_backend(backend)
+    conn = backend.connect()
+    create_all_tables(conn)
+    conn.close()
+    yield
+    set_backend(None)
+
+
+def counting_job(calls):
+    return Job("counted", lambda _: calls.append(1), interval_seconds=60)
+
+
+def failing_job():
+    def run(_):
+        raise RuntimeError("model unavailable")
+    return Job("flaky", run, interval_seconds=60)
+
+
+def run_once(jobs, now=None):
+    scheduler = JobScheduler(jobs, jitter=0, retry_base=600)
+    due = scheduler.tick(now)
+    scheduler.stop(wait=True)
+    return due
+
+
+def test_failure_backs_off_and_is_recorded():
+    job = failing_job()
+    assert run_once([job]) == [job]
+
+    failures, _, next_run = get_job_state("flaky")
+    assert failures == 1
+    assert datetime.fromisoformat(next_run) > datetime.now() + timedelta(seconds=500)
+
+
+def test_restart_keeps_the_backoff():
+    run_once([failing_job()])
+
+    restarted = failing_job()
+    assert run_once([restarted]) == []
+    assert restarted.failures == 1
+    assert restarted.next_run > datetime.now() + timedelta(seconds=500)
+
+    # Once the backoff has passed, the job runs again and backs off further
+    assert run_once([restarted], now=restarted.next_run) == [restarted]
+    assert get_job_state("flaky")[0] == 2
+
+
+def test_only_one_scheduler_runs_a_due_job():
+    calls = []
+    first, second = counting_job(calls), counting_job(calls)
+    # Both processes start before either has run the job
+    schedulers = [JobScheduler([first], jitter=0), JobScheduler([second], jitter=0)]
+    for scheduler in schedulers:
+        scheduler.tick()
+        scheduler.stop(wait=True)
+
+    assert calls == [1]
+    # The process that lost the claim follows the schedule the winner stored
+    assert second.next_run == first.next_run.replace(microsecond=0)
+    assert get_job_state("counted")[0] == 0
+
+
+def test_a_dead_schedulers_claim_expires():
+    # A process claimed the run and died; its lease ran out a minute ago
+    assert claim_job_run("counted", None, "2025-01-01T09:00:00",
+                         (datetime.now() - timedelta(minutes=1)).isoformat(timespec="seconds"))
+    calls = []
+    assert run_once([counting_job(calls)]) != []
+    assert calls == [1]
+    assert get_job_state("counted")[2] > datetime.now().isoformat(timespec="seconds")
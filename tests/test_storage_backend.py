@@ -0,0 +1,110 @@
+"""Storage backend tests, on SQLite and (with DATABASE_URL) PostgreSQL; see conftest.py."""
+import threading
+
+import pytest
+
+from app.data import datasets
+from app.data.archive import archive_closed_records
+from app.data.correlation import correlate_new_rows
+from app.data.datasets import load_csv_to_table
+from app.data.db import DATA_DIR, execute_insert, fetch_one, read_dataframe
+from app.data.schema import create_all_tables
+
+TABLES = [
+    "users", "cyber_incidents", "datasets_metadata", "it_tickets", "archive_partitions", "summary_cache",
+    "ai_briefs", "job_runs", "incident_clusters", "incident_lsh_buckets", "correlation_state",
+    "incident_ticket_load", "incident_ticket_links", "anomaly_state", "anomaly_baselines",
+    "anomaly_alerts",
+]
+CYBER_MAP = {'timestamp': 'date', 'category': 'incident_type'}
+TICKETS_MAP = {'created_at': 'created_date'}
+
+
+def test_schema_creates_every_table(backend):
+    conn = backend.connect()
+    try:
+        for table_name in TABLES:
+            assert backend.table_columns(conn, table_name), table_name
+        # Creating the schema again is a no-op
+        create_all_tables(conn)
+    finally:
+        conn.close()
+
+
+def test_execute_insert_and_read_dataframe(backend):
+    query = "INSERT INTO datasets_metadata (dataset_name, category, record_count, file_size_mb) VALUES (?, ?, ?, ?)"
+    first = execute_insert(query, ("Server_Logs", "Operations", 800000, 12.5))
+    second = execute_insert(query, ("HR_Salary", "HR", 3000, 0.4))
+    assert second > first
+
+    df = read_dataframe("SELECT dataset_name, record_count, file_size_mb FROM datasets_metadata WHERE id = ?", (second,))
+    assert df.to_dict("records") == [{"dataset_name": "HR_Salary", "record_count": 3000, "file_size_mb": 0.4}]
+
+
+def test_load_datasets_metadata_csv(backend):
+    assert load_csv_to_table(str(DATA_DIR / "datasets_metadata.csv"), "datasets_metadata") == 5
+
+    df = read_dataframe("SELECT dataset_name, source, last_updated, record_count FROM datasets_metadata ORDER BY id")
+    assert df["dataset_name"].tolist()[0] == "Customer_Churn"
+    assert df.iloc[0].to_dict() == {"dataset_name": "Customer_Churn", "source": "data_scientist",
+                                    "last_updated": "2024-01-15", "record_count": 5000}
+
+
+def test_load_incident_and_ticket_csvs(backend):
+    assert load_csv_to_table(str(DATA_DIR / "cyber_incidents.csv"), "cyber_incidents", column_map=CYBER_MAP) == 115
+    assert load_csv_to_table(str(DATA_DIR / "it_tickets.csv"), "it_tickets", column_map=TICKETS_MAP) == 150
+
+    assert fetch_one("SELECT COUNT(*) FROM cyber_incidents")[0] == 115
+    assert fetch_one("SELECT COUNT(*) FROM it_tickets")[0] == 150
+    # The follow-up stages ran over the new rows
+    assert fetch_one("SELECT COUNT(*) FROM incident_clusters")[0] == 115
+    assert fetch_one("SELECT COUNT(*) FROM incident_ticket_load")[0] == 115
+
+
+def test_failed_follow_up_stage_keeps_the_load(backend, monkeypatch):
+    def unavailable():
+        raise RuntimeError("correlation unavailable")
+    monkeypatch.setattr(datasets, "correlate_new_rows", unavailable)
+
+    assert load_csv_to_table(str(DATA_DIR / "cyber_incidents.csv"), "cyber_incidents", column_map=CYBER_MAP) == 115
+    # The stages after the failed one still ran
+    assert fetch_one("SELECT COUNT(*) FROM incident_clusters")[0] == 115
+    assert fetch_one("SELECT version FROM anomaly_state WHERE stream = 'incidents'") is not None
+
+
+def test_archiving_waits_for_correlation(backend, monkeypatch):
+    monkeypatch.setattr(datasets, "correlate_new_rows", lambda: None)
+    load_csv_to_table(str(DATA_DIR / "cyber_incidents.csv"), "cyber_incidents", column_map=CYBER_MAP)
+    # Nothing has been correlated yet, so nothing may leave the hot table
+    assert archive_closed_records("cyber_incidents") == 0
+
+    correlate_new_rows()
+    assert archive_closed_records("cyber_incidents") == 60
+    assert fetch_one("SELECT COUNT(*) FROM cyber_incidents")[0] == 55
+
+
+def test_failed_load_releases_its_connection(backend, tmp_path):
+    # dataset_name is NOT NULL, so every load of this file fails in the write stage
+    bad_csv = tmp_path / "no_names.csv"
+    bad_csv.write_text("rows,uploaded_by\n10,it_admin\n")
+    for _ in range(6):
+        assert load_csv_to_table(str(bad_csv), "datasets_metadata") == 0
+    assert fetch_one("SELECT COUNT(*) FROM datasets_metadata")[0] == 0
+
+
+def test_connect_waits_for_a_free_pooled_connection(backend):
+    if backend.name != "postgresql":
+        pytest.skip("SQLite opens a new connection every time")
+
+    held = [backend.connect() for _ in range(4)]
+    waiter = {}
+    thread = threading.Thread(target=lambda: waiter.update(conn=backend.connect()))
+    thread.start()
+    thread.join(0.2)
+    assert "conn" not in waiter
+
+    held.pop().close()
+    thread.join(5)
+    assert "conn" in waiter
+    for conn in held + [waiter["conn"]]:
+        conn.close()
@@ -0,0 +1,118 @@
+"""Map-reduce summarizer tests, run against a fake model and a scratch SQLite cache."""
+import pandas as pd
+import pytest
+
+from app.data.db import DATA_DIR, SQLiteBackend, execute, fetch_one, set_backend
+from app.data.schema import create_all_tables
+from app.data.summaries import get_cached_summaries, prune_summaries, save_summaries
+from app.services.summarizer import (
+    _cache_key, column_partitions, month_partitions, split_into_chunks, summarize_frame
+)
+
+INSTRUCTIONS = "Summarize the incidents."
+
+
+class FakeModel:
+    """Stand-in for the model: counts calls per step and answers with the prompt's size."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, prompt, step):
+        self.calls.append(step)
+        return f"{step}: {len(prompt)} chars"
+
+
+@pytest.fixture(autouse=True)
+def scratch_cache(tmp_path):
+    backend = SQLiteBackend(tmp_path / "summaries.db")
+    set_backend(backend)
+    conn = backend.connect()
+    create_all_tables(conn)
+    conn.close()
+    yield
+    set_backend(None)
+
+
+@pytest.fixture
+def incidents():
+    return pd.read_csv(DATA_DIR / "cyber_incidents.csv")
+
+
+def test_small_table_is_one_call(incidents):
+    model = FakeModel()
+    summarize_frame(incidents, INSTRUCTIONS, model, "test", partition_by=month_partitions("timestamp"))
+    assert model.calls == ["final"]
+
+
+def test_consecutive_partitions_are_packed_up_to_the_budget(incidents):
+    partition_by = month_partitions("timestamp")
+    months = partition_by(incidents).nunique()
+    chunks = split_into_chunks(incidents, partition_by, max_tokens=2000)
+
+    assert 1 < len(chunks) < months
+    assert sum(len(chunk_df) for _, chunk_df in chunks) == len(incidents)
+    # Months stay in order and are never spread over two packed chunks
+    chunk_months = [partition_by(chunk_df).unique().tolist() for _, chunk_df in chunks]
+    assert sum(chunk_months, []) == sorted(partition_by(incidents).unique())
+
+
+def test_oversized_partition_is_split_on_its_own(incidents):
+    chunks = split_into_chunks(incidents, month_partitions("timestamp"), max_tokens=200)
+    split = [label for label, _ in chunks if "#" in label]
+    assert split
+    assert all(" to " not in label for label in split)
+
+
+def test_rerun_is_served_from_the_cache(incidents):
+    partition_by = month_partitions("timestamp")
+    first = FakeModel()
+    brief = summarize_frame(incidents, INSTRUCTIONS, first, "test", partition_by=partition_by, max_tokens=2000)
+    chunks = len(split_into_chunks(incidents, partition_by, max_tokens=2000))
+    assert first.calls.count("map") == chunks
+    assert first.calls[-1] == "final"
+
+    rerun = FakeModel()
+    assert summarize_frame(incidents, INSTRUCTIONS, rerun, "test", partition_by=partition_by, max_tokens=2000) == brief
+    assert rerun.calls == []
+
+    # Changing the last month only re-summarizes its chunk and the reduce above it
+    changed = incidents.copy()
+    changed.loc[changed["timestamp"].idxmax(), "description"] = "Rewritten description"
+    after_change = FakeModel()
+    summarize_frame(changed, INSTRUCTIONS, after_change, "test", partition_by=partition_by, max_tokens=2000)
+    assert after_change.calls.count("map") == 1
+
+
+def test_editing_an_early_partition_only_changes_nearby_chunks():
+    df = pd.DataFrame({"part": [f"p{i:02d}" for i in range(40) for _ in range(10)], "text": ["x" * 40] * 400})
+    partition_by = column_partitions("part")
+
+    def chunk_keys(frame):
+        return {_cache_key(label, chunk_df.to_csv(index=False))
+                for label, chunk_df in split_into_chunks(frame, partition_by, max_tokens=500)}
+
+    before = chunk_keys(df)
+    # Emptying most of the first partition would shift every later chunk if packing were greedy
+    after = chunk_keys(df.drop(df.index[:9]))
+    assert len(before) > 10
+    assert len(after - before) <= 2
+
+
+def test_unused_summaries_are_pruned():
+    save_summaries("test", {"old": "stale summary", "recent": "fresh summary"})
+    execute("UPDATE summary_cache SET created_at = '2000-01-01 00:00:00' WHERE cache_key = 'old'")
+
+    assert prune_summaries() == 1
+    assert get_cached_summaries(["old", "recent"]) == {"recent": "fresh summary"}
+
+
+def test_cache_hits_keep_summaries_alive(incidents):
+    model = FakeModel()
+    summarize_frame(incidents, INSTRUCTIONS, model, "test")
+    execute("UPDATE summary_cache SET created_at = '2000-01-01 00:00:00'")
+
+    summarize_frame(incidents, INSTRUCTIONS, model, "test")
+    assert model.calls == ["final"]
+    assert prune_summaries() == 0
+    assert fetch_one("SELECT COUNT(*) FROM summary_cache")[0] == 1